@@ -0,0 +1,52 @@
+"""
+Benchmark the verification of an access token for each signature algorithm and JOSE backend.
+
+Usage:
+
+    python benchmarks/algorithms.py
+"""
+
+import time
+import timeit
+
+from jwcrypto import jwk, jwt
+
+from fief_client.jose import CryptographyBackend, IndexedJWKSet, JWCryptoBackend
+
+NUMBER = 2000
+
+KEYS = {
+    "RS256": {"kty": "RSA", "size": 2048},
+    "ES256": {"kty": "EC", "crv": "P-256"},
+    "EdDSA": {"kty": "OKP", "crv": "Ed25519"},
+}
+
+
+def main() -> None:
+    print(f"{'algorithm':>9} {'backend':>20} {'µs/token':>9}")
+    for algorithm, parameters in KEYS.items():
+        key = jwk.JWK.generate(kid="key", use="sig", **parameters)
+        jwks = IndexedJWKSet()
+        jwks.add(jwk.JWK(**key.export_public(as_dict=True)))
+
+        token = jwt.JWT(
+            header={"alg": algorithm, "kid": key.kid},
+            claims={"sub": "anne", "exp": int(time.time()) + 3600},
+        )
+        token.make_signed_token(key)
+        serialized_token = token.serialize()
+
+        for backend in (JWCryptoBackend(), CryptographyBackend()):
+            duration = timeit.timeit(
+                lambda: backend.decode_jws(
+                    serialized_token, jwks, algorithms=[algorithm]
+                ),
+                number=NUMBER,
+            )
+            print(
+                f"{algorithm:>9} {type(backend).__name__:>20} {duration / NUMBER * 1e6:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
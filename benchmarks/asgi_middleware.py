@@ -0,0 +1,106 @@
+"""
+Benchmark the per-request cost of authenticating a FastAPI route
+with a `FiefAuth` dependency or with `FiefAuthMiddleware`.
+
+The ASGI application is called directly, without HTTP server.
+
+Usage:
+
+    python benchmarks/asgi_middleware.py
+"""
+
+import asyncio
+import time
+import uuid
+
+from fastapi import Depends, FastAPI, Request
+from fastapi.security import HTTPBearer
+from jwcrypto import jwk, jwt
+
+from fief_client import FiefAccessTokenInfo, FiefAsync
+from fief_client.integrations.asgi import FiefAuthMiddleware, FiefPathRule
+from fief_client.integrations.fastapi import FiefAuth
+
+REQUESTS = 5000
+
+
+async def measure(app: FastAPI, path: str, token: str) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200
+
+    def make_scope():
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+            "client": ("127.0.0.1", 1234),
+            "server": ("127.0.0.1", 80),
+        }
+
+    await app(make_scope(), receive, send)
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await app(make_scope(), receive, send)
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    key = jwk.JWK.generate(kty="RSA", size=2048, kid="key", use="sig")
+    token = jwt.JWT(
+        header={"alg": "RS256", "kid": key.kid},
+        claims={
+            "sub": str(uuid.uuid4()),
+            "scope": "openid",
+            "acr": "0",
+            "permissions": [],
+            "exp": int(time.time()) + 3600,
+        },
+    )
+    token.make_signed_token(key)
+
+    async with FiefAsync(
+        "https://example.fief.dev",
+        "CLIENT_ID",
+        openid_configuration={},
+        jwks={"keys": [key.export_public(as_dict=True)]},
+    ) as fief:
+        auth = FiefAuth(fief, HTTPBearer(auto_error=False))
+        app = FastAPI()
+        app.add_middleware(
+            FiefAuthMiddleware, client=fief, rules=[FiefPathRule("/middleware")]
+        )
+
+        @app.get("/dependency")
+        async def get_dependency(
+            access_token_info: FiefAccessTokenInfo = Depends(
+                auth.authenticated(scope=["openid"])
+            ),
+        ):
+            return None
+
+        @app.get("/middleware")
+        async def get_middleware(request: Request):
+            return None
+
+        print(f"{'mode':>10} {'µs/request':>10}")
+        for mode, path in (
+            ("dependency", "/dependency"),
+            ("middleware", "/middleware"),
+        ):
+            duration = await measure(app, path, token.serialize())
+            print(f"{mode:>10} {duration / REQUESTS * 1e6:>10.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""
+Benchmark the event loop lag of `FiefAsync` while validating many access tokens concurrently,
+with tokens decoded on the event loop or in a thread executor.
+
+A ticker coroutine sleeps for a short interval in a loop
+and records how late it wakes up: the lag other coroutines would suffer.
+
+Usage:
+
+    python benchmarks/event_loop_lag.py
+"""
+
+import asyncio
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from jwcrypto import jwk, jwt
+
+from fief_client import FiefAsync
+
+CONCURRENCY = 50
+TOKENS = 2000
+TICK = 0.001
+
+
+async def measure(fief: FiefAsync, tokens: list[str]) -> tuple[float, list[float]]:
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    async def worker(queue: asyncio.Queue[str]) -> None:
+        while not queue.empty():
+            await fief.validate_access_token(queue.get_nowait())
+
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for token in tokens:
+        queue.put_nowait(token)
+
+    ticker_task = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(queue) for _ in range(CONCURRENCY)))
+    duration = time.perf_counter() - start
+    done.set()
+    await ticker_task
+    return duration, lags
+
+
+async def main() -> None:
+    key = jwk.JWK.generate(kty="RSA", size=2048, kid="key", use="sig")
+    tokens = []
+    for _ in range(TOKENS):
+        token = jwt.JWT(
+            header={"alg": "RS256", "kid": key.kid},
+            claims={
+                "sub": str(uuid.uuid4()),
+                "scope": "openid",
+                "acr": "0",
+                "permissions": [],
+                "exp": int(time.time()) + 3600,
+            },
+        )
+        token.make_signed_token(key)
+        tokens.append(token.serialize())
+
+    print(f"{'mode':>10} {'tokens/s':>9} {'lag p50 ms':>11} {'lag max ms':>11}")
+    executor: Optional[ThreadPoolExecutor]
+    for mode, executor in (
+        ("loop", None),
+        ("executor", ThreadPoolExecutor(max_workers=4)),
+    ):
+        async with FiefAsync(
+            "https://example.fief.dev",
+            "CLIENT_ID",
+            openid_configuration={},
+            jwks={"keys": [key.export_public(as_dict=True)]},
+            executor=executor,
+        ) as fief:
+            duration, lags = await measure(fief, tokens)
+        if executor is not None:
+            executor.shutdown()
+        print(
+            f"{mode:>10} {TOKENS / duration:>9.0f} "
+            f"{statistics.median(lags) * 1e3:>11.2f} {max(lags) * 1e3:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+"""
+Benchmark the startup of a FastAPI application with many routes protected by `FiefAuth`:
+declaration of the routes and generation of the OpenAPI schema.
+
+Usage:
+
+    python benchmarks/fastapi_routes.py
+"""
+
+import time
+
+from fastapi import Depends, FastAPI
+from fastapi.security import HTTPBearer
+
+from fief_client import FiefAccessTokenInfo, FiefAsync
+from fief_client.integrations.fastapi import FiefAuth
+
+ROUTES = 600
+SCOPES = ["openid", "castles", "dungeons"]
+
+
+def main() -> None:
+    fief = FiefAsync("https://example.fief.dev", "CLIENT_ID")
+    auth = FiefAuth(fief, HTTPBearer(auto_error=False))
+    app = FastAPI()
+
+    start = time.perf_counter()
+    for i in range(ROUTES):
+
+        async def endpoint(
+            access_token_info: FiefAccessTokenInfo = Depends(
+                auth.authenticated(scope=[SCOPES[i % len(SCOPES)]])
+            ),
+        ):
+            return access_token_info
+
+        app.add_api_route(f"/route-{i}", endpoint)
+    routes_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    app.openapi()
+    openapi_duration = time.perf_counter() - start
+
+    print(f"{ROUTES} routes: {routes_duration * 1e3:.0f} ms")
+    print(f"OpenAPI schema: {openapi_duration * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
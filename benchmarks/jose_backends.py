@@ -0,0 +1,41 @@
+"""
+Benchmark the verification of an access token with each JOSE backend.
+
+Usage:
+
+    python benchmarks/jose_backends.py
+"""
+
+import time
+import timeit
+
+from jwcrypto import jwk, jwt
+
+from fief_client.jose import CryptographyBackend, IndexedJWKSet, JWCryptoBackend
+
+NUMBER = 2000
+
+
+def main() -> None:
+    key = jwk.JWK.generate(kty="RSA", size=2048, kid="key", use="sig")
+    jwks = IndexedJWKSet()
+    jwks.add(jwk.JWK(**key.export_public(as_dict=True)))
+
+    token = jwt.JWT(
+        header={"alg": "RS256", "kid": key.kid},
+        claims={"sub": "anne", "exp": int(time.time()) + 3600},
+    )
+    token.make_signed_token(key)
+    serialized_token = token.serialize()
+
+    print(f"{'backend':>20} {'µs/token':>9}")
+    for backend in (JWCryptoBackend(), CryptographyBackend()):
+        duration = timeit.timeit(
+            lambda: backend.decode_jws(serialized_token, jwks),
+            number=NUMBER,
+        )
+        print(f"{type(backend).__name__:>20} {duration / NUMBER * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark the verification of an access token against JWKS of various sizes,
+with a plain `jwcrypto.jwk.JWKSet` and with an `IndexedJWKSet`.
+
+Usage:
+
+    python benchmarks/jwks_lookup.py
+"""
+
+import timeit
+
+from jwcrypto import jwk, jwt
+
+from fief_client.jose import IndexedJWKSet
+
+NUMBER = 1000
+
+
+def generate_jwks(size: int) -> tuple[str, jwk.JWK]:
+    jwks = jwk.JWKSet()
+    for i in range(size):
+        key = jwk.JWK.generate(kty="RSA", size=2048, kid=f"key-{i}", use="sig")
+        jwks.add(key)
+    return jwks.export(private_keys=False), key
+
+
+def sign(key: jwk.JWK) -> str:
+    token = jwt.JWT(header={"alg": "RS256", "kid": key.kid}, claims={"sub": "anne"})
+    token.make_signed_token(key)
+    return token.serialize()
+
+
+def main() -> None:
+    print(f"{'keys':>5} {'JWKSet (µs)':>12} {'IndexedJWKSet (µs)':>19} {'speedup':>8}")
+    for size in (1, 5, 20):
+        jwks_json, last_key = generate_jwks(size)
+        # Worst case for the linear scan: the token is signed with the last key
+        token = sign(last_key)
+
+        jwks = jwk.JWKSet.from_json(jwks_json)
+        indexed_jwks = IndexedJWKSet.from_json(jwks_json)
+
+        plain = timeit.timeit(
+            lambda: jwt.JWT(jwt=token, algs=["RS256"], key=jwks), number=NUMBER
+        )
+        indexed = timeit.timeit(
+            lambda: jwt.JWT(
+                jwt=token,
+                algs=["RS256"],
+                key=indexed_jwks.get_verification_key(token),
+            ),
+            number=NUMBER,
+        )
+        print(
+            f"{size:>5} {plain / NUMBER * 1e6:>12.1f} "
+            f"{indexed / NUMBER * 1e6:>19.1f} {plain / indexed:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
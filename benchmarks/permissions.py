@@ -0,0 +1,58 @@
+"""
+Benchmark the check of required permissions on an access token with many permissions,
+with sets or with the bitmasks of a `PermissionCatalog`, and the memory held by each.
+
+Usage:
+
+    python benchmarks/permissions.py
+"""
+
+import sys
+import timeit
+import uuid
+
+from fief_client import FiefAccessTokenInfo, FiefAccessTokenRequirements, FiefACR
+from fief_client.permissions import PermissionCatalog
+
+NUMBER = 100_000
+CATALOG_SIZE = 5000
+TOKEN_PERMISSIONS = 500
+REQUIRED_PERMISSIONS = 10
+
+
+def main() -> None:
+    permissions = [f"resource{i}:action{i % 7}" for i in range(CATALOG_SIZE)]
+    catalog = PermissionCatalog(permissions)
+    token_permissions = permissions[::10][:TOKEN_PERMISSIONS]
+    required_permissions = token_permissions[::50][:REQUIRED_PERMISSIONS]
+
+    info = FiefAccessTokenInfo(
+        id=uuid.uuid4(),
+        scope=["openid"],
+        acr=FiefACR.LEVEL_ZERO,
+        permissions=token_permissions,
+        access_token="ACCESS_TOKEN",
+    )
+
+    print(f"{'mode':>8} {'ns/check':>9} {'bytes':>7}")
+    for mode, requirements, memory in (
+        (
+            "sets",
+            FiefAccessTokenRequirements(permissions=required_permissions),
+            sys.getsizeof(info.permission_set),
+        ),
+        (
+            "bitmask",
+            FiefAccessTokenRequirements(
+                permissions=required_permissions, permission_catalog=catalog
+            ),
+            sys.getsizeof(info.get_permission_mask(catalog)),
+        ),
+    ):
+        requirements.check(info)
+        duration = timeit.timeit(lambda: requirements.check(info), number=NUMBER)
+        print(f"{mode:>8} {duration / NUMBER * 1e9:>9.0f} {memory:>7}")
+
+
+if __name__ == "__main__":
+    main()
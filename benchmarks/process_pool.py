@@ -0,0 +1,75 @@
+"""
+Benchmark the throughput of access token validation with `ProcessPoolBackend`,
+for an increasing number of worker processes, against `CryptographyBackend` in a single process.
+
+Tokens are validated by a pool of threads, like in a threaded web server.
+
+Usage:
+
+    python benchmarks/process_pool.py
+"""
+
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from jwcrypto import jwk, jwt
+
+from fief_client import Fief
+from fief_client.jose import CryptographyBackend, JOSEBackend, ProcessPoolBackend
+
+TOKENS = 4000
+THREADS_PER_WORKER = 4
+
+
+def measure(
+    backend: JOSEBackend, key: jwk.JWK, tokens: list[str], threads: int
+) -> float:
+    with Fief(
+        "https://example.fief.dev",
+        "CLIENT_ID",
+        openid_configuration={},
+        jwks={"keys": [key.export_public(as_dict=True)]},
+        jose_backend=backend,
+    ) as fief:
+        # Warm up the worker processes
+        fief.validate_access_token(tokens[0])
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            start = time.perf_counter()
+            list(executor.map(fief.validate_access_token, tokens))
+            return time.perf_counter() - start
+
+
+def main() -> None:
+    key = jwk.JWK.generate(kty="RSA", size=2048, kid="key", use="sig")
+    tokens = []
+    for _ in range(TOKENS):
+        token = jwt.JWT(
+            header={"alg": "RS256", "kid": key.kid},
+            claims={
+                "sub": str(uuid.uuid4()),
+                "scope": "openid",
+                "acr": "0",
+                "permissions": [],
+                "exp": int(time.time()) + 3600,
+            },
+        )
+        token.make_signed_token(key)
+        tokens.append(token.serialize())
+
+    print(f"{os.cpu_count()} processors")
+    print(f"{'backend':>20} {'workers':>7} {'tokens/s':>9}")
+    duration = measure(CryptographyBackend(), key, tokens, THREADS_PER_WORKER)
+    print(f"{'CryptographyBackend':>20} {'-':>7} {TOKENS / duration:>9.0f}")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        with ProcessPoolBackend(max_workers=workers) as backend:
+            duration = measure(backend, key, tokens, workers * THREADS_PER_WORKER)
+        print(f"{'ProcessPoolBackend':>20} {workers:>7} {TOKENS / duration:>9.0f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
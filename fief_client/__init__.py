@@ -3,11 +3,15 @@
 from fief_client.client import (
     Fief,
     FiefAccessTokenACRTooLow,
+    FiefAccessTokenAllOf,
+    FiefAccessTokenAnyOf,
     FiefAccessTokenExpired,
     FiefAccessTokenInfo,
     FiefAccessTokenInvalid,
     FiefAccessTokenMissingPermission,
     FiefAccessTokenMissingScope,
+    FiefAccessTokenPolicy,
+    FiefAccessTokenRequirements,
     FiefACR,
     FiefAsync,
     FiefError,
@@ -25,6 +29,10 @@ __all__ = [
     "FiefAsync",
     "FiefTokenResponse",
     "FiefAccessTokenInfo",
+    "FiefAccessTokenRequirements",
+    "FiefAccessTokenPolicy",
+    "FiefAccessTokenAnyOf",
+    "FiefAccessTokenAllOf",
     "FiefUserInfo",
     "FiefError",
     "FiefAccessTokenACRTooLow",
@@ -34,7 +42,10 @@ __all__ = [
     "FiefAccessTokenInvalid",
     "FiefIdTokenInvalid",
     "FiefRequestError",
+    "cache",
     "crypto",
+    "jose",
+    "permissions",
     "pkce",
     "integrations",
 ]
@@ -0,0 +1,175 @@
+"""Caches used by the Fief clients."""
+
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any, Generic, Optional, TypeVar, Union
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Thread-safe in-memory cache with a maximum size and an expiration time per entry.
+
+    When the cache is full, the least recently used entry is evicted.
+
+    **Example:**
+
+    ```py
+    cache = LRUCache(maxsize=1024)
+    cache.set("key", "value", expires_at=time.time() + 60)
+    cache.get("key")
+    ```
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        """
+        :param maxsize: Maximum number of entries.
+        """
+        self.maxsize = maxsize
+        self._entries: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> Optional[V]:
+        """
+        Return the value stored for a key, or `None` if it's missing or expired.
+
+        :param key: Key of the entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V, expires_at: float) -> None:
+        """
+        Store a value for a key.
+
+        :param key: Key of the entry.
+        :param value: Value to store.
+        :param expires_at: Timestamp after which the entry is expired.
+        """
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all the entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+class FileCache:
+    """
+    Cache storing JSON documents in a directory, with an expiration time.
+
+    Several processes can share the same directory:
+    files are written atomically and their freshness is computed from their modification time.
+    It allows workers of a pre-fork server, like Gunicorn or Uvicorn, to share a single fetch.
+
+    Reading or writing errors are ignored: the cache behaves as if the entry was missing.
+
+    Anyone able to write in the directory could plant a JWKS and forge tokens.
+    The directory is thus created with the mode `0o700`,
+    and it's ignored, as if it was empty, if it's not owned by the current user
+    or if it's writable by its group or by others.
+    Don't use a shared directory like `/tmp`.
+
+    **Example:**
+
+    ```py
+    cache = FileCache(os.path.expanduser("~/.cache/fief"))
+    cache.set("jwks", {"keys": []}, ttl=3600)
+    cache.get("jwks")
+    ```
+    """
+
+    def __init__(self, directory: Union[str, "os.PathLike[str]"]) -> None:
+        """
+        :param directory: Path to the directory where to store the cache files.
+        It's created with the mode `0o700` if it doesn't exist.
+        """
+        self.directory = os.fspath(directory)
+
+    def get(self, key: str) -> Optional[tuple[Any, float]]:
+        """
+        Return the value stored for a key and its remaining lifetime in seconds,
+        or `None` if it's missing or expired.
+
+        :param key: Key of the entry.
+        """
+        if not self._is_trusted():
+            return None
+        path = self._get_path(key)
+        try:
+            with open(path) as file:
+                entry = json.load(file)
+            remaining = os.stat(path).st_mtime + float(entry["ttl"]) - time.time()
+            value = entry["value"]
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+        if remaining <= 0:
+            return None
+        return value, remaining
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Store a value for a key.
+
+        :param key: Key of the entry.
+        :param value: JSON-serializable value.
+        :param ttl: Number of seconds the value is valid.
+        """
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            if not self._is_trusted():
+                return
+            fd, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as file:
+                    json.dump({"ttl": ttl, "value": value}, file)
+                os.replace(temporary_path, self._get_path(key))
+            except BaseException:
+                os.unlink(temporary_path)
+                raise
+        except (OSError, TypeError, ValueError):
+            pass
+
+    def _is_trusted(self) -> bool:
+        """
+        Check that only the current user can write in the directory.
+        """
+        try:
+            directory_stat = os.stat(self.directory)
+        except OSError:
+            return False
+        getuid = getattr(os, "getuid", None)  # Not available on Windows
+        if getuid is not None and directory_stat.st_uid != getuid():
+            return False
+        return not directory_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+    def _get_path(self, key: str) -> str:
+        filename = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{filename}.json")
+
+
+__all__ = ["FileCache", "LRUCache"]
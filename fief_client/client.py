@@ -1,18 +1,93 @@
+import asyncio
+import concurrent.futures
 import contextlib
+import functools
+import hashlib
 import json
+import math
+import os
+import re
+import threading
+import time
 import uuid
-from collections.abc import Mapping
+from abc import ABC, abstractmethod
+from collections.abc import (
+    AsyncGenerator,
+    Awaitable,
+    Generator,
+    Iterable,
+    Mapping,
+    Sequence,
+)
 from enum import Enum
-from typing import Any, Optional, TypedDict, Union
+from typing import Any, Callable, Optional, TypedDict, TypeVar, Union
 from urllib.parse import urlencode, urlsplit, urlunsplit
 
 import httpx
 from httpx._types import CertTypes, VerifyTypes
 from jwcrypto import jwk, jwt
 
+from fief_client.cache import FileCache, LRUCache
 from fief_client.crypto import is_valid_hash
+from fief_client.jose import (
+    DEFAULT_ALGORITHMS,
+    IndexedJWKSet,
+    JOSEBackend,
+    JWCryptoBackend,
+    ProcessPoolBackend,
+    get_algorithm,
+)
+from fief_client.permissions import (
+    PermissionCatalog,
+    PermissionIndex,
+    PermissionRequirement,
+)
 
 HTTPXClient = Union[httpx.Client, httpx.AsyncClient]
+HTTPXTransport = Union[httpx.BaseTransport, httpx.AsyncBaseTransport]
+JSONSource = Union[str, "os.PathLike[str]"]
+OpenIDConfigurationSource = Union[Mapping[str, Any], JSONSource]
+JWKSSource = Union[jwk.JWKSet, Mapping[str, Any], JSONSource]
+
+T = TypeVar("T")
+
+CACHE_CONTROL_MAX_AGE_REGEX = re.compile(
+    r"(?:^|,)\s*max-age\s*=\s*(\d+)", re.IGNORECASE
+)
+REFRESHER_MIN_DELAY = 1.0
+"""Minimum number of seconds the background refresher waits between two refreshes."""
+
+CACHE_CONTROL_NO_CACHE_REGEX = re.compile(
+    r"(?:^|,)\s*no-(?:cache|store)\s*(?:,|$)", re.IGNORECASE
+)
+
+
+def _read_json_source(source: JSONSource) -> str:
+    """
+    Return the JSON document of a source, which is either a JSON string or a file path.
+    """
+    if isinstance(source, str) and source.lstrip().startswith("{"):
+        return source
+    with open(source) as file:
+        return file.read()
+
+
+def _get_cache_ttl(response: httpx.Response) -> Optional[int]:
+    """
+    Return the number of seconds a response may be cached
+    according to its `Cache-Control` header, if any.
+
+    `no-cache` and `no-store` directives take precedence over `max-age`.
+    """
+    cache_control = response.headers.get("Cache-Control")
+    if cache_control is None:
+        return None
+    if CACHE_CONTROL_NO_CACHE_REGEX.search(cache_control) is not None:
+        return 0
+    match = CACHE_CONTROL_MAX_AGE_REGEX.search(cache_control)
+    if match is None:
+        return None
+    return int(match.group(1))
 
 
 class FiefACR(str, Enum):
@@ -44,12 +119,10 @@ class FiefACR(str, Enum):
         if self == other:
             return not strict
 
-        for elem in FiefACR:
-            if self == elem:
-                return asc
-            elif other == elem:
-                return not asc
-        raise RuntimeError()  # pragma: no cover
+        return (_ACR_ORDINALS[self] < _ACR_ORDINALS[other]) == asc
+
+
+_ACR_ORDINALS: dict[FiefACR, int] = {acr: i for i, acr in enumerate(FiefACR)}
 
 
 class FiefTokenResponse(TypedDict):
@@ -69,9 +142,13 @@ class FiefTokenResponse(TypedDict):
     """Token provided only if scope `offline_access` was granted. Allows you to retrieve fresh tokens using the `Fief.auth_refresh_token` method."""
 
 
-class FiefAccessTokenInfo(TypedDict):
+class FiefAccessTokenInfo(dict[str, Any]):
     """
-    Typed dictionary containing information about the access token.
+    Dictionary containing information about the access token.
+
+    Scopes and permissions are lists, like in the token.
+    To check them, prefer `has_scope` and `has_permission`,
+    which rely on sets built once per token instead of scanning the lists.
 
     **Example:**
 
@@ -84,18 +161,108 @@ class FiefAccessTokenInfo(TypedDict):
         "access_token": "ACCESS_TOKEN",
     }
     ```
+
+    **Keys:**
+
+    - `id` (`uuid.UUID`): ID of the user.
+    - `scope` (`list[str]`): List of granted scopes for this access token.
+    - `acr` (`FiefACR`): Level of Authentication Context class Reference.
+    - `permissions` (`list[str]`): List of [granted permissions](https://docs.fief.dev/getting-started/access-control/) for this user.
+    - `access_token` (`str`): Access token you can use to call the Fief API.
     """
 
-    id: uuid.UUID
-    """ID of the user."""
-    scope: list[str]
-    """List of granted scopes for this access token."""
-    acr: FiefACR
-    """Level of Authentication Context class Reference."""
-    permissions: list[str]
-    """List of [granted permissions](https://docs.fief.dev/getting-started/access-control/) for this user."""
-    access_token: str
-    """Access token you can use to call the Fief API."""
+    __slots__ = (
+        "_scope_set",
+        "_permission_index",
+        "_permission_catalog",
+        "_permission_mask",
+    )
+
+    _scope_set: frozenset[str]
+    _permission_index: PermissionIndex
+    _permission_catalog: PermissionCatalog
+    _permission_mask: Optional[int]
+
+    @property
+    def scope_set(self) -> frozenset[str]:
+        """Set of granted scopes for this access token."""
+        try:
+            return self._scope_set
+        except AttributeError:
+            self._scope_set = frozenset(self["scope"])
+            return self._scope_set
+
+    @property
+    def permission_set(self) -> frozenset[str]:
+        """Set of granted permissions for this user."""
+        return self.permission_index.permissions
+
+    @property
+    def permission_index(self) -> PermissionIndex:
+        """Index of granted permissions for this user, supporting wildcard patterns."""
+        try:
+            return self._permission_index
+        except AttributeError:
+            self._permission_index = PermissionIndex(self["permissions"])
+            return self._permission_index
+
+    def get_permission_mask(self, catalog: PermissionCatalog) -> Optional[int]:
+        """
+        Return the bitmask of the granted permissions in a catalog,
+        or `None` if some of them are not in the catalog.
+
+        It's computed once, and kept for the next calls with the same catalog.
+
+        :param catalog: The permission catalog.
+        """
+        try:
+            if self._permission_catalog is catalog:
+                return self._permission_mask
+        except AttributeError:
+            pass
+        self._permission_mask = catalog.encode(self["permissions"])
+        self._permission_catalog = catalog
+        return self._permission_mask
+
+    def has_scope(self, *scope: str) -> bool:
+        """
+        Check if all the given scopes were granted.
+
+        :param scope: Scopes to check for.
+
+        **Example:**
+
+        ```py
+        if access_token_info.has_scope("openid", "required_scope"):
+            ...
+        ```
+        """
+        return self.scope_set.issuperset(scope)
+
+    def has_permission(self, *permissions: str) -> bool:
+        """
+        Check if all the given permissions were granted.
+
+        :param permissions: Permissions to check for.
+        A permission ending with `*`, like `castles:*`,
+        matches any granted permission starting with the same prefix.
+
+        **Example:**
+
+        ```py
+        if access_token_info.has_permission("castles:read", "org/123/*"):
+            ...
+        ```
+        """
+        index = self.permission_index
+        return all(index.match(permission) for permission in permissions)
+
+    def copy(self) -> "FiefAccessTokenInfo":
+        info = FiefAccessTokenInfo(self)
+        for name in self.__slots__:
+            with contextlib.suppress(AttributeError):
+                setattr(info, name, getattr(self, name))
+        return info
 
 
 class FiefUserInfo(TypedDict):
@@ -149,6 +316,10 @@ class FiefRequestError(FiefError):
         super().__init__(self.message)
 
 
+JWKS_FETCH_ERRORS = (httpx.HTTPError, FiefRequestError, jwk.JWException, ValueError)
+"""Errors which may happen while refreshing the JWKS from the Fief server."""
+
+
 class FiefAccessTokenInvalid(FiefError):
     """The access token is invalid."""
 
@@ -173,6 +344,224 @@ class FiefIdTokenInvalid(FiefError):
     """The ID token is invalid."""
 
 
+class FiefAccessTokenPolicy(ABC):
+    """
+    Base class of the authorization policies an access token must satisfy.
+
+    Policies can be combined with `|` (any of) and `&` (all of)
+    into a single policy, checked against the token in one pass.
+
+    **Example:**
+
+    ```py
+    policy = FiefAccessTokenRequirements(scope=["castles"]) | FiefAccessTokenRequirements(
+        permissions=["castles:read"], acr=FiefACR.LEVEL_ONE
+    )
+    access_token_info = fief.validate_access_token("ACCESS_TOKEN", requirements=policy)
+    ```
+    """
+
+    __slots__ = ()
+
+    @abstractmethod
+    def check(self, info: FiefAccessTokenInfo) -> None:
+        """
+        Check if an access token satisfies the policy.
+
+        :param info: Information of the access token.
+
+        :raises: `FiefAccessTokenACRTooLow`, `FiefAccessTokenMissingScope`
+        or `FiefAccessTokenMissingPermission` if it doesn't.
+        """
+
+    def __or__(self, other: "FiefAccessTokenPolicy") -> "FiefAccessTokenAnyOf":
+        return FiefAccessTokenAnyOf(self, other)
+
+    def __and__(self, other: "FiefAccessTokenPolicy") -> "FiefAccessTokenAllOf":
+        return FiefAccessTokenAllOf(self, other)
+
+
+class FiefAccessTokenAnyOf(FiefAccessTokenPolicy):
+    """
+    Policy satisfied if at least one of its policies is satisfied.
+
+    Policies are checked in order, until one of them is satisfied.
+    If none is, the error of the first one is raised.
+
+    **Example:**
+
+    ```py
+    policy = FiefAccessTokenAnyOf(
+        FiefAccessTokenRequirements(scope=["castles"]),
+        FiefAccessTokenRequirements(permissions=["castles:read"]),
+    )
+    ```
+    """
+
+    __slots__ = ("policies",)
+
+    def __init__(self, *policies: FiefAccessTokenPolicy) -> None:
+        """
+        :param policies: The policies, at least one of them must be satisfied.
+
+        :raises: `ValueError` if there is no policy: no token could satisfy it.
+        """
+        if not policies:
+            raise ValueError("policies")
+        self.policies = _flatten_policies(FiefAccessTokenAnyOf, policies)
+
+    def check(self, info: FiefAccessTokenInfo) -> None:
+        error: Optional[FiefError] = None
+        for policy in self.policies:
+            try:
+                policy.check(info)
+            except (
+                FiefAccessTokenACRTooLow,
+                FiefAccessTokenMissingScope,
+                FiefAccessTokenMissingPermission,
+            ) as e:
+                if error is None:
+                    error = e
+            else:
+                return
+        if error is not None:
+            raise error
+
+
+class FiefAccessTokenAllOf(FiefAccessTokenPolicy):
+    """
+    Policy satisfied if all of its policies are satisfied.
+
+    Policies are checked in order, and the error of the first one not satisfied is raised.
+
+    **Example:**
+
+    ```py
+    policy = FiefAccessTokenAllOf(
+        FiefAccessTokenRequirements(acr=FiefACR.LEVEL_ONE),
+        FiefAccessTokenRequirements(scope=["castles"]) | FiefAccessTokenRequirements(permissions=["castles:read"]),
+    )
+    ```
+    """
+
+    __slots__ = ("policies",)
+
+    def __init__(self, *policies: FiefAccessTokenPolicy) -> None:
+        """
+        :param policies: The policies, all of them must be satisfied.
+        """
+        self.policies = _flatten_policies(FiefAccessTokenAllOf, policies)
+
+    def check(self, info: FiefAccessTokenInfo) -> None:
+        for policy in self.policies:
+            policy.check(info)
+
+
+def _flatten_policies(
+    cls: type[Union[FiefAccessTokenAnyOf, FiefAccessTokenAllOf]],
+    policies: Iterable[FiefAccessTokenPolicy],
+) -> tuple[FiefAccessTokenPolicy, ...]:
+    """Inline the nested policies of the same kind, to check them in a single loop."""
+    flattened: list[FiefAccessTokenPolicy] = []
+    for policy in policies:
+        if isinstance(policy, cls):
+            flattened.extend(policy.policies)
+        else:
+            flattened.append(policy)
+    return tuple(flattened)
+
+
+class FiefAccessTokenRequirements(FiefAccessTokenPolicy):
+    """
+    Scopes, ACR level and permissions an access token must have.
+
+    The requirements are compiled once into sets and an ACR ordinal,
+    so checking them on each token is cheap.
+    The cheapest check, the ACR level, is done first.
+
+    **Example:**
+
+    ```py
+    requirements = FiefAccessTokenRequirements(
+        scope=["openid"], permissions=["castles:read"]
+    )
+    access_token_info = fief.validate_access_token("ACCESS_TOKEN", requirements=requirements)
+    ```
+    """
+
+    __slots__ = (
+        "scope",
+        "acr",
+        "permissions",
+        "permission_catalog",
+        "_acr_ordinal",
+        "_permissions",
+        "_permissions_mask",
+    )
+
+    def __init__(
+        self,
+        *,
+        scope: Optional[Iterable[str]] = None,
+        acr: Optional[FiefACR] = None,
+        permissions: Optional[Iterable[str]] = None,
+        permission_catalog: Optional[PermissionCatalog] = None,
+    ) -> None:
+        """
+        :param scope: Optional list of scopes required.
+        :param acr: Optional minimum ACR level required.
+        :param permissions: Optional list of permissions required.
+        A permission ending with `*`, like `castles:*`,
+        matches any granted permission starting with the same prefix.
+        :param permission_catalog: Optional catalog of all the permissions.
+        If set, required permissions are compiled into bitmasks,
+        checked with a single AND against the bitmask of each token.
+        """
+        self.scope = frozenset(scope) if scope is not None else frozenset()
+        self.acr = acr
+        self.permissions = (
+            frozenset(permissions) if permissions is not None else frozenset()
+        )
+        self._acr_ordinal = _ACR_ORDINALS[acr] if acr is not None else None
+        self.permission_catalog = permission_catalog
+        self._permissions = PermissionRequirement(self.permissions)
+        self._permissions_mask = (
+            permission_catalog.compile(self.permissions)
+            if permission_catalog is not None
+            else None
+        )
+
+    def check(self, info: FiefAccessTokenInfo) -> None:
+        """
+        Check if an access token meets the requirements.
+
+        :param info: Information of the access token.
+
+        :raises: `FiefAccessTokenACRTooLow` if the ACR level is too low.
+        :raises: `FiefAccessTokenMissingScope` if a scope is missing.
+        :raises: `FiefAccessTokenMissingPermission` if a permission is missing.
+        """
+        if (
+            self._acr_ordinal is not None
+            and _ACR_ORDINALS[info["acr"]] < self._acr_ordinal
+        ):
+            raise FiefAccessTokenACRTooLow()
+
+        if self.scope and not self.scope <= info.scope_set:
+            raise FiefAccessTokenMissingScope()
+
+        if self._permissions and not self._check_permissions(info):
+            raise FiefAccessTokenMissingPermission()
+
+    def _check_permissions(self, info: FiefAccessTokenInfo) -> bool:
+        if self._permissions_mask is not None:
+            mask = info.get_permission_mask(self._permissions_mask.catalog)
+            # Tokens with permissions outside of the catalog are checked with sets
+            if mask is not None:
+                return self._permissions_mask.check(mask)
+        return self._permissions.check(info.permission_index)
+
+
 class BaseFief:
     """
     Base Fief authentication client.
@@ -195,10 +584,20 @@ class BaseFief:
 
     _openid_configuration: Optional[dict[str, Any]] = None
     _jwks: Optional[jwk.JWKSet] = None
+    _jwks_expires_at: float = 0.0
+    _jwks_fetched_at: Optional[float] = None
+    _jwks_static: bool = False
+    _file_cache: Optional[FileCache] = None
+    _access_token_cache: Optional[LRUCache[bytes, FiefAccessTokenInfo]] = None
+    _rejected_access_token_cache: Optional[LRUCache[bytes, bool]] = None
+    _refresher_running: bool = False
 
     _verify: VerifyTypes
     _cert: CertTypes
 
+    _httpx_client: Optional[HTTPXClient] = None
+    _owns_httpx_client: bool = True
+
     def __init__(
         self,
         base_url: str,
@@ -209,6 +608,20 @@ class BaseFief:
         host: Optional[str] = None,
         verify: VerifyTypes = True,
         cert: Optional[CertTypes] = None,
+        limits: Optional[httpx.Limits] = None,
+        transport: Optional[HTTPXTransport] = None,
+        httpx_client: Optional[HTTPXClient] = None,
+        jwks_cache_ttl: float = 3600.0,
+        jwks_refresh_interval: float = 60.0,
+        openid_configuration: Optional[OpenIDConfigurationSource] = None,
+        jwks: Optional[JWKSSource] = None,
+        cache_dir: Optional[JSONSource] = None,
+        access_token_cache_size: int = 0,
+        rejected_access_token_cache_size: int = 0,
+        rejected_access_token_cache_ttl: float = 60.0,
+        jose_backend: Optional[JOSEBackend] = None,
+        algorithms: Optional[Sequence[str]] = None,
+        permission_catalog: Optional[PermissionCatalog] = None,
     ) -> None:
         """
         Initialize the client.
@@ -225,6 +638,77 @@ class BaseFief:
         Useful to customize SSL connection handling.
         :param cert: Corresponds to the [cert parameter of HTTPX](https://www.python-httpx.org/advanced/#client-side-certificates).
         Useful to customize SSL connection handling.
+        :param limits: Corresponds to the [limits parameter of HTTPX](https://www.python-httpx.org/advanced/resource-limits/).
+        Useful to customize the size of the connection pool and the keep-alive duration.
+        If not provided, the HTTPX defaults are used.
+        :param transport: Optional [HTTPX transport](https://www.python-httpx.org/advanced/transports/)
+        to use for the underlying HTTP client.
+        Useful to share a connection pool, enable HTTP/2, connect through a Unix socket
+        or mock the Fief server with `httpx.MockTransport`.
+        HTTPX ignores the `verify`, `cert` and `limits` parameters in this case:
+        configure them on the transport instead.
+        :param httpx_client: Optional HTTPX client to use instead of the one created internally.
+        It can be shared with other services: requests are always made with absolute URLs built from `base_url`.
+        The `verify`, `cert`, `limits` and `transport` parameters are ignored in this case,
+        and the client is not closed by `close`/`aclose`: you're responsible for its lifecycle.
+        :param jwks_cache_ttl: Number of seconds the JWKS is kept in cache
+        if the server doesn't specify a `max-age` in the `Cache-Control` header.
+        :param jwks_refresh_interval: Minimum number of seconds between two JWKS refreshes.
+        It's the lower bound of the cache lifetime, even if the server sends `no-cache` or `max-age=0`,
+        and the delay before retrying if a refresh fails, in which case the previous JWKS is kept.
+        A token signed with an unknown key triggers a refresh at most once per interval:
+        it allows to pick up a rotated key without waiting for the cache to expire,
+        while preventing forged tokens from hammering the server.
+        :param openid_configuration: Optional OpenID configuration to use instead of fetching it from the server.
+        It can be a dictionary, a JSON string or the path to a JSON file.
+        :param jwks: Optional JWKS to use instead of fetching it from the server.
+        It can be a `jwcrypto.jwk.JWKSet`, a dictionary, a JSON string or the path to a JSON file.
+        This JWKS is never refreshed, even if a token is signed with an unknown key.
+        :param cache_dir: Optional path to a directory where the OpenID configuration and the JWKS
+        are cached on disk, so several processes on the same host share a single fetch.
+        It's useful for pre-fork servers like Gunicorn or Uvicorn running many workers.
+        Files are written atomically, and the network is used if they are missing or expired.
+        The directory must only be writable by the current user, like `~/.cache/fief`,
+        since anyone able to write in it could plant a JWKS and forge tokens:
+        it's created with the mode `0o700`, and ignored if it's shared with other users.
+        :param access_token_cache_size: Maximum number of validated access tokens kept in memory.
+        Validating one of them again skips the parsing and the signature verification.
+        Entries expire with their token and are cleared when the JWKS changes;
+        required scope, ACR and permissions are still checked on every call.
+        Tokens without `exp` claim are never cached. Disabled by default.
+        :param rejected_access_token_cache_size: Maximum number of invalid access tokens kept in memory.
+        Validating one of them again fails immediately, without parsing it or verifying its signature.
+        It helps to absorb bursts of requests retrying with a malformed or badly signed token.
+        Tokens which are not valid yet are not kept, since they may become valid.
+        The cache is cleared when the JWKS changes. Disabled by default.
+        :param rejected_access_token_cache_ttl: Number of seconds an invalid access token is kept in memory.
+        :param jose_backend: Optional backend to verify the signature of tokens.
+        It should follow the `fief_client.jose.JOSEBackend` protocol.
+        Defaults to `fief_client.jose.JWCryptoBackend`;
+        `fief_client.jose.CryptographyBackend` is a faster alternative.
+        :param algorithms: Signature algorithms accepted for access and ID tokens.
+        Tokens signed with another algorithm are rejected. Defaults to `["RS256"]`.
+        Set it to `["EdDSA"]` or `["ES256"]` if your Fief keys use those algorithms.
+        :param permission_catalog: Optional catalog of all the permissions of your tenant.
+        The permissions of each access token are encoded once into a bitmask,
+        so the requirements of `fief_client.FiefAccessTokenRequirements` compiled
+        with the same catalog are checked with a single AND.
+        It's useful when there are thousands of permissions.
+
+        With both `openid_configuration` and `jwks`, the client makes no network call
+        until you call a method which actually needs the Fief API, like `auth_callback` or `userinfo`.
+        It's useful to validate access tokens in air-gapped environments or to speed up cold starts.
+
+        **Example:**
+
+        ```py
+        fief = Fief(
+            "https://example.fief.dev",
+            "YOUR_CLIENT_ID",
+            openid_configuration="openid-configuration.json",
+            jwks="jwks.json",
+        )
+        ```
         """
         self.base_url = base_url
         self.client_id = client_id
@@ -234,6 +718,44 @@ class BaseFief:
         self.host = host
         self.verify = verify
         self.cert = cert
+        self.limits = limits
+        self.transport = transport
+        self.jwks_cache_ttl = jwks_cache_ttl
+        self.jwks_refresh_interval = jwks_refresh_interval
+        if httpx_client is not None:
+            self._httpx_client = httpx_client
+            self._owns_httpx_client = False
+        if openid_configuration is not None:
+            self._openid_configuration = (
+                dict(openid_configuration)
+                if isinstance(openid_configuration, Mapping)
+                else json.loads(_read_json_source(openid_configuration))
+            )
+        if jwks is not None:
+            if isinstance(jwks, jwk.JWKSet):
+                self._jwks = IndexedJWKSet.from_jwks(jwks)
+            elif isinstance(jwks, Mapping):
+                self._jwks = IndexedJWKSet.from_json(json.dumps(dict(jwks)))
+            else:
+                self._jwks = IndexedJWKSet.from_json(_read_json_source(jwks))
+            self._jwks_static = True
+            self._jwks_expires_at = math.inf
+        if cache_dir is not None:
+            self._file_cache = FileCache(cache_dir)
+        if access_token_cache_size > 0:
+            self._access_token_cache = LRUCache(access_token_cache_size)
+        self.rejected_access_token_cache_ttl = rejected_access_token_cache_ttl
+        self.jose_backend = (
+            jose_backend if jose_backend is not None else JWCryptoBackend()
+        )
+        self.algorithms: tuple[str, ...] = (
+            tuple(algorithms) if algorithms is not None else DEFAULT_ALGORITHMS
+        )
+        self.permission_catalog = permission_catalog
+        if rejected_access_token_cache_size > 0:
+            self._rejected_access_token_cache = LRUCache(
+                rejected_access_token_cache_size
+            )
 
     def _get_endpoint_url(
         self,
@@ -307,44 +829,150 @@ class BaseFief:
         required_scope: Optional[list[str]] = None,
         required_acr: Optional[FiefACR] = None,
         required_permissions: Optional[list[str]] = None,
+        requirements: Optional[FiefAccessTokenPolicy] = None,
     ) -> FiefAccessTokenInfo:
-        try:
-            decoded_token = jwt.JWT(jwt=access_token, algs=["RS256"], key=jwks)
-            claims = json.loads(decoded_token.claims)
-            access_token_scope = claims["scope"].split()
-            if required_scope is not None:
-                for scope in required_scope:
-                    if scope not in access_token_scope:
-                        raise FiefAccessTokenMissingScope()
+        info = self._decode_access_token(access_token, jwks)
+
+        if requirements is not None:
+            requirements.check(info)
+
+        if required_scope is not None:
+            if not info.has_scope(*required_scope):
+                raise FiefAccessTokenMissingScope()
 
+        if required_acr is not None:
+            if info["acr"] < required_acr:
+                raise FiefAccessTokenACRTooLow()
+
+        if required_permissions is not None:
+            self._compile_permissions(required_permissions).check(info)
+
+        return info
+
+    def _validate_access_tokens(
+        self,
+        access_tokens: Iterable[str],
+        jwks: jwk.JWKSet,
+        *,
+        required_scope: Optional[list[str]] = None,
+        required_acr: Optional[FiefACR] = None,
+        required_permissions: Optional[list[str]] = None,
+    ) -> dict[str, Union[FiefAccessTokenInfo, FiefError]]:
+        requirements = (
+            self._compile_permissions(required_permissions)
+            if required_permissions is not None
+            else None
+        )
+        results: dict[str, Union[FiefAccessTokenInfo, FiefError]] = {}
+        for access_token in access_tokens:
             try:
-                acr = FiefACR(claims["acr"])
-            except ValueError as e:
-                raise FiefAccessTokenInvalid() from e
-
-            if required_acr is not None:
-                if acr < required_acr:
-                    raise FiefAccessTokenACRTooLow()
-
-            permissions: list[str] = claims["permissions"]
-            if required_permissions is not None:
-                for required_permission in required_permissions:
-                    if required_permission not in permissions:
-                        raise FiefAccessTokenMissingPermission()
-
-            return {
-                "id": uuid.UUID(claims["sub"]),
-                "scope": access_token_scope,
-                "acr": acr,
-                "permissions": permissions,
-                "access_token": access_token,
-            }
+                results[access_token] = self._validate_access_token(
+                    access_token,
+                    jwks,
+                    required_scope=required_scope,
+                    required_acr=required_acr,
+                    requirements=requirements,
+                )
+            except FiefError as e:
+                results[access_token] = e
+        return results
+
+    def _compile_permissions(
+        self, required_permissions: list[str]
+    ) -> FiefAccessTokenRequirements:
+        """
+        Return the requirements checking a list of permissions,
+        against the permission mask of the tokens if a catalog is set.
+        """
+        return FiefAccessTokenRequirements(
+            permissions=required_permissions,
+            permission_catalog=self.permission_catalog,
+        )
+
+    def _get_access_tokens_to_retry(
+        self,
+        results: Mapping[str, Union[FiefAccessTokenInfo, FiefError]],
+        jwks: jwk.JWKSet,
+    ) -> list[str]:
+        """
+        Return the tokens signed with a key missing from the JWKS,
+        which should be validated again with a newer JWKS.
+        """
+        return [
+            access_token
+            for access_token, result in results.items()
+            if isinstance(result, FiefAccessTokenInvalid)
+            and self._should_refresh_jwks(result, jwks)
+        ]
+
+    def _decode_access_token(
+        self, access_token: str, jwks: jwk.JWKSet
+    ) -> FiefAccessTokenInfo:
+        cache_key: Optional[bytes] = None
+        if (
+            self._access_token_cache is not None
+            or self._rejected_access_token_cache is not None
+        ):
+            cache_key = hashlib.sha256(access_token.encode("utf-8")).digest()
+
+        if cache_key is not None and self._access_token_cache is not None:
+            cached_info = self._access_token_cache.get(cache_key)
+            if cached_info is not None:
+                return cached_info.copy()
+
+        if cache_key is not None and self._rejected_access_token_cache is not None:
+            missing_key = self._rejected_access_token_cache.get(cache_key)
+            if missing_key is not None:
+                # Keep the cause, so an unknown signing key can still trigger a JWKS refresh
+                raise FiefAccessTokenInvalid() from (
+                    jwt.JWTMissingKey() if missing_key else None
+                )
 
+        try:
+            claims = self.jose_backend.decode_jws(
+                access_token, jwks, algorithms=self.algorithms
+            )
+            info = FiefAccessTokenInfo(
+                id=uuid.UUID(claims["sub"]),
+                scope=claims["scope"].split(),
+                acr=FiefACR(claims["acr"]),
+                permissions=claims["permissions"],
+                access_token=access_token,
+            )
         except jwt.JWTExpired as e:
             raise FiefAccessTokenExpired() from e
         except (jwt.JWException, KeyError, ValueError) as e:
+            # A token not valid yet may become valid before the TTL: don't remember it
+            if (
+                cache_key is not None
+                and self._rejected_access_token_cache is not None
+                and not isinstance(e, jwt.JWTNotYetValid)
+            ):
+                self._rejected_access_token_cache.set(
+                    cache_key,
+                    isinstance(e, jwt.JWTMissingKey),
+                    time.time() + self.rejected_access_token_cache_ttl,
+                )
             raise FiefAccessTokenInvalid() from e
 
+        mask = None
+        if self.permission_catalog is not None:
+            mask = info.get_permission_mask(self.permission_catalog)
+
+        exp = claims.get("exp")
+        if (
+            cache_key is not None
+            and self._access_token_cache is not None
+            and isinstance(exp, (int, float))
+        ):
+            # Build the lookup sets now, so the copies served from the cache share them
+            info.scope_set  # noqa: B018
+            if mask is None:
+                info.permission_index  # noqa: B018
+            self._access_token_cache.set(cache_key, info.copy(), exp)
+
+        return info
+
     def _decode_id_token(
         self,
         id_token: str,
@@ -360,26 +988,180 @@ class BaseFief:
             else:
                 id_token_claims = id_token
 
-            signed_id_token = jwt.JWT(jwt=id_token_claims, algs=["RS256"], key=jwks)
-            claims = json.loads(signed_id_token.claims)
+            claims = self.jose_backend.decode_jws(
+                id_token_claims, jwks, algorithms=self.algorithms
+            )
+            algorithm = get_algorithm(id_token_claims)
 
             if "c_hash" in claims:
-                if code is None or not is_valid_hash(code, claims["c_hash"]):
+                if code is None or not is_valid_hash(code, claims["c_hash"], algorithm):
                     raise FiefIdTokenInvalid()
 
             if "at_hash" in claims:
                 if access_token is None or not is_valid_hash(
-                    access_token, claims["at_hash"]
+                    access_token, claims["at_hash"], algorithm
                 ):
                     raise FiefIdTokenInvalid()
 
-        except (jwt.JWException, TypeError) as e:
+        except (jwt.JWException, TypeError, ValueError) as e:
             raise FiefIdTokenInvalid() from e
         else:
             return claims
 
+    def _is_jwks_fresh(self) -> bool:
+        return self._jwks is not None and time.monotonic() < self._jwks_expires_at
+
+    def _can_serve_cached_jwks(self) -> bool:
+        """
+        Check if the cached JWKS can be used without refreshing it first.
+
+        While the background refresher is running, it's in charge of renewing the JWKS:
+        the current snapshot is served even if it's expired.
+        """
+        return self._is_jwks_fresh() or (
+            self._refresher_running and self._jwks is not None
+        )
+
+    def _get_refresher_delay(self, lead_time: float) -> float:
+        if self._jwks is None:
+            return 0.0
+        return max(
+            self._jwks_expires_at - lead_time - time.monotonic(), REFRESHER_MIN_DELAY
+        )
+
+    def _get_refresher_retry_delay(self) -> float:
+        return max(self.jwks_refresh_interval, REFRESHER_MIN_DELAY)
+
+    def _set_jwks(self, response: httpx.Response) -> jwk.JWKSet:
+        self._handle_request_error(response)
+        jwks = IndexedJWKSet.from_json(response.text)
+        cache_ttl = _get_cache_ttl(response)
+        ttl = max(
+            cache_ttl if cache_ttl is not None else self.jwks_cache_ttl,
+            self.jwks_refresh_interval,
+        )
+        self._store_jwks(jwks, ttl)
+        if self._file_cache is not None:
+            self._file_cache.set(self._get_file_cache_key("jwks"), response.json(), ttl)
+        return jwks
+
+    def _store_jwks(
+        self, jwks: jwk.JWKSet, ttl: float, *, fetched: bool = True
+    ) -> None:
+        now = time.monotonic()
+        self._jwks = jwks
+        # A JWKS read from the file cache may be old:
+        # it must not delay the refresh for a token signed with an unknown key
+        self._jwks_fetched_at = now if fetched else None
+        self._jwks_expires_at = now + ttl
+        # Tokens validated or rejected with the previous keys must be checked again
+        if self._access_token_cache is not None:
+            self._access_token_cache.clear()
+        if self._rejected_access_token_cache is not None:
+            self._rejected_access_token_cache.clear()
+
+    def _load_jwks_from_file_cache(self) -> Optional[jwk.JWKSet]:
+        if self._file_cache is None:
+            return None
+        entry = self._file_cache.get(self._get_file_cache_key("jwks"))
+        if entry is None:
+            return None
+        value, ttl = entry
+        try:
+            jwks = IndexedJWKSet.from_json(json.dumps(value))
+        except (jwk.JWException, ValueError):
+            return None
+        self._store_jwks(jwks, ttl, fetched=False)
+        return jwks
+
+    def _store_openid_configuration(self, openid_configuration: dict[str, Any]) -> None:
+        if self._file_cache is not None:
+            self._file_cache.set(
+                self._get_file_cache_key("openid_configuration"),
+                openid_configuration,
+                self.jwks_cache_ttl,
+            )
+
+    def _load_openid_configuration_from_file_cache(self) -> Optional[dict[str, Any]]:
+        if self._file_cache is None:
+            return None
+        entry = self._file_cache.get(self._get_file_cache_key("openid_configuration"))
+        if entry is None or not isinstance(entry[0], dict):
+            return None
+        self._openid_configuration = entry[0]
+        return entry[0]
+
+    def _get_file_cache_key(self, name: str) -> str:
+        return f"{self.base_url}|{self.host}|{name}"
+
+    def _defer_jwks_refresh(self) -> jwk.JWKSet:
+        """
+        Keep serving the current JWKS after a failed refresh,
+        and only try again after `jwks_refresh_interval`.
+        """
+        assert self._jwks is not None
+        now = time.monotonic()
+        self._jwks_fetched_at = now
+        self._jwks_expires_at = now + self.jwks_refresh_interval
+        return self._jwks
+
+    def _should_refresh_jwks(self, error: FiefError, jwks: jwk.JWKSet) -> bool:
+        """
+        Check if the error was caused by a token signed with a key missing from the JWKS,
+        and if we should try again with a newer JWKS to look for a rotated key.
+        """
+        if self._jwks_static or not isinstance(error.__cause__, jwt.JWTMissingKey):
+            return False
+        if jwks is not self._jwks:
+            return True
+        return (
+            self._jwks_fetched_at is None
+            or time.monotonic() - self._jwks_fetched_at >= self.jwks_refresh_interval
+        )
+
+    def _get_httpx_client_kwargs(self) -> dict[str, Any]:
+        headers = {}
+        if self.host is not None:
+            headers["Host"] = self.host
+
+        kwargs: dict[str, Any] = {
+            "base_url": self.base_url,
+            "headers": headers,
+            "verify": self.verify,
+            "cert": self.cert,
+            "transport": self.transport,
+        }
+        if self.limits is not None:
+            kwargs["limits"] = self.limits
+        return kwargs
+
+    def _build_request(
+        self,
+        client: HTTPXClient,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[dict[str, str]] = None,
+        **kwargs,
+    ) -> httpx.Request:
+        """
+        Build a request to the Fief server.
+
+        Relative URLs are resolved against `base_url` here instead of relying on
+        the `base_url` of the HTTPX client, so a client shared with other services
+        can be used.
+        """
+        if url.startswith("/"):
+            url = f"{self.base_url.rstrip('/')}{url}"
+        if self.host is not None:
+            headers = {"Host": self.host, **(headers or {})}
+        return client.build_request(method, url, headers=headers, **kwargs)
+
     def _get_openid_configuration_request(self, client: HTTPXClient) -> httpx.Request:
-        return client.build_request("GET", "/.well-known/openid-configuration")
+        return self._build_request(client, "GET", "/.well-known/openid-configuration")
+
+    def _get_jwks_request(self, client: HTTPXClient, *, endpoint: str) -> httpx.Request:
+        return self._build_request(client, "GET", endpoint)
 
     def _get_auth_exchange_token_request(
         self,
@@ -400,7 +1182,7 @@ class BaseFief:
             data["code_verifier"] = code_verifier
         if self.client_secret is not None:
             data["client_secret"] = self.client_secret
-        return client.build_request("POST", endpoint, data=data)
+        return self._build_request(client, "POST", endpoint, data=data)
 
     def _get_auth_refresh_token_request(
         self,
@@ -420,13 +1202,13 @@ class BaseFief:
         if scope is not None:
             data["scope"] = " ".join(scope)
 
-        return client.build_request("POST", endpoint, data=data)
+        return self._build_request(client, "POST", endpoint, data=data)
 
     def _get_userinfo_request(
         self, client: HTTPXClient, *, endpoint: str, access_token: str
     ) -> httpx.Request:
-        return client.build_request(
-            "GET", endpoint, headers={"Authorization": f"Bearer {access_token}"}
+        return self._build_request(
+            client, "GET", endpoint, headers={"Authorization": f"Bearer {access_token}"}
         )
 
     def _get_update_profile_request(
@@ -437,7 +1219,8 @@ class BaseFief:
         access_token: str,
         data: dict[str, Any],
     ) -> httpx.Request:
-        return client.build_request(
+        return self._build_request(
+            client,
             "PATCH",
             endpoint,
             headers={"Authorization": f"Bearer {access_token}"},
@@ -452,7 +1235,8 @@ class BaseFief:
         access_token: str,
         new_password: str,
     ) -> httpx.Request:
-        return client.build_request(
+        return self._build_request(
+            client,
             "PATCH",
             endpoint,
             headers={"Authorization": f"Bearer {access_token}"},
@@ -467,7 +1251,8 @@ class BaseFief:
         access_token: str,
         email: str,
     ) -> httpx.Request:
-        return client.build_request(
+        return self._build_request(
+            client,
             "PATCH",
             endpoint,
             headers={"Authorization": f"Bearer {access_token}"},
@@ -482,7 +1267,8 @@ class BaseFief:
         access_token: str,
         code: str,
     ) -> httpx.Request:
-        return client.build_request(
+        return self._build_request(
+            client,
             "POST",
             endpoint,
             headers={"Authorization": f"Bearer {access_token}"},
@@ -497,6 +1283,9 @@ class BaseFief:
 class Fief(BaseFief):
     """Sync Fief authentication client."""
 
+    transport: Optional[httpx.BaseTransport]
+    _httpx_client: Optional[httpx.Client] = None
+
     def __init__(
         self,
         base_url: str,
@@ -507,6 +1296,20 @@ class Fief(BaseFief):
         host: Optional[str] = None,
         verify: VerifyTypes = True,
         cert: Optional[CertTypes] = None,
+        limits: Optional[httpx.Limits] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+        httpx_client: Optional[httpx.Client] = None,
+        jwks_cache_ttl: float = 3600.0,
+        jwks_refresh_interval: float = 60.0,
+        openid_configuration: Optional[OpenIDConfigurationSource] = None,
+        jwks: Optional[JWKSSource] = None,
+        cache_dir: Optional[JSONSource] = None,
+        access_token_cache_size: int = 0,
+        rejected_access_token_cache_size: int = 0,
+        rejected_access_token_cache_ttl: float = 60.0,
+        jose_backend: Optional[JOSEBackend] = None,
+        algorithms: Optional[Sequence[str]] = None,
+        permission_catalog: Optional[PermissionCatalog] = None,
     ) -> None:
         super().__init__(
             base_url,
@@ -516,7 +1319,32 @@ class Fief(BaseFief):
             host=host,
             verify=verify,
             cert=cert,
+            limits=limits,
+            transport=transport,
+            httpx_client=httpx_client,
+            jwks_cache_ttl=jwks_cache_ttl,
+            jwks_refresh_interval=jwks_refresh_interval,
+            openid_configuration=openid_configuration,
+            jwks=jwks,
+            cache_dir=cache_dir,
+            access_token_cache_size=access_token_cache_size,
+            rejected_access_token_cache_size=rejected_access_token_cache_size,
+            rejected_access_token_cache_ttl=rejected_access_token_cache_ttl,
+            jose_backend=jose_backend,
+            algorithms=algorithms,
+            permission_catalog=permission_catalog,
         )
+        self._httpx_client_lock = threading.Lock()
+        self._openid_configuration_lock = threading.Lock()
+        self._jwks_lock = threading.Lock()
+        self._refresher_thread: Optional[threading.Thread] = None
+        self._refresher_stop = threading.Event()
+
+    def __enter__(self) -> "Fief":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
 
     def auth_url(
         self,
@@ -581,12 +1409,13 @@ class Fief(BaseFief):
         token_response = self._auth_exchange_token(
             code, redirect_uri, code_verifier=code_verifier
         )
-        jwks = self._get_jwks()
-        userinfo = self._decode_id_token(
-            token_response["id_token"],
-            jwks,
-            code=code,
-            access_token=token_response.get("access_token"),
+        userinfo = self._call_with_jwks(
+            functools.partial(
+                self._decode_id_token,
+                token_response["id_token"],
+                code=code,
+                access_token=token_response.get("access_token"),
+            )
         )
         return token_response, userinfo
 
@@ -622,11 +1451,12 @@ class Fief(BaseFief):
             self._handle_request_error(response)
 
             token_response = response.json()
-        jwks = self._get_jwks()
-        userinfo = self._decode_id_token(
-            token_response["id_token"],
-            jwks,
-            access_token=token_response.get("access_token"),
+        userinfo = self._call_with_jwks(
+            functools.partial(
+                self._decode_id_token,
+                token_response["id_token"],
+                access_token=token_response.get("access_token"),
+            )
         )
         return token_response, userinfo
 
@@ -637,6 +1467,7 @@ class Fief(BaseFief):
         required_scope: Optional[list[str]] = None,
         required_acr: Optional[FiefACR] = None,
         required_permissions: Optional[list[str]] = None,
+        requirements: Optional[FiefAccessTokenPolicy] = None,
     ) -> FiefAccessTokenInfo:
         """
         Check if an access token is valid and optionally that it has a required list of scopes,
@@ -648,6 +1479,11 @@ class Fief(BaseFief):
         :param required_acr: Optional minimum ACR level required.
         Read more: https://docs.fief.dev/going-further/acr/
         :param required_permissions: Optional list of permissions to check for.
+        A permission ending with `*`, like `castles:*`,
+        matches any granted permission starting with the same prefix.
+        :param requirements: Optional `FiefAccessTokenRequirements` to check for,
+        or any `FiefAccessTokenPolicy` combining several of them.
+        Prefer it to the other parameters to check the same requirements on many tokens.
 
         **Example: Validate access token with required scopes**
 
@@ -694,15 +1530,79 @@ class Fief(BaseFief):
         print(access_token_info)
         ```
         """
-        jwks = self._get_jwks()
-        return self._validate_access_token(
-            access_token,
-            jwks,
+        return self._call_with_jwks(
+            functools.partial(
+                self._validate_access_token,
+                access_token,
+                required_scope=required_scope,
+                required_acr=required_acr,
+                required_permissions=required_permissions,
+                requirements=requirements,
+            )
+        )
+
+    def validate_access_tokens(
+        self,
+        access_tokens: Iterable[str],
+        *,
+        required_scope: Optional[list[str]] = None,
+        required_acr: Optional[FiefACR] = None,
+        required_permissions: Optional[list[str]] = None,
+    ) -> list[Union[FiefAccessTokenInfo, FiefError]]:
+        """
+        Check if several access tokens are valid, and optionally that they have a required list of scopes,
+        or a required list of [permissions](https://docs.fief.dev/getting-started/access-control/).
+
+        It's faster than calling `validate_access_token` in a loop:
+        identical tokens are validated once, the JWKS is resolved once
+        and errors are returned instead of being raised.
+        If some tokens are signed with a key missing from the JWKS,
+        the JWKS is fetched again once for all of them.
+
+        Returns a list with, for each token in order, either a `FiefAccessTokenInfo`
+        or the `FiefError` that `validate_access_token` would have raised.
+        Identical tokens share the same result object.
+
+        :param access_tokens: The access tokens to validate.
+        :param required_scope: Optional list of scopes to check for.
+        :param required_acr: Optional minimum ACR level required.
+        Read more: https://docs.fief.dev/going-further/acr/
+        :param required_permissions: Optional list of permissions to check for.
+        A permission ending with `*`, like `castles:*`,
+        matches any granted permission starting with the same prefix.
+
+        **Example:**
+
+        ```py
+        results = fief.validate_access_tokens(["ACCESS_TOKEN_1", "ACCESS_TOKEN_2"])
+        for result in results:
+            if isinstance(result, FiefError):
+                print("Invalid access token", result)
+            else:
+                print(result)
+        ```
+        """
+        access_tokens = list(access_tokens)
+        validate = functools.partial(
+            self._validate_access_tokens,
             required_scope=required_scope,
             required_acr=required_acr,
             required_permissions=required_permissions,
         )
 
+        jwks = self._get_jwks()
+        results = validate(dict.fromkeys(access_tokens), jwks)
+        retry_access_tokens = self._get_access_tokens_to_retry(results, jwks)
+        if retry_access_tokens:
+            try:
+                jwks = self._get_jwks(refresh=jwks is self._jwks)
+            except JWKS_FETCH_ERRORS:
+                pass
+            else:
+                results.update(validate(retry_access_tokens, jwks))
+
+        return [results[access_token] for access_token in access_tokens]
+
     def userinfo(self, access_token: str) -> FiefUserInfo:
         """
         Return fresh `FiefUserInfo` from the Fief API using a valid access token.
@@ -868,37 +1768,203 @@ class Fief(BaseFief):
         params = {"redirect_uri": redirect_uri}
         return f"{self.base_url}/logout?{urlencode(params)}"
 
-    @contextlib.contextmanager
-    def _get_httpx_client(self):
-        headers = {}
-        if self.host is not None:
-            headers["Host"] = self.host
+    def close(self) -> None:
+        """
+        Close the underlying HTTP connection pool.
+
+        The client can still be used afterwards: a new pool will be opened on the next request.
+        You can also use the client as a context manager to close it automatically.
+
+        **Example:**
+
+        ```py
+        with Fief("https://example.fief.dev", "YOUR_CLIENT_ID") as fief:
+            userinfo = fief.userinfo("ACCESS_TOKEN")
+        ```
+        """
+        self.stop_refresher()
+        if not self._owns_httpx_client:
+            return
+        with self._httpx_client_lock:
+            client, self._httpx_client = self._httpx_client, None
+        if client is not None:
+            client.close()
+
+    def warmup(self) -> None:
+        """
+        Fetch the OpenID configuration and the JWKS, and open the HTTP connection pool.
+
+        Call it when your application starts,
+        so the first request doesn't have to wait for those round trips.
+
+        **Example:**
+
+        ```py
+        fief.warmup()
+        ```
+        """
+        self._get_openid_configuration()
+        self._get_jwks()
+
+    def start_refresher(self, *, lead_time: float = 30.0) -> None:
+        """
+        Start a background thread keeping the OpenID configuration and the JWKS up to date.
+
+        They are fetched right away, then renewed `lead_time` seconds before the JWKS cache expires.
+        While the refresher is running, requests always use the current JWKS, even if it's expired:
+        they never wait for the network to refresh it.
+        If a refresh fails, the current snapshot is kept and the refresher tries again after `jwks_refresh_interval`.
+        It does nothing if the client was given a static `jwks`.
+
+        The thread is stopped by `stop_refresher` or `close`.
+
+        :param lead_time: Number of seconds before the JWKS cache expiry to renew it.
+
+        **Example:**
+
+        ```py
+        fief.start_refresher()
+        ```
+        """
+        if self._jwks_static or (
+            self._refresher_thread is not None and self._refresher_thread.is_alive()
+        ):
+            return
+        self._refresher_stop = threading.Event()
+        self._refresher_thread = threading.Thread(
+            target=self._run_refresher,
+            args=(self._refresher_stop, lead_time),
+            name="fief-refresher",
+            daemon=True,
+        )
+        self._refresher_running = True
+        self._refresher_thread.start()
+
+    def stop_refresher(self) -> None:
+        """
+        Stop the background refresher started by `start_refresher`, if any.
+
+        **Example:**
+
+        ```py
+        fief.stop_refresher()
+        ```
+        """
+        thread, self._refresher_thread = self._refresher_thread, None
+        self._refresher_running = False
+        self._refresher_stop.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run_refresher(self, stop: threading.Event, lead_time: float) -> None:
+        try:
+            delay = self._get_refresher_delay(lead_time)
+            while not stop.wait(delay):
+                try:
+                    self._refresh()
+                except Exception:
+                    # Keep the refresher alive, whatever went wrong
+                    delay = self._get_refresher_retry_delay()
+                else:
+                    delay = self._get_refresher_delay(lead_time)
+        finally:
+            # Requests must not keep serving an expired JWKS if the refresher died
+            if self._refresher_thread is threading.current_thread():
+                self._refresher_running = False
+
+    def _refresh(self) -> None:
+        try:
+            openid_configuration = self._fetch_openid_configuration()
+        except JWKS_FETCH_ERRORS:
+            if self._openid_configuration is None:
+                raise
+        else:
+            self._openid_configuration = openid_configuration
+        self._get_jwks(refresh=True)
 
-        with httpx.Client(
-            base_url=self.base_url, headers=headers, verify=self.verify, cert=self.cert
-        ) as client:
-            yield client
+    @contextlib.contextmanager
+    def _get_httpx_client(self) -> Generator[httpx.Client, None, None]:
+        client = self._httpx_client
+        if client is None:
+            with self._httpx_client_lock:
+                client = self._httpx_client
+                if client is None:
+                    client = httpx.Client(**self._get_httpx_client_kwargs())
+                    self._httpx_client = client
+        yield client
 
     def _get_openid_configuration(self) -> dict[str, Any]:
         if self._openid_configuration is not None:
             return self._openid_configuration
 
+        # Only one thread fetches, the others wait for its result
+        with self._openid_configuration_lock:
+            if self._openid_configuration is None:
+                cached = self._load_openid_configuration_from_file_cache()
+                if cached is not None:
+                    return cached
+                self._openid_configuration = self._fetch_openid_configuration()
+            return self._openid_configuration
+
+    def _fetch_openid_configuration(self) -> dict[str, Any]:
         with self._get_httpx_client() as client:
             request = self._get_openid_configuration_request(client)
             response = client.send(request)
-            json = response.json()
-            self._openid_configuration = json
-            return json
+            self._handle_request_error(response)
+            openid_configuration = response.json()
+            self._store_openid_configuration(openid_configuration)
+            return openid_configuration
 
-    def _get_jwks(self) -> jwk.JWKSet:
-        if self._jwks is not None:
+    def _get_jwks(self, *, refresh: bool = False) -> jwk.JWKSet:
+        if not refresh and self._can_serve_cached_jwks():
+            assert self._jwks is not None
             return self._jwks
 
+        # Only one thread fetches, the others wait for its result
+        fetched_at = self._jwks_fetched_at
+        with self._jwks_lock:
+            if self._can_serve_cached_jwks() and (
+                not refresh or self._jwks_fetched_at != fetched_at
+            ):
+                assert self._jwks is not None
+                return self._jwks
+            if not refresh:
+                cached = self._load_jwks_from_file_cache()
+                if cached is not None:
+                    return cached
+            try:
+                return self._set_jwks(self._fetch_jwks())
+            except JWKS_FETCH_ERRORS:
+                if self._jwks is None:
+                    raise
+                return self._defer_jwks_refresh()
+
+    def _fetch_jwks(self) -> httpx.Response:
         jwks_uri = self._get_endpoint_url(self._get_openid_configuration(), "jwks_uri")
         with self._get_httpx_client() as client:
-            response = client.get(jwks_uri)
-            self._jwks = jwk.JWKSet.from_json(response.text)
-            return self._jwks
+            request = self._get_jwks_request(client, endpoint=jwks_uri)
+            return client.send(request)
+
+    def _call_with_jwks(self, func: Callable[[jwk.JWKSet], T]) -> T:
+        """
+        Call a token decoding function with the JWKS.
+
+        If the token was signed with a key we don't know, the JWKS is fetched again
+        and the function called a second time, in case the signing key was rotated.
+        If this refresh fails, the original error is raised.
+        """
+        jwks = self._get_jwks()
+        try:
+            return func(jwks)
+        except (FiefAccessTokenInvalid, FiefIdTokenInvalid) as e:
+            if not self._should_refresh_jwks(e, jwks):
+                raise
+            error = e
+        try:
+            jwks = self._get_jwks(refresh=jwks is self._jwks)
+        except JWKS_FETCH_ERRORS:
+            raise error from None
+        return func(jwks)
 
     def _auth_exchange_token(
         self, code: str, redirect_uri: str, *, code_verifier: Optional[str] = None
@@ -924,6 +1990,9 @@ class Fief(BaseFief):
 class FiefAsync(BaseFief):
     """Async Fief authentication client."""
 
+    transport: Optional[httpx.AsyncBaseTransport]
+    _httpx_client: Optional[httpx.AsyncClient] = None
+
     def __init__(
         self,
         base_url: str,
@@ -934,7 +2003,55 @@ class FiefAsync(BaseFief):
         host: Optional[str] = None,
         verify: VerifyTypes = True,
         cert: Optional[CertTypes] = None,
+        limits: Optional[httpx.Limits] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        httpx_client: Optional[httpx.AsyncClient] = None,
+        jwks_cache_ttl: float = 3600.0,
+        jwks_refresh_interval: float = 60.0,
+        openid_configuration: Optional[OpenIDConfigurationSource] = None,
+        jwks: Optional[JWKSSource] = None,
+        cache_dir: Optional[JSONSource] = None,
+        access_token_cache_size: int = 0,
+        rejected_access_token_cache_size: int = 0,
+        rejected_access_token_cache_ttl: float = 60.0,
+        jose_backend: Optional[JOSEBackend] = None,
+        algorithms: Optional[Sequence[str]] = None,
+        permission_catalog: Optional[PermissionCatalog] = None,
+        executor: Optional[concurrent.futures.Executor] = None,
+        executor_threshold: int = 0,
     ) -> None:
+        """
+        Initialize the client.
+
+        It accepts the same parameters as `Fief`, plus:
+
+        :param executor: Optional executor where tokens are decoded and verified,
+        instead of on the event loop. Signature verification, JSON decoding
+        and decryption of ID tokens are CPU-bound: under high concurrency,
+        running them on the event loop delays every other coroutine.
+        Use a `concurrent.futures.ThreadPoolExecutor`:
+        the work happens in the client, which can't be sent to another process.
+        `cryptography` releases the GIL while verifying signatures.
+        Disabled by default.
+        :param executor_threshold: Minimum length of a token, in characters,
+        to decode it in the executor. Shorter tokens, which are cheaper to verify,
+        are decoded on the event loop to save the scheduling overhead.
+        Defaults to 0: all tokens are decoded in the executor.
+        With a `fief_client.jose.ProcessPoolBackend`, tokens are always decoded in a thread,
+        the executor or the default executor of the event loop,
+        so the event loop doesn't wait for the worker processes.
+
+        **Example:**
+
+        ```py
+        fief = FiefAsync(
+            "https://example.fief.dev",
+            "YOUR_CLIENT_ID",
+            executor=ThreadPoolExecutor(max_workers=4),
+            executor_threshold=1024,
+        )
+        ```
+        """
         super().__init__(
             base_url,
             client_id,
@@ -943,7 +2060,31 @@ class FiefAsync(BaseFief):
             host=host,
             verify=verify,
             cert=cert,
+            limits=limits,
+            transport=transport,
+            httpx_client=httpx_client,
+            jwks_cache_ttl=jwks_cache_ttl,
+            jwks_refresh_interval=jwks_refresh_interval,
+            openid_configuration=openid_configuration,
+            jwks=jwks,
+            cache_dir=cache_dir,
+            access_token_cache_size=access_token_cache_size,
+            rejected_access_token_cache_size=rejected_access_token_cache_size,
+            rejected_access_token_cache_ttl=rejected_access_token_cache_ttl,
+            jose_backend=jose_backend,
+            algorithms=algorithms,
+            permission_catalog=permission_catalog,
         )
+        self.executor = executor
+        self.executor_threshold = executor_threshold
+        self._pending_fetches: dict[str, asyncio.Future[Any]] = {}
+        self._refresher_task: Optional[asyncio.Task[None]] = None
+
+    async def __aenter__(self) -> "FiefAsync":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
 
     async def auth_url(
         self,
@@ -1008,12 +2149,14 @@ class FiefAsync(BaseFief):
         token_response = await self._auth_exchange_token(
             code, redirect_uri, code_verifier=code_verifier
         )
-        jwks = await self._get_jwks()
-        userinfo = self._decode_id_token(
-            token_response["id_token"],
-            jwks,
-            code=code,
-            access_token=token_response.get("access_token"),
+        userinfo = await self._call_with_jwks(
+            functools.partial(
+                self._decode_id_token,
+                token_response["id_token"],
+                code=code,
+                access_token=token_response.get("access_token"),
+            ),
+            token=token_response["id_token"],
         )
         return token_response, userinfo
 
@@ -1050,11 +2193,13 @@ class FiefAsync(BaseFief):
 
             token_response = response.json()
 
-        jwks = await self._get_jwks()
-        userinfo = self._decode_id_token(
-            token_response["id_token"],
-            jwks,
-            access_token=token_response.get("access_token"),
+        userinfo = await self._call_with_jwks(
+            functools.partial(
+                self._decode_id_token,
+                token_response["id_token"],
+                access_token=token_response.get("access_token"),
+            ),
+            token=token_response["id_token"],
         )
         return token_response, userinfo
 
@@ -1065,6 +2210,7 @@ class FiefAsync(BaseFief):
         required_scope: Optional[list[str]] = None,
         required_acr: Optional[FiefACR] = None,
         required_permissions: Optional[list[str]] = None,
+        requirements: Optional[FiefAccessTokenPolicy] = None,
     ) -> FiefAccessTokenInfo:
         """
         Check if an access token is valid and optionally that it has a required list of scopes,
@@ -1076,6 +2222,11 @@ class FiefAsync(BaseFief):
         :param required_acr: Optional minimum ACR level required.
         Read more: https://docs.fief.dev/going-further/acr/
         :param required_permissions: Optional list of permissions to check for.
+        A permission ending with `*`, like `castles:*`,
+        matches any granted permission starting with the same prefix.
+        :param requirements: Optional `FiefAccessTokenRequirements` to check for,
+        or any `FiefAccessTokenPolicy` combining several of them.
+        Prefer it to the other parameters to check the same requirements on many tokens.
 
         **Example: Validate access token with required scopes**
 
@@ -1122,14 +2273,91 @@ class FiefAsync(BaseFief):
         print(access_token_info)
         ```
         """
-        jwks = await self._get_jwks()
-        return self._validate_access_token(
-            access_token,
-            jwks,
+        return await self._call_with_jwks(
+            functools.partial(
+                self._validate_access_token,
+                access_token,
+                required_scope=required_scope,
+                required_acr=required_acr,
+                required_permissions=required_permissions,
+                requirements=requirements,
+            ),
+            token=access_token,
+        )
+
+    async def validate_access_tokens(
+        self,
+        access_tokens: Iterable[str],
+        *,
+        required_scope: Optional[list[str]] = None,
+        required_acr: Optional[FiefACR] = None,
+        required_permissions: Optional[list[str]] = None,
+    ) -> list[Union[FiefAccessTokenInfo, FiefError]]:
+        """
+        Check if several access tokens are valid, and optionally that they have a required list of scopes,
+        or a required list of [permissions](https://docs.fief.dev/getting-started/access-control/).
+
+        It's faster than calling `validate_access_token` in a loop:
+        identical tokens are validated once, the JWKS is resolved once
+        and errors are returned instead of being raised.
+        If some tokens are signed with a key missing from the JWKS,
+        the JWKS is fetched again once for all of them.
+
+        Returns a list with, for each token in order, either a `FiefAccessTokenInfo`
+        or the `FiefError` that `validate_access_token` would have raised.
+        Identical tokens share the same result object.
+
+        :param access_tokens: The access tokens to validate.
+        :param required_scope: Optional list of scopes to check for.
+        :param required_acr: Optional minimum ACR level required.
+        Read more: https://docs.fief.dev/going-further/acr/
+        :param required_permissions: Optional list of permissions to check for.
+        A permission ending with `*`, like `castles:*`,
+        matches any granted permission starting with the same prefix.
+
+        **Example:**
+
+        ```py
+        results = await fief.validate_access_tokens(["ACCESS_TOKEN_1", "ACCESS_TOKEN_2"])
+        for result in results:
+            if isinstance(result, FiefError):
+                print("Invalid access token", result)
+            else:
+                print(result)
+        ```
+        """
+        access_tokens = list(access_tokens)
+        validate = functools.partial(
+            self._validate_access_tokens,
             required_scope=required_scope,
             required_acr=required_acr,
             required_permissions=required_permissions,
         )
+        # The whole batch is decoded in one executor call if one of the tokens is long enough
+        longest_access_token = max(access_tokens, key=len, default=None)
+
+        jwks = await self._get_jwks()
+        results = await self._run_decoding(
+            functools.partial(validate, dict.fromkeys(access_tokens)),
+            jwks,
+            longest_access_token,
+        )
+        retry_access_tokens = self._get_access_tokens_to_retry(results, jwks)
+        if retry_access_tokens:
+            try:
+                jwks = await self._get_jwks(refresh=jwks is self._jwks)
+            except JWKS_FETCH_ERRORS:
+                pass
+            else:
+                results.update(
+                    await self._run_decoding(
+                        functools.partial(validate, retry_access_tokens),
+                        jwks,
+                        longest_access_token,
+                    )
+                )
+
+        return [results[access_token] for access_token in access_tokens]
 
     async def userinfo(self, access_token: str) -> FiefUserInfo:
         """
@@ -1300,39 +2528,228 @@ class FiefAsync(BaseFief):
         params = {"redirect_uri": redirect_uri}
         return f"{self.base_url}/logout?{urlencode(params)}"
 
+    async def aclose(self) -> None:
+        """
+        Close the underlying HTTP connection pool.
+
+        The client can still be used afterwards: a new pool will be opened on the next request.
+        You can also use the client as an async context manager to close it automatically.
+
+        **Example:**
+
+        ```py
+        async with FiefAsync("https://example.fief.dev", "YOUR_CLIENT_ID") as fief:
+            userinfo = await fief.userinfo("ACCESS_TOKEN")
+        ```
+        """
+        await self.stop_refresher()
+        if not self._owns_httpx_client:
+            return
+        client, self._httpx_client = self._httpx_client, None
+        if client is not None:
+            await client.aclose()
+
+    async def warmup(self) -> None:
+        """
+        Fetch the OpenID configuration and the JWKS, and open the HTTP connection pool.
+
+        Call it when your application starts,
+        so the first request doesn't have to wait for those round trips.
+
+        **Example:**
+
+        ```py
+        await fief.warmup()
+        ```
+        """
+        await self._get_openid_configuration()
+        await self._get_jwks()
+
+    async def start_refresher(self, *, lead_time: float = 30.0) -> None:
+        """
+        Start a background task keeping the OpenID configuration and the JWKS up to date.
+
+        They are fetched right away, then renewed `lead_time` seconds before the JWKS cache expires.
+        While the refresher is running, requests always use the current JWKS, even if it's expired:
+        they never wait for the network to refresh it.
+        If a refresh fails, the current snapshot is kept and the refresher tries again after `jwks_refresh_interval`.
+        It does nothing if the client was given a static `jwks`.
+
+        The task runs on the current event loop and is stopped by `stop_refresher` or `aclose`.
+
+        :param lead_time: Number of seconds before the JWKS cache expiry to renew it.
+
+        **Example:**
+
+        ```py
+        await fief.start_refresher()
+        ```
+        """
+        if self._jwks_static or (
+            self._refresher_task is not None and not self._refresher_task.done()
+        ):
+            return
+        self._refresher_task = asyncio.get_running_loop().create_task(
+            self._run_refresher(lead_time)
+        )
+        self._refresher_running = True
+
+    async def stop_refresher(self) -> None:
+        """
+        Stop the background refresher started by `start_refresher`, if any.
+
+        **Example:**
+
+        ```py
+        await fief.stop_refresher()
+        ```
+        """
+        task, self._refresher_task = self._refresher_task, None
+        self._refresher_running = False
+        if task is None or task.done() or task is asyncio.current_task():
+            return
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    async def _run_refresher(self, lead_time: float) -> None:
+        try:
+            delay = self._get_refresher_delay(lead_time)
+            while True:
+                await asyncio.sleep(delay)
+                try:
+                    await self._refresh()
+                except Exception:
+                    # Keep the refresher alive, whatever went wrong
+                    delay = self._get_refresher_retry_delay()
+                else:
+                    delay = self._get_refresher_delay(lead_time)
+        finally:
+            # Requests must not keep serving an expired JWKS if the refresher died
+            if self._refresher_task is asyncio.current_task():
+                self._refresher_running = False
+
+    async def _refresh(self) -> None:
+        try:
+            await self._single_flight(
+                "openid_configuration", self._fetch_openid_configuration
+            )
+        except JWKS_FETCH_ERRORS:
+            if self._openid_configuration is None:
+                raise
+        await self._get_jwks(refresh=True)
+
     @contextlib.asynccontextmanager
-    async def _get_httpx_client(self):
-        headers = {}
-        if self.host is not None:
-            headers["Host"] = self.host
+    async def _get_httpx_client(self) -> AsyncGenerator[httpx.AsyncClient, None]:
+        client = self._httpx_client
+        if client is None:
+            client = httpx.AsyncClient(**self._get_httpx_client_kwargs())
+            self._httpx_client = client
+        yield client
+
+    async def _single_flight(self, key: str, fetch: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `fetch` only once for all the concurrent callers asking for the same `key`.
 
-        async with httpx.AsyncClient(
-            base_url=self.base_url, headers=headers, verify=self.verify, cert=self.cert
-        ) as client:
-            yield client
+        The first caller starts the fetch, the others await its result.
+        """
+        future = self._pending_fetches.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fetch())
+            self._pending_fetches[key] = future
+            future.add_done_callback(functools.partial(self._end_single_flight, key))
+        return await asyncio.shield(future)
+
+    def _end_single_flight(self, key: str, future: "asyncio.Future[Any]") -> None:
+        self._pending_fetches.pop(key, None)
+        # Mark the exception as retrieved, in case every caller was cancelled
+        if not future.cancelled():
+            future.exception()
 
     async def _get_openid_configuration(self) -> dict[str, Any]:
         if self._openid_configuration is not None:
             return self._openid_configuration
 
+        cached = self._load_openid_configuration_from_file_cache()
+        if cached is not None:
+            return cached
+
+        return await self._single_flight(
+            "openid_configuration", self._fetch_openid_configuration
+        )
+
+    async def _fetch_openid_configuration(self) -> dict[str, Any]:
         async with self._get_httpx_client() as client:
             request = self._get_openid_configuration_request(client)
             response = await client.send(request)
+            self._handle_request_error(response)
             json = response.json()
             self._openid_configuration = json
+            self._store_openid_configuration(json)
             return json
 
-    async def _get_jwks(self) -> jwk.JWKSet:
-        if self._jwks is not None:
+    async def _get_jwks(self, *, refresh: bool = False) -> jwk.JWKSet:
+        if not refresh and self._can_serve_cached_jwks():
+            assert self._jwks is not None
             return self._jwks
 
+        if not refresh:
+            cached = self._load_jwks_from_file_cache()
+            if cached is not None:
+                return cached
+
+        return await self._single_flight("jwks", self._fetch_jwks)
+
+    async def _fetch_jwks(self) -> jwk.JWKSet:
         jwks_uri = self._get_endpoint_url(
             await self._get_openid_configuration(), "jwks_uri"
         )
         async with self._get_httpx_client() as client:
-            response = await client.get(jwks_uri)
-            self._jwks = jwk.JWKSet.from_json(response.text)
-            return self._jwks
+            request = self._get_jwks_request(client, endpoint=jwks_uri)
+            try:
+                response = await client.send(request)
+                return self._set_jwks(response)
+            except JWKS_FETCH_ERRORS:
+                if self._jwks is None:
+                    raise
+                return self._defer_jwks_refresh()
+
+    async def _call_with_jwks(
+        self, func: Callable[[jwk.JWKSet], T], *, token: Optional[str] = None
+    ) -> T:
+        """
+        Call a token decoding function with the JWKS.
+
+        If the token was signed with a key we don't know, the JWKS is fetched again
+        and the function called a second time, in case the signing key was rotated.
+        If this refresh fails, the original error is raised.
+
+        If `token` is long enough, the function is called in the executor.
+        """
+        jwks = await self._get_jwks()
+        try:
+            return await self._run_decoding(func, jwks, token)
+        except (FiefAccessTokenInvalid, FiefIdTokenInvalid) as e:
+            if not self._should_refresh_jwks(e, jwks):
+                raise
+            error = e
+        try:
+            jwks = await self._get_jwks(refresh=jwks is self._jwks)
+        except JWKS_FETCH_ERRORS:
+            raise error from None
+        return await self._run_decoding(func, jwks, token)
+
+    async def _run_decoding(
+        self, func: Callable[[jwk.JWKSet], T], jwks: jwk.JWKSet, token: Optional[str]
+    ) -> T:
+        if not isinstance(self.jose_backend, ProcessPoolBackend) and (
+            self.executor is None
+            or token is None
+            or len(token) < self.executor_threshold
+        ):
+            return func(jwks)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, jwks)
 
     async def _auth_exchange_token(
         self, code: str, redirect_uri: str, *, code_verifier: Optional[str] = None
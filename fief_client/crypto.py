@@ -2,29 +2,59 @@ import base64
 import hashlib
 import secrets
 
-
-def get_validation_hash(value: str) -> str:
+HASH_ALGORITHMS: dict[str, str] = {
+    "RS256": "sha256",
+    "PS256": "sha256",
+    "ES256": "sha256",
+    "RS384": "sha384",
+    "PS384": "sha384",
+    "ES384": "sha384",
+    "RS512": "sha512",
+    "PS512": "sha512",
+    "ES512": "sha512",
+    "EdDSA": "sha512",
+}
+"""
+Hash function used for the validation hashes of each signature algorithm.
+
+EdDSA is assumed to be used with Ed25519, which relies on SHA-512.
+"""
+
+
+def get_validation_hash(value: str, algorithm: str = "RS256") -> str:
     """
     Return the validation hash of a value.
 
     Useful to check the validity `c_hash` and `at_hash` claims.
+
+    :param value: The value to hash.
+    :param algorithm: The signature algorithm of the ID token,
+    which determines the hash function.
     """
-    hasher = hashlib.sha256()
+    try:
+        hasher = hashlib.new(HASH_ALGORITHMS[algorithm])
+    except KeyError as e:
+        raise ValueError(algorithm) from e
     hasher.update(value.encode("utf-8"))
     hash = hasher.digest()
 
     half_hash = hash[0 : int(len(hash) / 2)]
-    # Remove the Base64 padding "==" at the end
-    base64_hash = base64.urlsafe_b64encode(half_hash)[:-2]
+    # Remove the Base64 padding at the end
+    base64_hash = base64.urlsafe_b64encode(half_hash).rstrip(b"=")
 
     return base64_hash.decode("utf-8")
 
 
-def is_valid_hash(value: str, hash: str) -> bool:
+def is_valid_hash(value: str, hash: str, algorithm: str = "RS256") -> bool:
     """
     Check if a hash corresponds to the provided value.
 
     Useful to check the validity `c_hash` and `at_hash` claims.
+
+    :param value: The hashed value.
+    :param hash: The hash to check.
+    :param algorithm: The signature algorithm of the ID token,
+    which determines the hash function.
     """
-    value_hash = get_validation_hash(value)
+    value_hash = get_validation_hash(value, algorithm)
     return secrets.compare_digest(value_hash, hash)
@@ -0,0 +1,311 @@
+"""ASGI integration."""
+
+import json
+from collections.abc import Awaitable, MutableMapping, Sequence
+from typing import Any, Callable, Optional, Union
+
+from fief_client import (
+    FiefAccessTokenACRTooLow,
+    FiefAccessTokenAllOf,
+    FiefAccessTokenExpired,
+    FiefAccessTokenInfo,
+    FiefAccessTokenInvalid,
+    FiefAccessTokenMissingPermission,
+    FiefAccessTokenMissingScope,
+    FiefAccessTokenPolicy,
+    FiefAccessTokenRequirements,
+    FiefACR,
+    FiefAsync,
+    FiefError,
+)
+from fief_client.permissions import PermissionCatalog
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+_STATE_KEY = "fief_access_token"
+"""
+Key of the request state holding the access token validated for this request,
+and the result of its validation.
+
+The FastAPI integration reads it, so its dependencies don't validate the token again.
+"""
+
+WEBSOCKET_POLICY_VIOLATION = 1008
+
+
+class FiefPathRule:
+    """
+    Authentication rule applied to the requests whose path starts with a prefix.
+
+    **Example:**
+
+    ```py
+    FiefPathRule("/admin", scope=["admin"])
+    ```
+    """
+
+    __slots__ = (
+        "prefix",
+        "optional",
+        "scope",
+        "acr",
+        "permissions",
+        "policy",
+        "requirements",
+    )
+
+    def __init__(
+        self,
+        prefix: str,
+        *,
+        optional: bool = False,
+        scope: Optional[list[str]] = None,
+        acr: Optional[FiefACR] = None,
+        permissions: Optional[list[str]] = None,
+        policy: Optional[FiefAccessTokenPolicy] = None,
+        permission_catalog: Optional[PermissionCatalog] = None,
+    ) -> None:
+        """
+        :param prefix: Path prefix of the requests the rule applies to, like `/admin`.
+        It matches `/admin` and `/admin/users`, but not `/administrator`.
+        :param optional: If `False` and the request is not authenticated,
+        an unauthorized response will be returned.
+        :param scope: Optional list of scopes required.
+        If the access token lacks one of the required scope, a forbidden response will be returned.
+        :param acr: Optional minimum ACR level required.
+        If the access token doesn't meet the minimum level, a forbidden response will be returned.
+        Read more: https://docs.fief.dev/going-further/acr/
+        :param permissions: Optional list of permissions required.
+        If the access token lacks one of the required permission, a forbidden response will be returned.
+        :param policy: Optional `fief_client.FiefAccessTokenPolicy` the access token must satisfy,
+        in addition to the other requirements.
+        :param permission_catalog: Optional `fief_client.permissions.PermissionCatalog`
+        to compile the required permissions with.
+        `FiefAuthMiddleware` compiles its rules with the one of its client.
+        """
+        self.prefix = prefix.rstrip("/")
+        self.optional = optional
+        self.scope = scope
+        self.acr = acr
+        self.permissions = permissions
+        self.policy = policy
+        self.requirements: FiefAccessTokenPolicy = FiefAccessTokenRequirements(
+            scope=scope,
+            acr=acr,
+            permissions=permissions,
+            permission_catalog=permission_catalog,
+        )
+        if policy is not None:
+            self.requirements = FiefAccessTokenAllOf(self.requirements, policy)
+
+    def match(self, path: str) -> bool:
+        """
+        Check if the rule applies to a path.
+
+        :param path: The path of the request.
+        """
+        prefix = self.prefix
+        return path.startswith(prefix) and (
+            len(path) == len(prefix) or path[len(prefix)] == "/"
+        )
+
+    def compile(
+        self, permission_catalog: Optional[PermissionCatalog]
+    ) -> "FiefPathRule":
+        """
+        Return a copy of the rule, with the required permissions compiled with a catalog.
+
+        :param permission_catalog: The permission catalog.
+        If `None`, the rule is returned as is.
+        """
+        if permission_catalog is None:
+            return self
+        return FiefPathRule(
+            self.prefix,
+            optional=self.optional,
+            scope=self.scope,
+            acr=self.acr,
+            permissions=self.permissions,
+            policy=self.policy,
+            permission_catalog=permission_catalog,
+        )
+
+
+class FiefAuthMiddleware:
+    """
+    Pure ASGI middleware authenticating requests with Fief.
+
+    The bearer token of the `Authorization` header is validated once per request,
+    against the rule with the longest matching path prefix.
+    The `fief_client.FiefAccessTokenInfo` is then stored in the request state,
+    under `access_token_info`, or `None` for an optional rule without valid token.
+    Requests matching no rule are passed through without authentication.
+
+    Responses follow the ones of the FastAPI integration:
+    a 401 if the request is not authenticated,
+    a 403 if the access token doesn't meet the requirements.
+    WebSocket handshakes are closed with the policy violation code instead.
+
+    The FastAPI `fief_client.integrations.fastapi.FiefAuth` dependencies
+    reuse the access token validated by the middleware.
+
+    **Example:**
+
+    ```py
+    from fastapi import FastAPI, Request
+    from fief_client import FiefAsync
+    from fief_client.integrations.asgi import FiefAuthMiddleware, FiefPathRule
+
+    fief = FiefAsync(
+        "https://example.fief.dev",
+        "YOUR_CLIENT_ID",
+        "YOUR_CLIENT_SECRET",
+    )
+
+    app = FastAPI()
+    app.add_middleware(
+        FiefAuthMiddleware,
+        client=fief,
+        rules=[
+            FiefPathRule("/api"),
+            FiefPathRule("/api/admin", scope=["admin"]),
+            FiefPathRule("/api/public", optional=True),
+        ],
+    )
+
+    @app.get("/api/me")
+    async def get_me(request: Request):
+        return request.state.access_token_info
+    ```
+    """
+
+    def __init__(
+        self, app: ASGIApp, client: FiefAsync, rules: Sequence[FiefPathRule]
+    ) -> None:
+        """
+        :param app: The ASGI application to wrap.
+        :param client: Instance of an async Fief client.
+        :param rules: The authentication rules.
+        When several of them match a path, the one with the longest prefix applies.
+        Their required permissions are compiled with the permission catalog of the client.
+        """
+        self.app = app
+        self.client = client
+        self.rules = tuple(
+            sorted(
+                (rule.compile(client.permission_catalog) for rule in rules),
+                key=lambda rule: len(rule.prefix),
+                reverse=True,
+            )
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        rule = self.get_rule(scope["path"])
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        token = _get_bearer_token(scope)
+        info: Optional[FiefAccessTokenInfo] = None
+        if token is not None:
+            result: Union[FiefAccessTokenInfo, FiefError]
+            try:
+                result = await self.client.validate_access_token(token)
+            except (FiefAccessTokenInvalid, FiefAccessTokenExpired) as e:
+                result = e
+            state = scope.setdefault("state", {})
+            state[_STATE_KEY] = (token, result)
+            if not isinstance(result, FiefError):
+                info = result
+
+        if info is None:
+            if not rule.optional:
+                response = await self.get_unauthorized_response(scope)
+                return await response(scope, receive, send)
+        else:
+            try:
+                rule.requirements.check(info)
+            except (
+                FiefAccessTokenMissingScope,
+                FiefAccessTokenACRTooLow,
+                FiefAccessTokenMissingPermission,
+            ):
+                response = await self.get_forbidden_response(scope)
+                return await response(scope, receive, send)
+
+        scope.setdefault("state", {})["access_token_info"] = info
+        await self.app(scope, receive, send)
+
+    def get_rule(self, path: str) -> Optional[FiefPathRule]:
+        """
+        Return the rule applying to a path, if any.
+
+        :param path: The path of the request.
+        """
+        for rule in self.rules:
+            if rule.match(path):
+                return rule
+        return None
+
+    async def get_unauthorized_response(self, scope: Scope) -> ASGIApp:
+        """
+        Return an ASGI application sending a response with the status code 401.
+
+        This method is called when a rule applies to the request
+        but the request is not authenticated.
+
+        You can override this method to customize the behavior in this case.
+        """
+        return _error_response(401, "Unauthorized")
+
+    async def get_forbidden_response(self, scope: Scope) -> ASGIApp:
+        """
+        Return an ASGI application sending a response with the status code 403.
+
+        This method is called when a rule applies to the request
+        but the access token doesn't match the list of scopes or permissions.
+
+        You can override this method to customize the behavior in this case.
+        """
+        return _error_response(403, "Forbidden")
+
+
+def _get_bearer_token(scope: Scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return token
+            return None
+    return None
+
+
+def _error_response(status_code: int, detail: str) -> ASGIApp:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+
+    async def _response(scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": WEBSOCKET_POLICY_VIOLATION})
+            return
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    return _response
+
+
+__all__ = ["FiefAuthMiddleware", "FiefPathRule"]
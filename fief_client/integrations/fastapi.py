@@ -1,10 +1,14 @@
 """FastAPI integration."""
 
+import asyncio
+import contextlib
+import time
 import uuid
 from collections.abc import AsyncGenerator, Coroutine, Generator
 from inspect import Parameter, Signature, isawaitable
 from typing import (
     Callable,
+    NoReturn,
     Optional,
     Protocol,
     TypeVar,
@@ -12,23 +16,40 @@ from typing import (
     cast,
 )
 
-from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi import (
+    Depends,
+    FastAPI,
+    HTTPException,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketException,
+    status,
+)
+from fastapi.requests import HTTPConnection
 from fastapi.security.base import SecurityBase
 from fastapi.security.http import HTTPAuthorizationCredentials
+from fastapi.websockets import WebSocketState
 from makefun import with_signature
 
 from fief_client import (
     Fief,
     FiefAccessTokenACRTooLow,
+    FiefAccessTokenAllOf,
     FiefAccessTokenExpired,
     FiefAccessTokenInfo,
     FiefAccessTokenInvalid,
     FiefAccessTokenMissingPermission,
     FiefAccessTokenMissingScope,
+    FiefAccessTokenPolicy,
+    FiefAccessTokenRequirements,
     FiefACR,
     FiefAsync,
+    FiefError,
     FiefUserInfo,
 )
+from fief_client.integrations.asgi import _STATE_KEY, _get_bearer_token
+from fief_client.jose import get_unverified_claims
 
 FiefClientClass = Union[Fief, FiefAsync]
 
@@ -47,6 +68,10 @@ DependencyCallable = Callable[
 ]
 
 
+def _freeze(values: Optional[list[str]]) -> Optional[tuple[str, ...]]:
+    return tuple(values) if values is not None else None
+
+
 class UserInfoCacheProtocol(Protocol):
     """
     Protocol that should follow a class to implement a cache mechanism for user information.
@@ -119,6 +144,47 @@ class FiefAuth:
         self.client = client
         self.scheme = scheme
         self.get_userinfo_cache = get_userinfo_cache
+        self._is_async = isinstance(client, FiefAsync)
+        self._authenticated_signature = self._get_authenticated_call_signature(scheme)
+        self._dependencies: dict[tuple, Callable] = {}
+        self._websocket_expiration_tasks: set[asyncio.Task] = set()
+
+    async def warmup(self) -> None:
+        """
+        Fetch the OpenID configuration and the JWKS, and open the HTTP connection pool.
+
+        Call it when your application starts,
+        so the first authenticated request doesn't have to wait for those round trips.
+        If you don't have a lifespan handler of your own, use `lifespan` instead.
+
+        **Example**
+
+        ```py
+        @contextlib.asynccontextmanager
+        async def lifespan(app: FastAPI):
+            await auth.warmup()
+            yield
+
+        app = FastAPI(lifespan=lifespan)
+        ```
+        """
+        result = self.client.warmup()
+        if isawaitable(result):
+            await result
+
+    @contextlib.asynccontextmanager
+    async def lifespan(self, app: FastAPI) -> AsyncGenerator[None, None]:
+        """
+        FastAPI lifespan handler calling `warmup` when the application starts.
+
+        **Example**
+
+        ```py
+        app = FastAPI(lifespan=auth.lifespan)
+        ```
+        """
+        await self.warmup()
+        yield
 
     def authenticated(
         self,
@@ -126,12 +192,16 @@ class FiefAuth:
         scope: Optional[list[str]] = None,
         acr: Optional[FiefACR] = None,
         permissions: Optional[list[str]] = None,
+        policy: Optional[FiefAccessTokenPolicy] = None,
     ):
         """
         Return a FastAPI dependency to check if a request is authenticated.
 
         If the request is authenticated, the dependency will return a `fief_client.FiefAccessTokenInfo`.
 
+        Dependencies are cached by their arguments:
+        calling it twice with the same arguments returns the same dependency.
+
         :param optional: If `False` and the request is not authenticated,
         an unauthorized response will be raised.
         :param scope: Optional list of scopes required.
@@ -141,6 +211,12 @@ class FiefAuth:
         Read more: https://docs.fief.dev/going-further/acr/
         :param permissions: Optional list of permissions required.
         If the access token lacks one of the required permission, a forbidden response will be raised.
+        A permission ending with `*`, like `castles:*`,
+        matches any granted permission starting with the same prefix.
+        :param policy: Optional `fief_client.FiefAccessTokenPolicy` the access token must satisfy,
+        in addition to the other requirements.
+        It allows to express alternatives, like `FiefAccessTokenRequirements(scope=["castles"]) | FiefAccessTokenRequirements(permissions=["castles:read"])`.
+        If the access token doesn't satisfy it, a forbidden response will be raised.
 
         **Example**
 
@@ -152,9 +228,32 @@ class FiefAuth:
             return access_token_info
         ```
         """
-        signature = self._get_authenticated_call_signature(self.scheme)
+        key = (
+            "authenticated",
+            optional,
+            _freeze(scope),
+            acr,
+            _freeze(permissions),
+            policy,
+        )
+        dependency = self._dependencies.get(key)
+        if dependency is None:
+            dependency = self._dependencies[key] = self._make_authenticated(
+                optional, scope, acr, permissions, policy
+            )
+        return dependency
 
-        @with_signature(signature)
+    def _make_authenticated(
+        self,
+        optional: bool,
+        scope: Optional[list[str]],
+        acr: Optional[FiefACR],
+        permissions: Optional[list[str]],
+        policy: Optional[FiefAccessTokenPolicy],
+    ) -> Callable:
+        requirements = self._get_requirements(scope, acr, permissions, policy)
+
+        @with_signature(self._authenticated_signature)
         async def _authenticated(
             request: Request, response: Response, token: Optional[TokenType]
         ) -> Optional[FiefAccessTokenInfo]:
@@ -167,16 +266,8 @@ class FiefAuth:
                 token = token.credentials
 
             try:
-                result = self.client.validate_access_token(
-                    token,
-                    required_scope=scope,
-                    required_acr=acr,
-                    required_permissions=permissions,
-                )
-                if isawaitable(result):
-                    info = await result
-                else:
-                    info = result
+                info = await self._validate_access_token(request, token)
+                requirements.check(info)
             except (FiefAccessTokenInvalid, FiefAccessTokenExpired):
                 if optional:
                     return None
@@ -199,12 +290,16 @@ class FiefAuth:
         acr: Optional[FiefACR] = None,
         permissions: Optional[list[str]] = None,
         refresh: bool = False,
+        policy: Optional[FiefAccessTokenPolicy] = None,
     ):
         """
         Return a FastAPI dependency to check if a user is authenticated.
 
         If the request is authenticated, the dependency will return a `fief_client.FiefUserInfo`.
 
+        Dependencies are cached by their arguments:
+        calling it twice with the same arguments returns the same dependency.
+
         If provided, the cache mechanism will be used to retrieve this information without calling the Fief API.
 
         :param optional: If `False` and the request is not authenticated,
@@ -216,6 +311,12 @@ class FiefAuth:
         Read more: https://docs.fief.dev/going-further/acr/
         :param permissions: Optional list of permissions required.
         If the access token lacks one of the required permission, a forbidden response will be raised.
+        A permission ending with `*`, like `castles:*`,
+        matches any granted permission starting with the same prefix.
+        :param policy: Optional `fief_client.FiefAccessTokenPolicy` the access token must satisfy,
+        in addition to the other requirements.
+        It allows to express alternatives, like `FiefAccessTokenRequirements(scope=["castles"]) | FiefAccessTokenRequirements(permissions=["castles:read"])`.
+        If the access token doesn't satisfy it, a forbidden response will be raised.
         :param refresh: If `True`, the user information will be refreshed from the Fief API.
         Otherwise, the cache will be used.
 
@@ -229,8 +330,33 @@ class FiefAuth:
             return {"email": user["email"]}
         ```
         """
+        key = (
+            "current_user",
+            optional,
+            _freeze(scope),
+            acr,
+            _freeze(permissions),
+            refresh,
+            policy,
+        )
+        dependency = self._dependencies.get(key)
+        if dependency is None:
+            dependency = self._dependencies[key] = self._make_current_user(
+                optional, scope, acr, permissions, refresh, policy
+            )
+        return dependency
+
+    def _make_current_user(
+        self,
+        optional: bool,
+        scope: Optional[list[str]],
+        acr: Optional[FiefACR],
+        permissions: Optional[list[str]],
+        refresh: bool,
+        policy: Optional[FiefAccessTokenPolicy],
+    ) -> Callable:
         signature = self._get_current_user_call_signature(
-            self.authenticated(optional, scope, acr, permissions)
+            self.authenticated(optional, scope, acr, permissions, policy)
         )
 
         @with_signature(signature)
@@ -250,11 +376,14 @@ class FiefAuth:
                 userinfo = await userinfo_cache.get(access_token_info["id"])
 
             if userinfo is None or refresh:
-                result = self.client.userinfo(access_token_info["access_token"])
-                if isawaitable(result):
-                    userinfo = cast(FiefUserInfo, await result)
+                if self._is_async:
+                    userinfo = await cast(FiefAsync, self.client).userinfo(
+                        access_token_info["access_token"]
+                    )
                 else:
-                    userinfo = cast(FiefUserInfo, result)
+                    userinfo = cast(Fief, self.client).userinfo(
+                        access_token_info["access_token"]
+                    )
 
                 if userinfo_cache is not None:
                     await userinfo_cache.set(access_token_info["id"], userinfo)
@@ -263,6 +392,172 @@ class FiefAuth:
 
         return _current_user
 
+    def websocket_authenticated(
+        self,
+        scope: Optional[list[str]] = None,
+        acr: Optional[FiefACR] = None,
+        permissions: Optional[list[str]] = None,
+        policy: Optional[FiefAccessTokenPolicy] = None,
+        query_param: Optional[str] = None,
+    ):
+        """
+        Return a FastAPI dependency to check if a WebSocket connection is authenticated.
+
+        The access token is validated once, during the handshake,
+        and the dependency returns a `fief_client.FiefAccessTokenInfo`.
+        A single timer is then scheduled at the expiration of the access token,
+        calling `on_websocket_expired`, which closes the connection by default.
+        The timer is cancelled when the endpoint returns.
+
+        :param scope: Optional list of scopes required.
+        If the access token lacks one of the required scope, the connection will be rejected.
+        :param acr: Optional minimum ACR level required.
+        If the access token doesn't meet the minimum level, the connection will be rejected.
+        Read more: https://docs.fief.dev/going-further/acr/
+        :param permissions: Optional list of permissions required.
+        If the access token lacks one of the required permission, the connection will be rejected.
+        :param policy: Optional `fief_client.FiefAccessTokenPolicy` the access token must satisfy,
+        in addition to the other requirements.
+        :param query_param: Optional name of a query parameter to read the access token from,
+        when there is no `Authorization` header.
+        Browsers can't set headers on WebSocket connections,
+        but beware that URLs are often logged.
+
+        **Example**
+
+        ```py
+        @app.websocket("/ws")
+        async def websocket_endpoint(
+            websocket: WebSocket,
+            access_token_info: FiefAccessTokenInfo = Depends(
+                auth.websocket_authenticated(query_param="access_token")
+            ),
+        ):
+            await websocket.accept()
+            async for message in websocket.iter_text():
+                await websocket.send_text(message)
+        ```
+        """
+        key = (
+            "websocket_authenticated",
+            _freeze(scope),
+            acr,
+            _freeze(permissions),
+            policy,
+            query_param,
+        )
+        dependency = self._dependencies.get(key)
+        if dependency is None:
+            dependency = self._dependencies[key] = self._make_websocket_authenticated(
+                scope, acr, permissions, policy, query_param
+            )
+        return dependency
+
+    def _make_websocket_authenticated(
+        self,
+        scope: Optional[list[str]],
+        acr: Optional[FiefACR],
+        permissions: Optional[list[str]],
+        policy: Optional[FiefAccessTokenPolicy],
+        query_param: Optional[str],
+    ) -> Callable:
+        requirements = self._get_requirements(scope, acr, permissions, policy)
+
+        async def _websocket_authenticated(
+            websocket: WebSocket,
+        ) -> AsyncGenerator[FiefAccessTokenInfo, None]:
+            token = _get_bearer_token(websocket.scope)
+            if token is None and query_param is not None:
+                token = websocket.query_params.get(query_param) or None
+            if token is None:
+                await self.get_websocket_unauthorized_response(websocket)
+
+            try:
+                info = await self._validate_access_token(websocket, token)
+                requirements.check(info)
+            except (FiefAccessTokenInvalid, FiefAccessTokenExpired):
+                await self.get_websocket_unauthorized_response(websocket)
+            except (
+                FiefAccessTokenMissingScope,
+                FiefAccessTokenACRTooLow,
+                FiefAccessTokenMissingPermission,
+            ):
+                await self.get_websocket_forbidden_response(websocket)
+
+            timer = self._schedule_websocket_expiration(websocket, token)
+            try:
+                yield info
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+        return _websocket_authenticated
+
+    def _schedule_websocket_expiration(
+        self, websocket: WebSocket, token: str
+    ) -> Optional[asyncio.TimerHandle]:
+        exp = get_unverified_claims(token).get("exp")
+        if not isinstance(exp, (int, float)):
+            return None
+        return asyncio.get_running_loop().call_later(
+            max(exp - time.time(), 0.0), self._expire_websocket, websocket
+        )
+
+    def _expire_websocket(self, websocket: WebSocket) -> None:
+        task = asyncio.ensure_future(self.on_websocket_expired(websocket))
+        # Keep a reference to the task, so it's not garbage collected while running
+        self._websocket_expiration_tasks.add(task)
+        task.add_done_callback(self._websocket_expiration_tasks.discard)
+
+    def _get_requirements(
+        self,
+        scope: Optional[list[str]],
+        acr: Optional[FiefACR],
+        permissions: Optional[list[str]],
+        policy: Optional[FiefAccessTokenPolicy],
+    ) -> FiefAccessTokenPolicy:
+        requirements: FiefAccessTokenPolicy = FiefAccessTokenRequirements(
+            scope=scope,
+            acr=acr,
+            permissions=permissions,
+            permission_catalog=self.client.permission_catalog,
+        )
+        if policy is not None:
+            requirements = FiefAccessTokenAllOf(requirements, policy)
+        return requirements
+
+    async def _validate_access_token(
+        self, request: HTTPConnection, token: str
+    ) -> FiefAccessTokenInfo:
+        """
+        Validate an access token once per request.
+
+        The result is stored in the request state, so the other `authenticated`
+        and `current_user` dependencies of the same request only check their requirements.
+        """
+        state = request.state
+        memo: Optional[tuple[str, Union[FiefAccessTokenInfo, FiefError]]] = getattr(
+            state, _STATE_KEY, None
+        )
+        if memo is None or memo[0] != token:
+            result: Union[FiefAccessTokenInfo, FiefError]
+            try:
+                if self._is_async:
+                    result = await cast(FiefAsync, self.client).validate_access_token(
+                        token
+                    )
+                else:
+                    result = cast(Fief, self.client).validate_access_token(token)
+            except (FiefAccessTokenInvalid, FiefAccessTokenExpired) as e:
+                result = e
+            memo = (token, result)
+            setattr(state, _STATE_KEY, memo)
+
+        result = memo[1]
+        if isinstance(result, FiefError):
+            raise result
+        return result
+
     async def get_unauthorized_response(self, request: Request, response: Response):
         """
         Raise an `fastapi.HTTPException` with the status code 401.
@@ -285,6 +580,52 @@ class FiefAuth:
         """
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
 
+    async def get_websocket_unauthorized_response(
+        self, websocket: WebSocket
+    ) -> NoReturn:
+        """
+        Raise an `fastapi.WebSocketException` with the code 1008, rejecting the connection.
+
+        This method is called when using the `websocket_authenticated` dependency
+        but the connection is not authenticated.
+
+        You can override this method to customize the behavior in this case.
+        """
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION, reason="Unauthorized"
+        )
+
+    async def get_websocket_forbidden_response(self, websocket: WebSocket) -> NoReturn:
+        """
+        Raise an `fastapi.WebSocketException` with the code 1008, rejecting the connection.
+
+        This method is called when using the `websocket_authenticated` dependency
+        but the access token doesn't match the list of scopes or permissions.
+
+        You can override this method to customize the behavior in this case.
+        """
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION, reason="Forbidden"
+        )
+
+    async def on_websocket_expired(self, websocket: WebSocket) -> None:
+        """
+        Close a WebSocket connection with the code 1008.
+
+        This method is called when the access token of a connection
+        authenticated with the `websocket_authenticated` dependency expires.
+
+        You can override this method to customize the behavior in this case,
+        like sending a message asking the client for a new access token.
+        """
+        if (
+            websocket.application_state != WebSocketState.DISCONNECTED
+            and websocket.client_state != WebSocketState.DISCONNECTED
+        ):
+            await websocket.close(
+                code=status.WS_1008_POLICY_VIOLATION, reason="Access token expired"
+            )
+
     def _get_authenticated_call_signature(self, scheme: SecurityBase) -> Signature:
         """
         Generate a dynamic signature for the authenticated dependency.
@@ -4,15 +4,18 @@ import uuid
 from functools import wraps
 from typing import Callable, Optional
 
-from flask import g, request
+from flask import Flask, g, request
 
 from fief_client import (
     Fief,
     FiefAccessTokenACRTooLow,
+    FiefAccessTokenAllOf,
     FiefAccessTokenExpired,
     FiefAccessTokenInfo,
     FiefAccessTokenInvalid,
     FiefAccessTokenMissingScope,
+    FiefAccessTokenPolicy,
+    FiefAccessTokenRequirements,
     FiefACR,
     FiefUserInfo,
 )
@@ -164,6 +167,35 @@ class FiefAuth:
         self.get_userinfo_cache = get_userinfo_cache
         self.set_userinfo_cache = set_userinfo_cache
 
+    def init_app(self, app: Flask) -> None:
+        """
+        Register the extension on a Flask application and call `warmup`.
+
+        Call it while setting up your application,
+        so the first authenticated request doesn't have to wait for the Fief round trips.
+
+        **Example**
+
+        ```py
+        app = Flask(__name__)
+        auth.init_app(app)
+        ```
+        """
+        app.extensions["fief"] = self
+        self.warmup()
+
+    def warmup(self) -> None:
+        """
+        Fetch the OpenID configuration and the JWKS, and open the HTTP connection pool.
+
+        **Example**
+
+        ```py
+        auth.warmup()
+        ```
+        """
+        self.client.warmup()
+
     def authenticated(
         self,
         *,
@@ -171,6 +203,7 @@ class FiefAuth:
         scope: Optional[list[str]] = None,
         acr: Optional[FiefACR] = None,
         permissions: Optional[list[str]] = None,
+        policy: Optional[FiefAccessTokenPolicy] = None,
     ):
         """
         Decorator to check if a request is authenticated.
@@ -187,6 +220,12 @@ class FiefAuth:
         Read more: https://docs.fief.dev/going-further/acr/
         :param permissions: Optional list of permissions required.
         If the access token lacks one of the required permission, a `FiefAuthForbidden` error will be raised.
+        A permission ending with `*`, like `castles:*`,
+        matches any granted permission starting with the same prefix.
+        :param policy: Optional `fief_client.FiefAccessTokenPolicy` the access token must satisfy,
+        in addition to the other requirements.
+        It allows to express alternatives, like `FiefAccessTokenRequirements(scope=["castles"]) | FiefAccessTokenRequirements(permissions=["castles:read"])`.
+        If the access token doesn't satisfy it, a `FiefAuthForbidden` error will be raised.
 
         **Example**
 
@@ -197,6 +236,14 @@ class FiefAuth:
             return g.access_token_info
         ```
         """
+        requirements: FiefAccessTokenPolicy = FiefAccessTokenRequirements(
+            scope=scope,
+            acr=acr,
+            permissions=permissions,
+            permission_catalog=self.client.permission_catalog,
+        )
+        if policy is not None:
+            requirements = FiefAccessTokenAllOf(requirements, policy)
 
         def _authenticated(f):
             @wraps(f)
@@ -210,10 +257,7 @@ class FiefAuth:
 
                 try:
                     info = self.client.validate_access_token(
-                        token,
-                        required_scope=scope,
-                        required_acr=acr,
-                        required_permissions=permissions,
+                        token, requirements=requirements
                     )
                 except (FiefAccessTokenInvalid, FiefAccessTokenExpired) as e:
                     if optional:
@@ -243,6 +287,7 @@ class FiefAuth:
         acr: Optional[FiefACR] = None,
         permissions: Optional[list[str]] = None,
         refresh: bool = False,
+        policy: Optional[FiefAccessTokenPolicy] = None,
     ):
         """
         Decorator to check if a user is authenticated.
@@ -259,6 +304,12 @@ class FiefAuth:
         Read more: https://docs.fief.dev/going-further/acr/
         :param permissions: Optional list of permissions required.
         If the access token lacks one of the required permission, a `FiefAuthForbidden` error will be raised.
+        A permission ending with `*`, like `castles:*`,
+        matches any granted permission starting with the same prefix.
+        :param policy: Optional `fief_client.FiefAccessTokenPolicy` the access token must satisfy,
+        in addition to the other requirements.
+        It allows to express alternatives, like `FiefAccessTokenRequirements(scope=["castles"]) | FiefAccessTokenRequirements(permissions=["castles:read"])`.
+        If the access token doesn't satisfy it, a `FiefAuthForbidden` error will be raised.
         :param refresh: If `True`, the user information will be refreshed from the Fief API.
         Otherwise, the cache will be used.
 
@@ -276,7 +327,11 @@ class FiefAuth:
         def _current_user(f):
             @wraps(f)
             @self.authenticated(
-                optional=optional, scope=scope, acr=acr, permissions=permissions
+                optional=optional,
+                scope=scope,
+                acr=acr,
+                permissions=permissions,
+                policy=policy,
             )
             def decorated_function(*args, **kwargs):
                 access_token_info: Optional[FiefAccessTokenInfo] = g.access_token_info
@@ -0,0 +1,517 @@
+"""JOSE helpers to verify tokens signed by Fief."""
+
+import concurrent.futures
+import contextlib
+import json
+import threading
+import time
+from collections.abc import Sequence
+from typing import Any, Optional, Protocol, Union
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, ed448, ed25519, padding, rsa
+from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+from jwcrypto import jwk, jws, jwt
+from jwcrypto.common import base64url_decode, json_decode
+
+LEEWAY = 60
+"""Number of seconds of clock skew allowed when checking `exp` and `nbf` claims."""
+
+DEFAULT_ALGORITHMS: tuple[str, ...] = ("RS256",)
+"""Signature algorithms accepted by default."""
+
+_RSA_HASHES: dict[str, type[hashes.HashAlgorithm]] = {
+    "RS256": hashes.SHA256,
+    "RS384": hashes.SHA384,
+    "RS512": hashes.SHA512,
+}
+
+_EC_HASHES: dict[str, tuple[type[hashes.HashAlgorithm], str, int]] = {
+    "ES256": (hashes.SHA256, "secp256r1", 32),
+    "ES384": (hashes.SHA384, "secp384r1", 48),
+    "ES512": (hashes.SHA512, "secp521r1", 66),
+}
+
+
+class IndexedJWKSet(jwk.JWKSet):
+    """
+    JWKSet with its keys indexed by `kid`.
+
+    The index is built once when the keys are loaded,
+    and the public keys are prepared for signature verification at the same time.
+    Looking up the key of a token is then a single dictionary access,
+    instead of a scan of the whole set for each token.
+
+    **Example:**
+
+    ```py
+    jwks = IndexedJWKSet.from_json(jwks_json)
+    key = jwks.get_verification_key(token)
+    ```
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self._index: dict[str, list[jwk.JWK]] = {}
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def from_jwks(cls, jwks: jwk.JWKSet) -> "IndexedJWKSet":
+        """
+        Return an indexed copy of a JWKSet.
+
+        :param jwks: The JWKSet to index.
+        """
+        if isinstance(jwks, IndexedJWKSet):
+            return jwks
+        indexed_jwks = cls()
+        for name, value in jwks.items():
+            if name != "keys":
+                indexed_jwks[name] = value
+        for key in jwks:
+            indexed_jwks.add(key)
+        return indexed_jwks
+
+    def import_keyset(self, keyset: str) -> None:
+        super().import_keyset(keyset)
+        self._index = {}
+        for key in self:
+            self._index_key(key)
+
+    def add(self, elem: jwk.JWK) -> None:
+        super().add(elem)
+        self._index_key(elem)
+
+    def get_keys(self, kid: str) -> set[jwk.JWK]:
+        return set(self._index.get(kid, ()))
+
+    def get_verification_key(self, token: str) -> Union[jwk.JWK, jwk.JWKSet]:
+        """
+        Return the key to verify the signature of a compact JWS.
+
+        If the token header has a `kid`, the matching key is returned.
+        Otherwise, or if the token is not a JWS, the whole set is returned.
+
+        :param token: The compact JWS.
+
+        :raises: `jwcrypto.jwt.JWTMissingKey` if there is no key matching the `kid`.
+        """
+        try:
+            header = json_decode(base64url_decode(token.split(".", 1)[0]))
+            kid = header.get("kid") if "enc" not in header else None
+        except (ValueError, TypeError, AttributeError):
+            return self
+        if kid is None:
+            return self
+        keys = self._index.get(kid)
+        if keys is None:
+            raise jwt.JWTMissingKey()
+        if len(keys) == 1:
+            return keys[0]
+        # Several keys share the same kid: let jwcrypto try each of them
+        duplicate_keys = jwk.JWKSet()
+        for key in keys:
+            duplicate_keys.add(key)
+        return duplicate_keys
+
+    def _index_key(self, key: jwk.JWK) -> None:
+        # Load the public key object once, it's cached by jwcrypto afterwards
+        with contextlib.suppress(jwk.JWException, NotImplementedError):
+            key.get_op_key("verify")
+        kid = key.get("kid")
+        if kid is not None:
+            self._index.setdefault(kid, []).append(key)
+
+
+def get_verification_key(jwks: jwk.JWKSet, token: str) -> Union[jwk.JWK, jwk.JWKSet]:
+    """
+    Return the key to verify the signature of a compact JWS.
+
+    If `jwks` is an `IndexedJWKSet`, the key matching the token `kid` is returned.
+    Otherwise, the whole set is returned.
+
+    :param jwks: The JWKS containing the signing key.
+    :param token: The compact JWS.
+    """
+    if isinstance(jwks, IndexedJWKSet):
+        return jwks.get_verification_key(token)
+    return jwks
+
+
+def get_algorithm(token: str) -> str:
+    """
+    Return the `alg` header of a compact JWS, without verifying it.
+
+    Only use it on a token whose signature has already been verified.
+
+    :param token: The compact JWS.
+
+    :raises: `jwcrypto.jws.InvalidJWSObject` if the header can't be decoded.
+    """
+    try:
+        header = json_decode(base64url_decode(token.split(".", 1)[0]))
+        return str(header["alg"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise jws.InvalidJWSObject() from e
+
+
+def get_unverified_claims(token: str) -> dict[str, Any]:
+    """
+    Return the claims of a compact JWS, without verifying it.
+
+    Only use it on a token whose signature has already been verified.
+
+    :param token: The compact JWS.
+
+    :raises: `jwcrypto.jws.InvalidJWSObject` if the payload can't be decoded.
+    """
+    try:
+        claims = json_decode(base64url_decode(token.split(".", 2)[1]))
+    except (ValueError, TypeError, IndexError) as e:
+        raise jws.InvalidJWSObject() from e
+    if not isinstance(claims, dict):
+        raise jws.InvalidJWSObject()
+    return claims
+
+
+class JOSEBackend(Protocol):
+    """
+    Protocol that should follow a class to implement the verification of tokens signed by Fief.
+
+    Errors are reported with `jwcrypto` exceptions, whatever the implementation:
+    `jwcrypto.jwt.JWTExpired` if the token is expired,
+    `jwcrypto.jwt.JWTMissingKey` if no key of the JWKS matches the token,
+    and any other `jwcrypto.common.JWException` if the token is invalid.
+    """
+
+    def decode_jws(
+        self,
+        token: str,
+        jwks: jwk.JWKSet,
+        *,
+        algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+    ) -> Any:
+        """
+        Verify the signature and the time claims of a compact JWS, and return its claims.
+
+        :param token: The compact JWS.
+        :param jwks: The JWKS containing the signing key.
+        :param algorithms: Signature algorithms accepted.
+        A token signed with another algorithm is rejected.
+        """
+        ...  # pragma: no cover
+
+
+class JWCryptoBackend:
+    """
+    Default backend, relying on `jwcrypto`.
+    """
+
+    def decode_jws(
+        self,
+        token: str,
+        jwks: jwk.JWKSet,
+        *,
+        algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+    ) -> Any:
+        try:
+            decoded_token = jwt.JWT(
+                jwt=token, algs=list(algorithms), key=get_verification_key(jwks, token)
+            )
+        except ValueError as e:
+            raise jws.InvalidJWSObject() from e
+        try:
+            return json.loads(decoded_token.claims)
+        except ValueError as e:
+            raise jwt.JWTInvalidClaimFormat() from e
+
+
+class CryptographyBackend:
+    """
+    Lean backend verifying signatures directly with `cryptography`.
+
+    It supports the RS256, RS384, RS512, ES256, ES384, ES512 and EdDSA algorithms.
+    It skips the generic JOSE objects of `jwcrypto` to only do what's needed
+    for tokens signed by Fief: split the compact JWS, check the algorithm,
+    verify the signature and the `exp` and `nbf` claims, with the same leeway as `jwcrypto`.
+
+    **Example:**
+
+    ```py
+    from fief_client import Fief
+    from fief_client.jose import CryptographyBackend
+
+    fief = Fief(
+        "https://example.fief.dev",
+        "YOUR_CLIENT_ID",
+        jose_backend=CryptographyBackend(),
+    )
+    ```
+    """
+
+    def decode_jws(
+        self,
+        token: str,
+        jwks: jwk.JWKSet,
+        *,
+        algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+    ) -> Any:
+        try:
+            encoded_header, encoded_payload, encoded_signature = token.split(".")
+            header = json_decode(base64url_decode(encoded_header))
+            payload = base64url_decode(encoded_payload)
+            signature = base64url_decode(encoded_signature)
+        except (ValueError, TypeError) as e:
+            raise jws.InvalidJWSObject() from e
+
+        if not isinstance(header, dict) or header.get("alg") not in algorithms:
+            raise jws.InvalidJWSOperation()
+        alg: str = header["alg"]
+
+        key = get_verification_key(jwks, token)
+        keys = [key] if isinstance(key, jwk.JWK) else list(key)
+        signing_input = f"{encoded_header}.{encoded_payload}".encode("ascii")
+        if not any(
+            self._verify(candidate, alg, signing_input, signature) for candidate in keys
+        ):
+            if isinstance(key, jwk.JWK):
+                raise jws.InvalidJWSSignature()
+            raise jwt.JWTMissingKey()
+
+        try:
+            claims = json.loads(payload)
+        except ValueError as e:
+            raise jwt.JWTInvalidClaimFormat() from e
+        if isinstance(claims, dict):
+            self._check_time_claims(claims)
+        return claims
+
+    def _verify(
+        self, key: jwk.JWK, alg: str, signing_input: bytes, signature: bytes
+    ) -> bool:
+        try:
+            public_key = key.get_op_key("verify")
+        except (jwk.JWException, NotImplementedError):
+            return False
+        try:
+            if alg in _RSA_HASHES and isinstance(public_key, rsa.RSAPublicKey):
+                public_key.verify(
+                    signature, signing_input, padding.PKCS1v15(), _RSA_HASHES[alg]()
+                )
+            elif alg in _EC_HASHES and isinstance(
+                public_key, ec.EllipticCurvePublicKey
+            ):
+                hash_algorithm, curve, size = _EC_HASHES[alg]
+                # JWS signatures are the raw concatenation of r and s
+                if public_key.curve.name != curve or len(signature) != 2 * size:
+                    return False
+                r = int.from_bytes(signature[:size], "big")
+                s = int.from_bytes(signature[size:], "big")
+                public_key.verify(
+                    encode_dss_signature(r, s),
+                    signing_input,
+                    ec.ECDSA(hash_algorithm()),
+                )
+            elif alg == "EdDSA" and isinstance(
+                public_key, (ed25519.Ed25519PublicKey, ed448.Ed448PublicKey)
+            ):
+                public_key.verify(signature, signing_input)
+            else:
+                return False
+        except InvalidSignature:
+            return False
+        return True
+
+    def _check_time_claims(self, claims: dict[str, Any]) -> None:
+        now = time.time()
+        try:
+            exp = int(claims["exp"]) if claims.get("exp") is not None else None
+            nbf = int(claims["nbf"]) if claims.get("nbf") is not None else None
+        except (ValueError, TypeError) as e:
+            raise jwt.JWTInvalidClaimFormat() from e
+        if exp is not None and exp < now - LEEWAY:
+            raise jwt.JWTExpired()
+        if nbf is not None and nbf > now + LEEWAY:
+            raise jwt.JWTNotYetValid()
+
+
+_worker_backend: Optional[JOSEBackend] = None
+_worker_jwks: Optional[IndexedJWKSet] = None
+
+
+_MAX_TRACKED_JWKS = 8
+"""Number of JWKS objects `ProcessPoolBackend` remembers, to recognize the previous ones."""
+
+
+def _contains(jwks_list: list[Union[jwk.JWK, jwk.JWKSet]], jwks: Any) -> bool:
+    return any(item is jwks for item in jwks_list)
+
+
+def _initialize_worker(backend: JOSEBackend, jwks_json: str) -> None:
+    global _worker_backend, _worker_jwks
+    _worker_backend = backend
+    _worker_jwks = IndexedJWKSet.from_json(jwks_json)
+
+
+def _decode_jws_in_worker(token: str, algorithms: Sequence[str]) -> Any:
+    assert _worker_backend is not None and _worker_jwks is not None
+    return _worker_backend.decode_jws(token, _worker_jwks, algorithms=algorithms)
+
+
+class ProcessPoolBackend:
+    """
+    Backend spreading signature verification across a pool of processes.
+
+    Verifying signatures holds the GIL, so a single process can't verify tokens
+    on more than one core. This backend sends each token to a worker process,
+    which verifies it with another backend, `CryptographyBackend` by default.
+
+    Workers are loaded with the public keys of the JWKS when they start,
+    so only the token is sent for each verification.
+    When the client passes a JWKS with new keys, after a key rotation,
+    a new pool is started with them; the old one finishes its pending tasks.
+    A refreshed JWKS with the same keys keeps the current pool.
+    Calls started before a rotation, still holding the previous JWKS,
+    are verified in the current process instead of switching back to the old keys.
+
+    Calls block until the worker answers: tokens are verified in parallel
+    when several threads validate tokens at the same time.
+    Sending a token to a worker costs more than verifying it in the current process:
+    it only pays off with several processors available.
+    Run `benchmarks/process_pool.py` to measure it on your hardware.
+    `FiefAsync` always waits for the workers in a thread,
+    its `executor` or the default executor of the event loop,
+    so the event loop isn't blocked.
+
+    **Example:**
+
+    ```py
+    from concurrent.futures import ThreadPoolExecutor
+
+    from fief_client import FiefAsync
+    from fief_client.jose import ProcessPoolBackend
+
+    jose_backend = ProcessPoolBackend(max_workers=4)
+    fief = FiefAsync(
+        "https://example.fief.dev",
+        "YOUR_CLIENT_ID",
+        jose_backend=jose_backend,
+        executor=ThreadPoolExecutor(max_workers=16),
+    )
+    ...
+    jose_backend.shutdown()
+    ```
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        *,
+        backend: Optional[JOSEBackend] = None,
+    ) -> None:
+        """
+        :param max_workers: Number of worker processes.
+        Defaults to the number of processors.
+        :param backend: Backend used by the workers to verify the tokens.
+        It must be picklable. Defaults to `CryptographyBackend`.
+        """
+        self.max_workers = max_workers
+        self.backend = backend if backend is not None else CryptographyBackend()
+        self._public_keys: Optional[str] = None
+        self._pool_jwks: list[Union[jwk.JWK, jwk.JWKSet]] = []
+        self._retired_jwks: list[Union[jwk.JWK, jwk.JWKSet]] = []
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ProcessPoolBackend":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
+
+    def decode_jws(
+        self,
+        token: str,
+        jwks: jwk.JWKSet,
+        *,
+        algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+    ) -> Any:
+        with self._lock:
+            # Submit under the lock, so the pool can't be replaced in the meantime
+            executor = self._get_executor(jwks)
+            if executor is not None:
+                future = executor.submit(
+                    _decode_jws_in_worker, token, tuple(algorithms)
+                )
+        if executor is None:
+            return self.backend.decode_jws(token, jwks, algorithms=algorithms)
+        return future.result()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the worker processes.
+
+        The pool is started again if a token is verified afterwards.
+
+        :param wait: Whether to wait for the pending verifications to finish.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._public_keys = None
+            self._pool_jwks = []
+            self._retired_jwks = []
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _get_executor(
+        self, jwks: Union[jwk.JWK, jwk.JWKSet]
+    ) -> Optional[concurrent.futures.ProcessPoolExecutor]:
+        """
+        Return the pool loaded with the keys of a JWKS,
+        or `None` if the JWKS was replaced by one with other keys.
+        """
+        if self._executor is not None and _contains(self._pool_jwks, jwks):
+            return self._executor
+        if _contains(self._retired_jwks, jwks):
+            return None
+
+        public_keys = self._export_public_keys(jwks)
+        if self._executor is not None and public_keys == self._public_keys:
+            # Same keys, like after a refresh without rotation: keep the pool
+            self._pool_jwks = [jwks, *self._pool_jwks][:_MAX_TRACKED_JWKS]
+            return self._executor
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            self.max_workers,
+            initializer=_initialize_worker,
+            initargs=(self.backend, public_keys),
+        )
+        self._public_keys = public_keys
+        self._retired_jwks = [*self._pool_jwks, *self._retired_jwks][:_MAX_TRACKED_JWKS]
+        self._pool_jwks = [jwks]
+        return self._executor
+
+    @staticmethod
+    def _export_public_keys(jwks: Union[jwk.JWK, jwk.JWKSet]) -> str:
+        keys = [jwks] if isinstance(jwks, jwk.JWK) else list(jwks)
+        # Sorted, so the same keys always give the same document
+        exported_keys = sorted(
+            (key.export_public(as_dict=True) for key in keys),
+            key=lambda key: json.dumps(key, sort_keys=True),
+        )
+        return json.dumps({"keys": exported_keys}, sort_keys=True)
+
+
+__all__ = [
+    "DEFAULT_ALGORITHMS",
+    "IndexedJWKSet",
+    "JOSEBackend",
+    "JWCryptoBackend",
+    "CryptographyBackend",
+    "ProcessPoolBackend",
+    "get_algorithm",
+    "get_unverified_claims",
+    "get_verification_key",
+]
@@ -0,0 +1,235 @@
+"""Permission matching, with support for wildcard patterns."""
+
+from bisect import bisect_left
+from collections.abc import Iterable
+from typing import Optional
+
+WILDCARD = "*"
+"""
+Suffix of a permission pattern.
+
+A pattern like `castles:*` or `org/123/*` matches any permission starting with
+the same prefix, like `castles:read` or `org/123/castles:read`.
+"""
+
+
+def is_pattern(permission: str) -> bool:
+    """
+    Check if a permission is a wildcard pattern.
+
+    :param permission: The permission to check.
+    """
+    return permission.endswith(WILDCARD)
+
+
+class PermissionIndex:
+    """
+    Index of the permissions granted to an access token.
+
+    Exact permissions are looked up in a set. Patterns are looked up by prefix
+    with a binary search in the sorted permissions, built on the first pattern check:
+    the cost of a check doesn't grow with the number of permissions of the token.
+
+    **Example:**
+
+    ```py
+    index = PermissionIndex(["castles:read", "castles:create"])
+    index.match("castles:*")  # True
+    ```
+    """
+
+    __slots__ = ("permissions", "_sorted_permissions")
+
+    def __init__(self, permissions: Iterable[str]) -> None:
+        """
+        :param permissions: The granted permissions.
+        """
+        self.permissions = frozenset(permissions)
+        self._sorted_permissions: Optional[tuple[str, ...]] = None
+
+    def __contains__(self, permission: object) -> bool:
+        return permission in self.permissions
+
+    def __len__(self) -> int:
+        return len(self.permissions)
+
+    def match(self, permission: str) -> bool:
+        """
+        Check if a permission, or a wildcard pattern, is granted.
+
+        :param permission: The permission or the pattern to check.
+        """
+        if is_pattern(permission):
+            return self.match_prefix(permission[: -len(WILDCARD)])
+        return permission in self.permissions
+
+    def match_prefix(self, prefix: str) -> bool:
+        """
+        Check if at least one granted permission starts with a prefix.
+
+        :param prefix: The prefix to look for.
+        """
+        sorted_permissions = self._sorted_permissions
+        if sorted_permissions is None:
+            sorted_permissions = self._sorted_permissions = tuple(
+                sorted(self.permissions)
+            )
+        i = bisect_left(sorted_permissions, prefix)
+        return i < len(sorted_permissions) and sorted_permissions[i].startswith(prefix)
+
+
+class PermissionRequirement:
+    """
+    Compiled list of required permissions, which may contain wildcard patterns.
+
+    **Example:**
+
+    ```py
+    requirement = PermissionRequirement(["castles:*", "org/123/members:read"])
+    requirement.check(PermissionIndex(["castles:read", "org/123/members:read"]))  # True
+    ```
+    """
+
+    __slots__ = ("permissions", "prefixes")
+
+    def __init__(self, permissions: Iterable[str]) -> None:
+        """
+        :param permissions: The required permissions or patterns.
+        """
+        permissions = frozenset(permissions)
+        self.permissions = frozenset(
+            permission for permission in permissions if not is_pattern(permission)
+        )
+        self.prefixes = tuple(
+            permission[: -len(WILDCARD)]
+            for permission in permissions
+            if is_pattern(permission)
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.permissions or self.prefixes)
+
+    def check(self, index: PermissionIndex) -> bool:
+        """
+        Check if all the required permissions are granted.
+
+        :param index: Index of the granted permissions.
+        """
+        return self.permissions <= index.permissions and all(
+            index.match_prefix(prefix) for prefix in self.prefixes
+        )
+
+
+class PermissionCatalog:
+    """
+    Catalog of all the permissions of a tenant, assigning a bit to each of them.
+
+    Permissions of an access token are encoded once into an integer bitmask,
+    and required permissions into masks when the requirements are compiled:
+    checking them is then a single bitwise AND, whatever the number of permissions.
+
+    **Example:**
+
+    ```py
+    catalog = PermissionCatalog(["castles:read", "castles:create", "castles:delete"])
+    mask = catalog.encode(["castles:read", "castles:create"])
+    requirement = catalog.compile(["castles:read"])
+    requirement.check(mask)  # True
+    ```
+    """
+
+    __slots__ = ("permissions", "_bits")
+
+    def __init__(self, permissions: Iterable[str]) -> None:
+        """
+        :param permissions: All the permissions of the tenant.
+        """
+        self.permissions = tuple(dict.fromkeys(permissions))
+        self._bits = {
+            permission: 1 << i for i, permission in enumerate(self.permissions)
+        }
+
+    def __contains__(self, permission: object) -> bool:
+        return permission in self._bits
+
+    def __len__(self) -> int:
+        return len(self.permissions)
+
+    def encode(self, permissions: Iterable[str]) -> Optional[int]:
+        """
+        Return the bitmask of a list of permissions,
+        or `None` if one of them is not in the catalog.
+
+        :param permissions: The permissions to encode.
+        """
+        mask = 0
+        bits = self._bits
+        for permission in permissions:
+            bit = bits.get(permission)
+            if bit is None:
+                return None
+            mask |= bit
+        return mask
+
+    def compile(self, permissions: Iterable[str]) -> "PermissionMaskRequirement":
+        """
+        Compile a list of required permissions, which may contain wildcard patterns, into masks.
+
+        :param permissions: The required permissions or patterns.
+        """
+        requirement = PermissionRequirement(permissions)
+        all_mask: Optional[int] = self.encode(requirement.permissions)
+        any_masks = []
+        for prefix in requirement.prefixes:
+            any_mask = 0
+            for permission, bit in self._bits.items():
+                if permission.startswith(prefix):
+                    any_mask |= bit
+            any_masks.append(any_mask)
+        return PermissionMaskRequirement(self, all_mask, tuple(any_masks))
+
+
+class PermissionMaskRequirement:
+    """
+    List of required permissions compiled into masks by a `PermissionCatalog`.
+    """
+
+    __slots__ = ("catalog", "all_mask", "any_masks")
+
+    def __init__(
+        self,
+        catalog: PermissionCatalog,
+        all_mask: Optional[int],
+        any_masks: tuple[int, ...],
+    ) -> None:
+        """
+        :param catalog: The catalog used to compile the masks.
+        :param all_mask: Mask of the exact permissions, which must all be granted.
+        `None` if one of them is not in the catalog: it can't be granted.
+        :param any_masks: For each wildcard pattern, mask of the matching permissions,
+        of which at least one must be granted.
+        """
+        self.catalog = catalog
+        self.all_mask = all_mask
+        self.any_masks = any_masks
+
+    def check(self, mask: int) -> bool:
+        """
+        Check if all the required permissions are granted.
+
+        :param mask: Mask of the granted permissions, encoded with the same catalog.
+        """
+        all_mask = self.all_mask
+        if all_mask is None or mask & all_mask != all_mask:
+            return False
+        return all(mask & any_mask for any_mask in self.any_masks)
+
+
+__all__ = [
+    "WILDCARD",
+    "PermissionCatalog",
+    "PermissionIndex",
+    "PermissionMaskRequirement",
+    "PermissionRequirement",
+    "is_pattern",
+]
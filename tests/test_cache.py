@@ -0,0 +1,116 @@
+import os
+import pathlib
+import stat
+import time
+
+import pytest
+from pytest_mock import MockerFixture
+
+from fief_client.cache import FileCache, LRUCache
+
+
+def test_get_missing(tmp_path: pathlib.Path):
+    cache = FileCache(tmp_path / "cache")
+    assert cache.get("jwks") is None
+
+
+def test_set_get(tmp_path: pathlib.Path):
+    cache = FileCache(tmp_path / "cache")
+    cache.set("jwks", {"keys": []}, 3600)
+
+    entry = cache.get("jwks")
+    assert entry is not None
+    value, ttl = entry
+    assert value == {"keys": []}
+    assert 3590 < ttl <= 3600
+
+    assert FileCache(tmp_path / "cache").get("jwks") is not None
+    assert [path.suffix for path in (tmp_path / "cache").iterdir()] == [".json"]
+
+
+def test_expired(tmp_path: pathlib.Path):
+    cache = FileCache(tmp_path)
+    cache.set("jwks", {"keys": []}, 60)
+    (path,) = tmp_path.iterdir()
+    mtime = time.time() - 61
+    os.utime(path, (mtime, mtime))
+
+    assert cache.get("jwks") is None
+
+
+def test_corrupted(tmp_path: pathlib.Path):
+    cache = FileCache(tmp_path)
+    cache.set("jwks", {"keys": []}, 60)
+    (path,) = tmp_path.iterdir()
+    path.write_text("{")
+
+    assert cache.get("jwks") is None
+
+
+def test_unwritable(tmp_path: pathlib.Path):
+    file_path = tmp_path / "file"
+    file_path.write_text("")
+    cache = FileCache(file_path)
+
+    cache.set("jwks", {"keys": []}, 60)
+    assert cache.get("jwks") is None
+
+
+def test_directory_mode(tmp_path: pathlib.Path):
+    cache = FileCache(tmp_path / "cache")
+    cache.set("jwks", {"keys": []}, 60)
+
+    assert stat.S_IMODE((tmp_path / "cache").stat().st_mode) == 0o700
+
+
+@pytest.mark.parametrize("mode", [0o770, 0o707, 0o777])
+def test_shared_directory(tmp_path: pathlib.Path, mode: int):
+    cache = FileCache(tmp_path)
+    cache.set("jwks", {"keys": []}, 60)
+    tmp_path.chmod(mode)
+
+    assert cache.get("jwks") is None
+
+    cache.set("jwks-other", {"keys": []}, 60)
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_directory_other_owner(tmp_path: pathlib.Path, mocker: MockerFixture):
+    cache = FileCache(tmp_path)
+    cache.set("jwks", {"keys": []}, 60)
+    mocker.patch("fief_client.cache.os.getuid", return_value=os.getuid() + 1)
+
+    assert cache.get("jwks") is None
+
+
+class TestLRUCache:
+    def test_get_set(self):
+        cache: LRUCache[str, int] = LRUCache(2)
+        assert cache.get("a") is None
+        cache.set("a", 1, time.time() + 60)
+        assert cache.get("a") == 1
+
+    def test_eviction(self):
+        cache: LRUCache[str, int] = LRUCache(2)
+        expires_at = time.time() + 60
+        cache.set("a", 1, expires_at)
+        cache.set("b", 2, expires_at)
+        cache.get("a")
+        cache.set("c", 3, expires_at)
+
+        assert len(cache) == 2
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_expired(self):
+        cache: LRUCache[str, int] = LRUCache(2)
+        cache.set("a", 1, time.time() - 1)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_clear(self):
+        cache: LRUCache[str, int] = LRUCache(2)
+        cache.set("a", 1, time.time() + 60)
+        cache.clear()
+        assert cache.get("a") is None
@@ -1,56 +1,107 @@
+import asyncio
 import contextlib
+import functools
 import json
+import os
+import pathlib
+import threading
+import time
 import uuid
-from collections.abc import Mapping
+from collections.abc import Generator, Mapping
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+from unittest.mock import MagicMock
 
 import httpx
 import pytest
 import respx
 from httpx import Response
-from jwcrypto import jwk
+from jwcrypto import jwk, jwt
 from pytest_mock import MockerFixture
 
 from fief_client.client import (
     Fief,
     FiefAccessTokenACRTooLow,
+    FiefAccessTokenAllOf,
+    FiefAccessTokenAnyOf,
     FiefAccessTokenExpired,
+    FiefAccessTokenInfo,
     FiefAccessTokenInvalid,
     FiefAccessTokenMissingPermission,
     FiefAccessTokenMissingScope,
+    FiefAccessTokenPolicy,
+    FiefAccessTokenRequirements,
     FiefACR,
     FiefAsync,
+    FiefError,
     FiefIdTokenInvalid,
     FiefRequestError,
     FiefTokenResponse,
+    JWKSSource,
+    OpenIDConfigurationSource,
 )
 from fief_client.crypto import get_validation_hash
+from fief_client.jose import (
+    CryptographyBackend,
+    JOSEBackend,
+    JWCryptoBackend,
+    ProcessPoolBackend,
+)
+from fief_client.permissions import PermissionCatalog, PermissionIndex
 from tests.conftest import GetAPIRequestsMock
 
 
+@pytest.fixture(
+    scope="module", autouse=True, params=[JWCryptoBackend, CryptographyBackend]
+)
+def jose_backend(request) -> Generator[type[JOSEBackend], None, None]:
+    """Run the whole module with each JOSE backend, including clients created in tests."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr("fief_client.client.JWCryptoBackend", request.param)
+        yield request.param
+
+
 @pytest.fixture(scope="module")
-def fief_client() -> Fief:
-    return Fief("https://bretagne.fief.dev", "CLIENT_ID", "CLIENT_SECRET")
+def fief_client(jose_backend: type[JOSEBackend]) -> Fief:
+    return Fief(
+        "https://bretagne.fief.dev",
+        "CLIENT_ID",
+        "CLIENT_SECRET",
+        jose_backend=jose_backend(),
+    )
 
 
 @pytest.fixture(scope="module")
-def fief_client_tenant() -> Fief:
-    return Fief("https://bretagne.fief.dev/secondary", "CLIENT_ID", "CLIENT_SECRET")
+def fief_client_tenant(jose_backend: type[JOSEBackend]) -> Fief:
+    return Fief(
+        "https://bretagne.fief.dev/secondary",
+        "CLIENT_ID",
+        "CLIENT_SECRET",
+        jose_backend=jose_backend(),
+    )
 
 
 @pytest.fixture(scope="module")
-def fief_client_encryption_key(encryption_key: jwk.JWK) -> Fief:
+def fief_client_encryption_key(
+    encryption_key: jwk.JWK, jose_backend: type[JOSEBackend]
+) -> Fief:
     return Fief(
         "https://bretagne.fief.dev",
         "CLIENT_ID",
         "CLIENT_SECRET",
         encryption_key=encryption_key.export(),
+        jose_backend=jose_backend(),
     )
 
 
 @pytest.fixture(scope="module")
-def fief_async_client() -> FiefAsync:
-    return FiefAsync("https://bretagne.fief.dev", "CLIENT_ID", "CLIENT_SECRET")
+def fief_async_client(jose_backend: type[JOSEBackend]) -> FiefAsync:
+    return FiefAsync(
+        "https://bretagne.fief.dev",
+        "CLIENT_ID",
+        "CLIENT_SECRET",
+        jose_backend=jose_backend(),
+    )
 
 
 def test_serializable_fief_token_response():
@@ -67,6 +118,334 @@ def test_serializable_fief_token_response():
     )
 
 
+class TestFiefAccessTokenInfo:
+    @pytest.fixture
+    def info(self, user_id: str) -> FiefAccessTokenInfo:
+        return FiefAccessTokenInfo(
+            id=uuid.UUID(user_id),
+            scope=["openid", "offline_access"],
+            acr=FiefACR.LEVEL_ONE,
+            permissions=["castles:read", "castles:create"],
+            access_token="ACCESS_TOKEN",
+        )
+
+    def test_dict_compatible(self, info: FiefAccessTokenInfo, user_id: str):
+        assert isinstance(info, dict)
+        assert info["scope"] == ["openid", "offline_access"]
+        assert info == {
+            "id": uuid.UUID(user_id),
+            "scope": ["openid", "offline_access"],
+            "acr": FiefACR.LEVEL_ONE,
+            "permissions": ["castles:read", "castles:create"],
+            "access_token": "ACCESS_TOKEN",
+        }
+        assert json.loads(json.dumps(info, default=str))["id"] == user_id
+        assert not hasattr(info, "__dict__")
+
+    def test_has_scope(self, info: FiefAccessTokenInfo):
+        assert info.scope_set == frozenset(["openid", "offline_access"])
+        assert info.has_scope("openid")
+        assert info.has_scope("openid", "offline_access")
+        assert info.has_scope()
+        assert not info.has_scope("openid", "required_scope")
+
+    def test_has_permission(self, info: FiefAccessTokenInfo):
+        assert info.permission_set == frozenset(["castles:read", "castles:create"])
+        assert info.has_permission("castles:read", "castles:create")
+        assert not info.has_permission("castles:delete")
+
+    def test_copy(self, info: FiefAccessTokenInfo):
+        permission_set = info.permission_set
+        copy = info.copy()
+        assert isinstance(copy, FiefAccessTokenInfo)
+        assert copy == info
+        assert copy.permission_set is permission_set
+
+
+class TestFiefAccessTokenRequirements:
+    @pytest.fixture
+    def info(self, user_id: str) -> FiefAccessTokenInfo:
+        return FiefAccessTokenInfo(
+            id=uuid.UUID(user_id),
+            scope=["openid"],
+            acr=FiefACR.LEVEL_ZERO,
+            permissions=["castles:read", "castles:create"],
+            access_token="ACCESS_TOKEN",
+        )
+
+    @pytest.mark.parametrize(
+        "requirements,error",
+        [
+            (FiefAccessTokenRequirements(), None),
+            (FiefAccessTokenRequirements(scope=[], permissions=[]), None),
+            (FiefAccessTokenRequirements(scope=["openid"]), None),
+            (
+                FiefAccessTokenRequirements(scope=["openid", "required_scope"]),
+                FiefAccessTokenMissingScope,
+            ),
+            (FiefAccessTokenRequirements(acr=FiefACR.LEVEL_ZERO), None),
+            (
+                FiefAccessTokenRequirements(acr=FiefACR.LEVEL_ONE),
+                FiefAccessTokenACRTooLow,
+            ),
+            (FiefAccessTokenRequirements(permissions=["castles:read"]), None),
+            (
+                FiefAccessTokenRequirements(permissions=["castles:delete"]),
+                FiefAccessTokenMissingPermission,
+            ),
+            (FiefAccessTokenRequirements(permissions=["castles:*"]), None),
+            (
+                FiefAccessTokenRequirements(permissions=["castles:*", "dungeons:*"]),
+                FiefAccessTokenMissingPermission,
+            ),
+            (
+                FiefAccessTokenRequirements(
+                    scope=["required_scope"], acr=FiefACR.LEVEL_ONE
+                ),
+                FiefAccessTokenACRTooLow,
+            ),
+        ],
+    )
+    def test_check(
+        self,
+        info: FiefAccessTokenInfo,
+        requirements: FiefAccessTokenRequirements,
+        error: Optional[type[Exception]],
+    ):
+        if error is None:
+            requirements.check(info)
+        else:
+            with pytest.raises(error):
+                requirements.check(info)
+
+
+class TestFiefAccessTokenPolicy:
+    @pytest.fixture
+    def info(self, user_id: str) -> FiefAccessTokenInfo:
+        return FiefAccessTokenInfo(
+            id=uuid.UUID(user_id),
+            scope=["openid"],
+            acr=FiefACR.LEVEL_ZERO,
+            permissions=["castles:read"],
+            access_token="ACCESS_TOKEN",
+        )
+
+    def test_operators(self):
+        a = FiefAccessTokenRequirements(scope=["a"])
+        b = FiefAccessTokenRequirements(scope=["b"])
+        c = FiefAccessTokenRequirements(scope=["c"])
+
+        any_of = a | b | c
+        assert isinstance(any_of, FiefAccessTokenAnyOf)
+        assert any_of.policies == (a, b, c)
+
+        all_of = a & b & c
+        assert isinstance(all_of, FiefAccessTokenAllOf)
+        assert all_of.policies == (a, b, c)
+
+        mixed = (a & b) | c
+        assert isinstance(mixed, FiefAccessTokenAnyOf)
+        assert len(mixed.policies) == 2
+        assert isinstance(mixed.policies[0], FiefAccessTokenAllOf)
+
+    def test_abstract(self):
+        with pytest.raises(TypeError):
+            FiefAccessTokenPolicy()  # type: ignore[abstract]
+
+    def test_empty_any_of(self):
+        with pytest.raises(ValueError):
+            FiefAccessTokenAnyOf()
+
+    @pytest.mark.parametrize(
+        "policy,error",
+        [
+            (
+                FiefAccessTokenRequirements(scope=["openid"])
+                | FiefAccessTokenRequirements(permissions=["castles:delete"]),
+                None,
+            ),
+            (
+                FiefAccessTokenRequirements(scope=["required_scope"])
+                | FiefAccessTokenRequirements(permissions=["castles:read"]),
+                None,
+            ),
+            (
+                FiefAccessTokenRequirements(scope=["required_scope"])
+                | FiefAccessTokenRequirements(permissions=["castles:delete"]),
+                FiefAccessTokenMissingScope,
+            ),
+            (
+                FiefAccessTokenRequirements(permissions=["castles:delete"])
+                | FiefAccessTokenRequirements(scope=["required_scope"]),
+                FiefAccessTokenMissingPermission,
+            ),
+            (
+                FiefAccessTokenRequirements(scope=["openid"])
+                & FiefAccessTokenRequirements(permissions=["castles:read"]),
+                None,
+            ),
+            (
+                FiefAccessTokenRequirements(scope=["openid"])
+                & FiefAccessTokenRequirements(acr=FiefACR.LEVEL_ONE),
+                FiefAccessTokenACRTooLow,
+            ),
+            (
+                (
+                    FiefAccessTokenRequirements(acr=FiefACR.LEVEL_ONE)
+                    & FiefAccessTokenRequirements(permissions=["castles:delete"])
+                )
+                | FiefAccessTokenRequirements(permissions=["castles:*"]),
+                None,
+            ),
+        ],
+    )
+    def test_check(
+        self,
+        info: FiefAccessTokenInfo,
+        policy: FiefAccessTokenPolicy,
+        error: Optional[type[Exception]],
+    ):
+        if error is None:
+            policy.check(info)
+        else:
+            with pytest.raises(error):
+                policy.check(info)
+
+    def test_validate_access_token(self, fief_client: Fief, generate_access_token):
+        access_token = generate_access_token(
+            encrypt=False, scope="openid", permissions=["castles:read"]
+        )
+        policy = FiefAccessTokenRequirements(
+            scope=["required_scope"]
+        ) | FiefAccessTokenRequirements(permissions=["castles:read"])
+
+        info = fief_client.validate_access_token(access_token, requirements=policy)
+        assert info["access_token"] == access_token
+
+        with pytest.raises(FiefAccessTokenMissingScope):
+            fief_client.validate_access_token(
+                access_token,
+                requirements=policy & FiefAccessTokenRequirements(scope=["castles"]),
+            )
+
+
+class TestPermissionCatalog:
+    @pytest.fixture
+    def catalog(self) -> PermissionCatalog:
+        return PermissionCatalog(
+            ["castles:read", "castles:create", "castles:delete", "org/123/members:read"]
+        )
+
+    @pytest.mark.parametrize(
+        "permissions,required_permissions,valid",
+        [
+            (["castles:read", "castles:create"], ["castles:create"], True),
+            (["castles:read"], ["castles:create"], False),
+            (["castles:read"], ["castles:*"], True),
+            (["castles:read"], ["org/123/*"], False),
+            (["castles:read"], ["dungeons:read"], False),
+            # Permissions outside of the catalog are checked with sets
+            (["castles:read", "dungeons:read"], ["dungeons:read"], True),
+            (["castles:read", "dungeons:read"], ["dungeons:*"], True),
+            (["dungeons:read"], ["castles:read"], False),
+        ],
+    )
+    def test_requirements(
+        self,
+        catalog: PermissionCatalog,
+        permissions: list[str],
+        required_permissions: list[str],
+        valid: bool,
+        signature_key: jwk.JWK,
+        generate_access_token,
+    ):
+        access_token = generate_access_token(encrypt=False, permissions=permissions)
+        requirements = FiefAccessTokenRequirements(
+            permissions=required_permissions, permission_catalog=catalog
+        )
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(offline_handler),
+            openid_configuration=OFFLINE_OPENID_CONFIGURATION,
+            jwks={"keys": [signature_key.export_public(as_dict=True)]},
+            permission_catalog=catalog,
+        ) as fief:
+            if valid:
+                info = fief.validate_access_token(
+                    access_token, requirements=requirements
+                )
+                assert info.get_permission_mask(catalog) == catalog.encode(permissions)
+            else:
+                with pytest.raises(FiefAccessTokenMissingPermission):
+                    fief.validate_access_token(access_token, requirements=requirements)
+
+    def test_cached_mask(
+        self,
+        catalog: PermissionCatalog,
+        signature_key: jwk.JWK,
+        generate_access_token,
+        mocker: MockerFixture,
+    ):
+        access_token = generate_access_token(
+            encrypt=False, permissions=["castles:read"]
+        )
+        requirements = FiefAccessTokenRequirements(
+            permissions=["castles:read"], permission_catalog=catalog
+        )
+        encode = mocker.spy(PermissionCatalog, "encode")
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(offline_handler),
+            openid_configuration=OFFLINE_OPENID_CONFIGURATION,
+            jwks={"keys": [signature_key.export_public(as_dict=True)]},
+            permission_catalog=catalog,
+            access_token_cache_size=16,
+        ) as fief:
+            for _ in range(3):
+                fief.validate_access_token(access_token, requirements=requirements)
+        assert encode.call_count == 1
+
+    @pytest.mark.parametrize(
+        "required_permissions,valid",
+        [(["castles:read"], True), (["castles:*"], True), (["castles:create"], False)],
+    )
+    def test_required_permissions(
+        self,
+        catalog: PermissionCatalog,
+        required_permissions: list[str],
+        valid: bool,
+        signature_key: jwk.JWK,
+        generate_access_token,
+        mocker: MockerFixture,
+    ):
+        access_token = generate_access_token(
+            encrypt=False, permissions=["castles:read"]
+        )
+        permission_index_init = mocker.spy(PermissionIndex, "__init__")
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(offline_handler),
+            openid_configuration=OFFLINE_OPENID_CONFIGURATION,
+            jwks={"keys": [signature_key.export_public(as_dict=True)]},
+            permission_catalog=catalog,
+            access_token_cache_size=16,
+        ) as fief:
+            for _ in range(3):
+                if valid:
+                    fief.validate_access_token(
+                        access_token, required_permissions=required_permissions
+                    )
+                else:
+                    with pytest.raises(FiefAccessTokenMissingPermission):
+                        fief.validate_access_token(
+                            access_token, required_permissions=required_permissions
+                        )
+        permission_index_init.assert_not_called()
+
+
 def test_fief_acr():
     assert FiefACR.LEVEL_ZERO < FiefACR.LEVEL_ONE
     assert FiefACR.LEVEL_ZERO <= FiefACR.LEVEL_ONE
@@ -92,6 +471,7 @@ class TestCustomVerifyCertParameters:
                 headers={},
                 verify=False,
                 cert="/bretagne.pem",
+                transport=None,
             )
 
     @pytest.mark.asyncio
@@ -117,7 +497,147 @@ class TestCustomVerifyCertParameters:
                 headers={},
                 verify=False,
                 cert="/bretagne.pem",
+                transport=None,
+            )
+
+
+class TestHTTPXClientPool:
+    def test_sync(self):
+        limits = httpx.Limits(max_connections=10, keepalive_expiry=30)
+        fief = Fief(
+            "https://bretagne.fief.dev", "CLIENT_ID", "CLIENT_SECRET", limits=limits
+        )
+
+        with fief._get_httpx_client() as client_1:
+            pass
+        with fief._get_httpx_client() as client_2:
+            pass
+        assert client_1 is client_2
+        assert not client_1.is_closed
+        assert client_1._transport._pool._max_connections == 10  # type: ignore
+
+        fief.close()
+        assert client_1.is_closed
+
+        with fief._get_httpx_client() as client_3:
+            pass
+        assert client_3 is not client_1
+        assert not client_3.is_closed
+
+    def test_sync_context_manager(self):
+        with Fief("https://bretagne.fief.dev", "CLIENT_ID", "CLIENT_SECRET") as fief:
+            with fief._get_httpx_client() as client:
+                pass
+        assert client.is_closed
+
+    @pytest.mark.asyncio
+    async def test_async(self):
+        fief = FiefAsync("https://bretagne.fief.dev", "CLIENT_ID", "CLIENT_SECRET")
+
+        async with fief._get_httpx_client() as client_1:
+            pass
+        async with fief._get_httpx_client() as client_2:
+            pass
+        assert client_1 is client_2
+        assert not client_1.is_closed
+
+        await fief.aclose()
+        assert client_1.is_closed
+
+        async with fief._get_httpx_client() as client_3:
+            pass
+        assert client_3 is not client_1
+        assert not client_3.is_closed
+
+    @pytest.mark.asyncio
+    async def test_async_context_manager(self):
+        async with FiefAsync(
+            "https://bretagne.fief.dev", "CLIENT_ID", "CLIENT_SECRET"
+        ) as fief:
+            async with fief._get_httpx_client() as client:
+                pass
+        assert client.is_closed
+
+
+class TestCustomHTTPXClient:
+    def test_sync_transport(self, user_id: str):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"sub": user_id})
+
+        fief = Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            "CLIENT_SECRET",
+            transport=httpx.MockTransport(handler),
+        )
+        assert fief.update_profile("ACCESS_TOKEN", {}) == {"sub": user_id}
+
+    def test_sync_client(self, user_id: str):
+        requests: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json={"sub": user_id})
+
+        httpx_client = httpx.Client(transport=httpx.MockTransport(handler))
+        fief = Fief(
+            "https://bretagne.fief.dev/secondary",
+            "CLIENT_ID",
+            "CLIENT_SECRET",
+            host="www.bretagne.duchy",
+            httpx_client=httpx_client,
+        )
+
+        with fief._get_httpx_client() as client:
+            assert client is httpx_client
+            request = fief._get_openid_configuration_request(client)
+            assert (
+                str(request.url)
+                == "https://bretagne.fief.dev/secondary/.well-known/openid-configuration"
             )
+            assert request.headers["Host"] == "www.bretagne.duchy"
+
+        assert fief.update_profile("ACCESS_TOKEN", {}) == {"sub": user_id}
+        assert (
+            str(requests[-1].url) == "https://bretagne.fief.dev/secondary/api/profile"
+        )
+
+        fief.close()
+        assert not httpx_client.is_closed
+
+    @pytest.mark.asyncio
+    async def test_async_transport(self, user_id: str):
+        async def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"sub": user_id})
+
+        fief = FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            "CLIENT_SECRET",
+            transport=httpx.MockTransport(handler),
+        )
+        assert await fief.update_profile("ACCESS_TOKEN", {}) == {"sub": user_id}
+
+    @pytest.mark.asyncio
+    async def test_async_client(self, user_id: str):
+        async def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"sub": user_id})
+
+        httpx_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        fief = FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            "CLIENT_SECRET",
+            httpx_client=httpx_client,
+        )
+
+        async with fief._get_httpx_client() as client:
+            assert client is httpx_client
+
+        assert await fief.update_profile("ACCESS_TOKEN", {}) == {"sub": user_id}
+
+        await fief.aclose()
+        assert not httpx_client.is_closed
 
 
 class TestAuthURL:
@@ -623,6 +1143,55 @@ class TestValidateAccessToken:
             "access_token": access_token,
         }
 
+    @pytest.mark.parametrize(
+        "required_permissions,valid",
+        [
+            (["castles:*"], True),
+            (["castles:*", "org/123/*"], True),
+            (["castles:read", "dungeons:*"], False),
+        ],
+    )
+    def test_permission_pattern(
+        self,
+        required_permissions: list[str],
+        valid: bool,
+        fief_client: Fief,
+        generate_access_token,
+    ):
+        access_token = generate_access_token(
+            encrypt=False, permissions=["castles:read", "org/123/members:read"]
+        )
+        if valid:
+            info = fief_client.validate_access_token(
+                access_token, required_permissions=required_permissions
+            )
+            assert info.has_permission(*required_permissions)
+        else:
+            with pytest.raises(FiefAccessTokenMissingPermission):
+                fief_client.validate_access_token(
+                    access_token, required_permissions=required_permissions
+                )
+
+    def test_requirements(self, fief_client: Fief, generate_access_token):
+        access_token = generate_access_token(
+            encrypt=False, scope="openid", permissions=["castles:read"]
+        )
+        info = fief_client.validate_access_token(
+            access_token,
+            requirements=FiefAccessTokenRequirements(
+                scope=["openid"], permissions=["castles:read"]
+            ),
+        )
+        assert info["access_token"] == access_token
+
+        with pytest.raises(FiefAccessTokenMissingPermission):
+            fief_client.validate_access_token(
+                access_token,
+                requirements=FiefAccessTokenRequirements(
+                    permissions=["castles:create"]
+                ),
+            )
+
     @pytest.mark.asyncio
     async def test_async_invalid_token(self, fief_async_client: FiefAsync):
         with pytest.raises(FiefAccessTokenInvalid):
@@ -737,6 +1306,1171 @@ class TestValidateAccessToken:
         }
 
 
+class JWKSServer:
+    def __init__(
+        self,
+        keys: list[jwk.JWK],
+        *,
+        cache_control: Optional[str] = None,
+        delay: float = 0.0,
+    ) -> None:
+        self.keys = keys
+        self.cache_control = cache_control
+        self.delay = delay
+        self.status_code = 200
+        self.openid_configuration_calls = 0
+        self.jwks_calls = 0
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        time.sleep(self.delay)
+        return self._handle(request)
+
+    async def async_handler(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self.delay)
+        return self._handle(request)
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/.well-known/openid-configuration":
+            self.openid_configuration_calls += 1
+            return httpx.Response(
+                200,
+                json={"jwks_uri": "https://bretagne.fief.dev/.well-known/jwks.json"},
+            )
+        self.jwks_calls += 1
+        if self.status_code != 200:
+            return httpx.Response(self.status_code, text="Service Unavailable")
+        headers = {}
+        if self.cache_control is not None:
+            headers["Cache-Control"] = self.cache_control
+        return httpx.Response(
+            200,
+            json={"keys": [key.export_public(as_dict=True) for key in self.keys]},
+            headers=headers,
+        )
+
+
+def generate_kid_access_token(key: jwk.JWK, user_id: str) -> str:
+    token = jwt.JWT(
+        header={"alg": "RS256", "kid": key.kid},
+        claims={"sub": user_id, "scope": "", "acr": "0", "permissions": []},
+    )
+    token.make_signed_token(key)
+    return token.serialize()
+
+
+@pytest.fixture(scope="module")
+def rotated_key() -> jwk.JWK:
+    return jwk.JWK.generate(kty="RSA", size=2048, kid="fief-client-tests-rotated")
+
+
+@pytest.fixture
+def clock(mocker: MockerFixture) -> MagicMock:
+    clock = mocker.patch("fief_client.client.time")
+    clock.monotonic.return_value = 1000.0
+    return clock
+
+
+class TestJWKSCache:
+    @pytest.mark.parametrize(
+        "cache_control,expected_ttl",
+        [
+            (None, 3600),
+            ("public, max-age=120", 120),
+            ("max-age=0", 60),
+            ("no-cache", 60),
+            ("no-store, max-age=600", 60),
+        ],
+    )
+    def test_ttl(
+        self,
+        cache_control: Optional[str],
+        expected_ttl: int,
+        clock: MagicMock,
+        signature_key: jwk.JWK,
+        access_token: str,
+    ):
+        server = JWKSServer([signature_key], cache_control=cache_control)
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+        ) as fief:
+            fief.validate_access_token(access_token)
+            assert server.jwks_calls == 1
+            assert fief._jwks_expires_at == 1000.0 + expected_ttl
+
+            clock.monotonic.return_value = 1000.0 + expected_ttl - 1
+            fief.validate_access_token(access_token)
+            assert server.jwks_calls == 1
+
+            clock.monotonic.return_value = 1000.0 + expected_ttl
+            fief.validate_access_token(access_token)
+            assert server.jwks_calls == 2
+
+    def test_refresh_error(
+        self, clock: MagicMock, signature_key: jwk.JWK, access_token: str
+    ):
+        server = JWKSServer([signature_key])
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+        ) as fief:
+            fief.validate_access_token(access_token)
+            assert server.jwks_calls == 1
+
+            server.status_code = 503
+            clock.monotonic.return_value = 1000.0 + 3600
+            fief.validate_access_token(access_token)
+            assert server.jwks_calls == 2
+
+            clock.monotonic.return_value = 1000.0 + 3600 + 59
+            fief.validate_access_token(access_token)
+            assert server.jwks_calls == 2
+
+            server.status_code = 200
+            clock.monotonic.return_value = 1000.0 + 3600 + 60
+            fief.validate_access_token(access_token)
+            assert server.jwks_calls == 3
+            assert fief._jwks_expires_at == 1000.0 + 3600 + 60 + 3600
+
+    def test_initial_fetch_error(self, signature_key: jwk.JWK, access_token: str):
+        server = JWKSServer([signature_key])
+        server.status_code = 503
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+        ) as fief:
+            with pytest.raises(FiefRequestError):
+                fief.validate_access_token(access_token)
+
+    def test_unknown_key_refresh(
+        self, signature_key: jwk.JWK, rotated_key: jwk.JWK, user_id: str
+    ):
+        server = JWKSServer([signature_key])
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            jwks_refresh_interval=0,
+        ) as fief:
+            fief.validate_access_token(
+                generate_kid_access_token(signature_key, user_id)
+            )
+            assert server.jwks_calls == 1
+
+            server.keys = [signature_key, rotated_key]
+            info = fief.validate_access_token(
+                generate_kid_access_token(rotated_key, user_id)
+            )
+            assert info["id"] == uuid.UUID(user_id)
+            assert server.jwks_calls == 2
+
+    def test_unknown_key_rate_limited(
+        self,
+        clock: MagicMock,
+        signature_key: jwk.JWK,
+        rotated_key: jwk.JWK,
+        user_id: str,
+    ):
+        server = JWKSServer([signature_key])
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+        ) as fief:
+            fief.validate_access_token(
+                generate_kid_access_token(signature_key, user_id)
+            )
+
+            with pytest.raises(FiefAccessTokenInvalid):
+                fief.validate_access_token(
+                    generate_kid_access_token(rotated_key, user_id)
+                )
+            assert server.jwks_calls == 1
+
+            clock.monotonic.return_value = 1000.0 + 60
+            with pytest.raises(FiefAccessTokenInvalid):
+                fief.validate_access_token(
+                    generate_kid_access_token(rotated_key, user_id)
+                )
+            assert server.jwks_calls == 2
+
+            with pytest.raises(FiefAccessTokenInvalid):
+                fief.validate_access_token(
+                    generate_kid_access_token(rotated_key, user_id)
+                )
+            assert server.jwks_calls == 2
+
+    def test_unknown_key_refresh_error(
+        self, signature_key: jwk.JWK, rotated_key: jwk.JWK, user_id: str
+    ):
+        server = JWKSServer([signature_key])
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            jwks_refresh_interval=0,
+        ) as fief:
+            fief.validate_access_token(
+                generate_kid_access_token(signature_key, user_id)
+            )
+
+            server.status_code = 503
+            with pytest.raises(FiefAccessTokenInvalid):
+                fief.validate_access_token(
+                    generate_kid_access_token(rotated_key, user_id)
+                )
+            assert server.jwks_calls == 2
+            fief.validate_access_token(
+                generate_kid_access_token(signature_key, user_id)
+            )
+
+    def test_known_key_invalid_signature(
+        self, signature_key: jwk.JWK, rotated_key: jwk.JWK, user_id: str
+    ):
+        server = JWKSServer([signature_key])
+        forged_key = jwk.JWK(**rotated_key.export(as_dict=True))
+        forged_key["kid"] = signature_key.kid
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            jwks_refresh_interval=0,
+        ) as fief:
+            with pytest.raises(FiefAccessTokenInvalid):
+                fief.validate_access_token(
+                    generate_kid_access_token(forged_key, user_id)
+                )
+            assert server.jwks_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_async_unknown_key_refresh(
+        self, signature_key: jwk.JWK, rotated_key: jwk.JWK, user_id: str
+    ):
+        server = JWKSServer([signature_key])
+        async with FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.async_handler),
+            jwks_refresh_interval=0,
+        ) as fief:
+            await fief.validate_access_token(
+                generate_kid_access_token(signature_key, user_id)
+            )
+            assert server.jwks_calls == 1
+
+            server.keys = [signature_key, rotated_key]
+            info = await fief.validate_access_token(
+                generate_kid_access_token(rotated_key, user_id)
+            )
+            assert info["id"] == uuid.UUID(user_id)
+            assert server.jwks_calls == 2
+
+    @pytest.mark.asyncio
+    async def test_async_refresh_error(
+        self,
+        clock: MagicMock,
+        signature_key: jwk.JWK,
+        rotated_key: jwk.JWK,
+        user_id: str,
+    ):
+        server = JWKSServer([signature_key])
+        async with FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.async_handler),
+        ) as fief:
+            access_token = generate_kid_access_token(signature_key, user_id)
+            await fief.validate_access_token(access_token)
+
+            server.status_code = 503
+            clock.monotonic.return_value = 1000.0 + 3600
+            await fief.validate_access_token(access_token)
+            assert server.jwks_calls == 2
+
+            clock.monotonic.return_value = 1000.0 + 3600 + 59
+            await fief.validate_access_token(access_token)
+            assert server.jwks_calls == 2
+
+    @pytest.mark.asyncio
+    async def test_async_unknown_key_refresh_error(
+        self, signature_key: jwk.JWK, rotated_key: jwk.JWK, user_id: str
+    ):
+        server = JWKSServer([signature_key])
+        async with FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.async_handler),
+            jwks_refresh_interval=0,
+        ) as fief:
+            await fief.validate_access_token(
+                generate_kid_access_token(signature_key, user_id)
+            )
+
+            server.status_code = 503
+            with pytest.raises(FiefAccessTokenInvalid):
+                await fief.validate_access_token(
+                    generate_kid_access_token(rotated_key, user_id)
+                )
+            assert server.jwks_calls == 2
+
+
+def offline_handler(request: httpx.Request) -> httpx.Response:
+    pytest.fail(f"Unexpected request: {request.url}")
+
+
+async def offline_async_handler(request: httpx.Request) -> httpx.Response:
+    return offline_handler(request)
+
+
+OFFLINE_OPENID_CONFIGURATION = {
+    "issuer": "https://bretagne.fief.dev",
+    "authorization_endpoint": "https://bretagne.fief.dev/authorize",
+    "token_endpoint": "https://bretagne.fief.dev/token",
+    "userinfo_endpoint": "https://bretagne.fief.dev/userinfo",
+    "jwks_uri": "https://bretagne.fief.dev/.well-known/jwks.json",
+}
+
+
+class TestOffline:
+    @pytest.mark.parametrize("source", ["object", "json", "path"])
+    def test_sync(
+        self,
+        source: str,
+        tmp_path: pathlib.Path,
+        signature_key: jwk.JWK,
+        access_token: str,
+    ):
+        jwks_dict = {"keys": [signature_key.export_public(as_dict=True)]}
+        openid_configuration: OpenIDConfigurationSource
+        jwks: JWKSSource
+        if source == "object":
+            openid_configuration = OFFLINE_OPENID_CONFIGURATION
+            jwks = jwk.JWKSet.from_json(json.dumps(jwks_dict))
+        elif source == "json":
+            openid_configuration = json.dumps(OFFLINE_OPENID_CONFIGURATION)
+            jwks = json.dumps(jwks_dict)
+        else:
+            openid_configuration = tmp_path / "openid-configuration.json"
+            openid_configuration.write_text(json.dumps(OFFLINE_OPENID_CONFIGURATION))
+            jwks = str(tmp_path / "jwks.json")
+            (tmp_path / "jwks.json").write_text(json.dumps(jwks_dict))
+
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(offline_handler),
+            openid_configuration=openid_configuration,
+            jwks=jwks,
+        ) as fief:
+            fief.warmup()
+            assert fief.auth_url("https://www.bretagne.duchy/callback").startswith(
+                "https://bretagne.fief.dev/authorize?"
+            )
+            fief.validate_access_token(access_token)
+
+    def test_unknown_key(
+        self, signature_key: jwk.JWK, rotated_key: jwk.JWK, user_id: str
+    ):
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(offline_handler),
+            openid_configuration=OFFLINE_OPENID_CONFIGURATION,
+            jwks={"keys": [signature_key.export_public(as_dict=True)]},
+            jwks_refresh_interval=0,
+        ) as fief:
+            with pytest.raises(FiefAccessTokenInvalid):
+                fief.validate_access_token(
+                    generate_kid_access_token(rotated_key, user_id)
+                )
+
+    @pytest.mark.asyncio
+    async def test_async(self, signature_key: jwk.JWK, access_token: str):
+        async with FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(offline_async_handler),
+            openid_configuration=OFFLINE_OPENID_CONFIGURATION,
+            jwks={"keys": [signature_key.export_public(as_dict=True)]},
+        ) as fief:
+            await fief.start_refresher()
+            assert fief._refresher_task is None
+            await fief.validate_access_token(access_token)
+
+
+class TestFileCache:
+    def test_shared(
+        self, tmp_path: pathlib.Path, signature_key: jwk.JWK, access_token: str
+    ):
+        server = JWKSServer([signature_key], cache_control="max-age=120")
+        for _ in range(3):
+            with Fief(
+                "https://bretagne.fief.dev",
+                "CLIENT_ID",
+                transport=httpx.MockTransport(server.handler),
+                cache_dir=tmp_path,
+            ) as fief:
+                fief.validate_access_token(access_token)
+                assert 110 < fief._jwks_expires_at - time.monotonic() <= 120
+
+        assert server.openid_configuration_calls == 1
+        assert server.jwks_calls == 1
+
+    def test_expired(
+        self, tmp_path: pathlib.Path, signature_key: jwk.JWK, access_token: str
+    ):
+        server = JWKSServer([signature_key])
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            cache_dir=tmp_path,
+        ) as fief:
+            fief.validate_access_token(access_token)
+
+        mtime = time.time() - 3600
+        for path in tmp_path.iterdir():
+            os.utime(path, (mtime, mtime))
+
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            cache_dir=tmp_path,
+        ) as fief:
+            fief.validate_access_token(access_token)
+
+        assert server.openid_configuration_calls == 2
+        assert server.jwks_calls == 2
+
+    def test_rotated_key(
+        self,
+        tmp_path: pathlib.Path,
+        signature_key: jwk.JWK,
+        rotated_key: jwk.JWK,
+        access_token: str,
+        user_id: str,
+    ):
+        server = JWKSServer([signature_key])
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            cache_dir=tmp_path,
+        ) as fief:
+            fief.validate_access_token(access_token)
+
+        server.keys = [signature_key, rotated_key]
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            cache_dir=tmp_path,
+        ) as fief:
+            fief.validate_access_token(access_token)
+            assert server.jwks_calls == 1
+
+            # The JWKS read from disk doesn't prevent looking for the rotated key
+            info = fief.validate_access_token(
+                generate_kid_access_token(rotated_key, user_id)
+            )
+            assert str(info["id"]) == user_id
+            assert server.jwks_calls == 2
+
+    @pytest.mark.asyncio
+    async def test_async_shared(
+        self, tmp_path: pathlib.Path, signature_key: jwk.JWK, access_token: str
+    ):
+        server = JWKSServer([signature_key])
+        for _ in range(3):
+            async with FiefAsync(
+                "https://bretagne.fief.dev",
+                "CLIENT_ID",
+                transport=httpx.MockTransport(server.async_handler),
+                cache_dir=tmp_path,
+            ) as fief:
+                await fief.validate_access_token(access_token)
+
+        assert server.openid_configuration_calls == 1
+        assert server.jwks_calls == 1
+
+
+class TestAccessTokenCache:
+    def test_cache_hit(
+        self,
+        mocker: MockerFixture,
+        signature_key: jwk.JWK,
+        generate_access_token,
+        user_id: str,
+    ):
+        server = JWKSServer([signature_key])
+        access_token = generate_access_token(encrypt=False, scope="openid")
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            access_token_cache_size=10,
+        ) as fief:
+            decode_spy = mocker.spy(fief.jose_backend, "decode_jws")
+            info = fief.validate_access_token(access_token)
+            cached_info = fief.validate_access_token(
+                access_token, required_scope=["openid"]
+            )
+            assert cached_info == info
+            assert cached_info is not info
+            assert decode_spy.call_count == 1
+
+            with pytest.raises(FiefAccessTokenMissingScope):
+                fief.validate_access_token(access_token, required_scope=["admin"])
+            with pytest.raises(FiefAccessTokenACRTooLow):
+                fief.validate_access_token(access_token, required_acr=FiefACR.LEVEL_ONE)
+            with pytest.raises(FiefAccessTokenMissingPermission):
+                fief.validate_access_token(
+                    access_token, required_permissions=["castles:create"]
+                )
+            assert decode_spy.call_count == 1
+
+    def test_expires_with_token(
+        self, mocker: MockerFixture, signature_key: jwk.JWK, generate_access_token
+    ):
+        server = JWKSServer([signature_key])
+        access_token = generate_access_token(encrypt=False)
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            access_token_cache_size=10,
+        ) as fief:
+            fief.validate_access_token(access_token)
+
+            clock = mocker.patch("fief_client.cache.time")
+            clock.time.return_value = time.time() + 3600
+            decode_spy = mocker.spy(fief.jose_backend, "decode_jws")
+            fief.validate_access_token(access_token)
+            assert decode_spy.call_count == 1
+
+    def test_cleared_on_jwks_change(
+        self,
+        mocker: MockerFixture,
+        signature_key: jwk.JWK,
+        generate_access_token,
+    ):
+        server = JWKSServer([signature_key])
+        access_token = generate_access_token(encrypt=False)
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            access_token_cache_size=10,
+        ) as fief:
+            fief.validate_access_token(access_token)
+
+            server.keys = []
+            fief._jwks_expires_at = 0.0
+            with pytest.raises(FiefAccessTokenInvalid):
+                fief.validate_access_token(access_token)
+
+    def test_token_without_exp(
+        self, mocker: MockerFixture, signature_key: jwk.JWK, user_id: str
+    ):
+        server = JWKSServer([signature_key])
+        access_token = generate_kid_access_token(signature_key, user_id)
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            access_token_cache_size=10,
+        ) as fief:
+            decode_spy = mocker.spy(fief.jose_backend, "decode_jws")
+            fief.validate_access_token(access_token)
+            fief.validate_access_token(access_token)
+            assert decode_spy.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_async_cache_hit(
+        self, mocker: MockerFixture, signature_key: jwk.JWK, access_token: str
+    ):
+        server = JWKSServer([signature_key])
+        async with FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.async_handler),
+            access_token_cache_size=10,
+        ) as fief:
+            decode_spy = mocker.spy(fief.jose_backend, "decode_jws")
+            info = await fief.validate_access_token(access_token)
+            assert await fief.validate_access_token(access_token) == info
+            assert decode_spy.call_count == 1
+
+
+class TestRejectedAccessTokenCache:
+    def test_cache_hit(self, mocker: MockerFixture, signature_key: jwk.JWK):
+        server = JWKSServer([signature_key])
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            rejected_access_token_cache_size=10,
+        ) as fief:
+            decode_spy = mocker.spy(fief.jose_backend, "decode_jws")
+            for _ in range(3):
+                with pytest.raises(FiefAccessTokenInvalid):
+                    fief.validate_access_token("INVALID_TOKEN")
+            assert decode_spy.call_count == 1
+
+            clock = mocker.patch("fief_client.cache.time")
+            clock.time.return_value = time.time() + 60
+            with pytest.raises(FiefAccessTokenInvalid):
+                fief.validate_access_token("INVALID_TOKEN")
+            assert decode_spy.call_count == 2
+
+    def test_not_yet_valid(
+        self, mocker: MockerFixture, signature_key: jwk.JWK, generate_access_token
+    ):
+        access_token = generate_access_token(encrypt=False, nbf=int(time.time()) + 3600)
+        server = JWKSServer([signature_key])
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            rejected_access_token_cache_size=10,
+        ) as fief:
+            decode_spy = mocker.spy(fief.jose_backend, "decode_jws")
+            for _ in range(2):
+                with pytest.raises(FiefAccessTokenInvalid):
+                    fief.validate_access_token(access_token)
+            assert decode_spy.call_count == 2
+
+    def test_unknown_key_refresh(
+        self, signature_key: jwk.JWK, rotated_key: jwk.JWK, user_id: str
+    ):
+        server = JWKSServer([signature_key])
+        access_token = generate_kid_access_token(rotated_key, user_id)
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            jwks_refresh_interval=0,
+            rejected_access_token_cache_size=10,
+        ) as fief:
+            with pytest.raises(FiefAccessTokenInvalid):
+                fief.validate_access_token(access_token)
+            with pytest.raises(FiefAccessTokenInvalid):
+                fief.validate_access_token(access_token)
+
+            server.keys = [signature_key, rotated_key]
+            info = fief.validate_access_token(access_token)
+            assert info["id"] == uuid.UUID(user_id)
+
+    @pytest.mark.asyncio
+    async def test_async_cache_hit(self, mocker: MockerFixture, signature_key: jwk.JWK):
+        server = JWKSServer([signature_key])
+        async with FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.async_handler),
+            rejected_access_token_cache_size=10,
+        ) as fief:
+            decode_spy = mocker.spy(fief.jose_backend, "decode_jws")
+            for _ in range(3):
+                with pytest.raises(FiefAccessTokenInvalid):
+                    await fief.validate_access_token("INVALID_TOKEN")
+            assert decode_spy.call_count == 1
+
+
+class TestValidateAccessTokens:
+    def test_sync(
+        self,
+        signature_key: jwk.JWK,
+        generate_access_token,
+        user_id: str,
+        mocker: MockerFixture,
+    ):
+        valid_access_token = generate_access_token(encrypt=False, scope="openid")
+        missing_scope_access_token = generate_access_token(encrypt=False)
+        expired_access_token = generate_access_token(
+            encrypt=False, scope="openid", exp=int(time.time()) - 3600
+        )
+        server = JWKSServer([signature_key])
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+        ) as fief:
+            decode_jws = mocker.spy(fief.jose_backend, "decode_jws")
+            results = fief.validate_access_tokens(
+                [
+                    valid_access_token,
+                    "INVALID_TOKEN",
+                    missing_scope_access_token,
+                    valid_access_token,
+                    expired_access_token,
+                ],
+                required_scope=["openid"],
+            )
+
+        assert len(results) == 5
+        info = results[0]
+        assert not isinstance(info, FiefError)
+        assert info["id"] == uuid.UUID(user_id)
+        assert results[3] is info
+        assert isinstance(results[1], FiefAccessTokenInvalid)
+        assert isinstance(results[2], FiefAccessTokenMissingScope)
+        assert isinstance(results[4], FiefAccessTokenExpired)
+        assert decode_jws.call_count == 4
+        assert server.jwks_calls == 1
+
+    def test_sync_empty(self, signature_key: jwk.JWK):
+        server = JWKSServer([signature_key])
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+        ) as fief:
+            assert fief.validate_access_tokens([]) == []
+
+    def test_sync_unknown_key(
+        self, signature_key: jwk.JWK, rotated_key: jwk.JWK, user_id: str
+    ):
+        server = JWKSServer([signature_key])
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            jwks_refresh_interval=0,
+        ) as fief:
+            fief.validate_access_token(
+                generate_kid_access_token(signature_key, user_id)
+            )
+            assert server.jwks_calls == 1
+
+            server.keys = [signature_key, rotated_key]
+            results = fief.validate_access_tokens(
+                [
+                    generate_kid_access_token(rotated_key, user_id),
+                    generate_kid_access_token(signature_key, user_id),
+                    generate_kid_access_token(rotated_key, str(uuid.uuid4())),
+                ]
+            )
+            assert not any(isinstance(result, FiefError) for result in results)
+            assert server.jwks_calls == 2
+
+    def test_sync_unknown_key_fetch_error(
+        self, signature_key: jwk.JWK, rotated_key: jwk.JWK, user_id: str
+    ):
+        server = JWKSServer([signature_key])
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            jwks_refresh_interval=0,
+        ) as fief:
+            fief.validate_access_token(
+                generate_kid_access_token(signature_key, user_id)
+            )
+
+            server.status_code = 500
+            results = fief.validate_access_tokens(
+                [
+                    generate_kid_access_token(rotated_key, user_id),
+                    generate_kid_access_token(signature_key, user_id),
+                ]
+            )
+            assert isinstance(results[0], FiefAccessTokenInvalid)
+            assert not isinstance(results[1], FiefError)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("offload", [False, True])
+    async def test_async(
+        self,
+        offload: bool,
+        signature_key: jwk.JWK,
+        rotated_key: jwk.JWK,
+        user_id: str,
+        mocker: MockerFixture,
+    ):
+        server = JWKSServer([signature_key])
+        executor = ThreadPoolExecutor(max_workers=1) if offload else None
+        async with FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.async_handler),
+            jwks_refresh_interval=0,
+            executor=executor,
+        ) as fief:
+            await fief.validate_access_token(
+                generate_kid_access_token(signature_key, user_id)
+            )
+            assert server.jwks_calls == 1
+
+            server.keys = [signature_key, rotated_key]
+            access_token = generate_kid_access_token(rotated_key, user_id)
+            decode_jws = mocker.spy(fief.jose_backend, "decode_jws")
+            results = await fief.validate_access_tokens(
+                [access_token, "INVALID_TOKEN", access_token]
+            )
+            info = results[0]
+            assert not isinstance(info, FiefError)
+            assert info["id"] == uuid.UUID(user_id)
+            assert results[2] is info
+            assert isinstance(results[1], FiefAccessTokenInvalid)
+            assert server.jwks_calls == 2
+            # Unknown key on the first pass, then retried with the new JWKS
+            assert decode_jws.call_count == 3
+
+        if executor is not None:
+            executor.shutdown()
+
+
+class TestSingleFlight:
+    def test_sync(self, signature_key: jwk.JWK, access_token: str):
+        server = JWKSServer([signature_key], delay=0.05)
+        results: list[FiefAccessTokenInfo] = []
+
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+        ) as fief:
+            threads = [
+                threading.Thread(
+                    target=lambda: results.append(
+                        fief.validate_access_token(access_token)
+                    )
+                )
+                for _ in range(10)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=5)
+
+        assert len(results) == 10
+        assert server.openid_configuration_calls == 1
+        assert server.jwks_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_async(self, signature_key: jwk.JWK, access_token: str):
+        server = JWKSServer([signature_key], delay=0.05)
+        async with FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.async_handler),
+        ) as fief:
+            results = await asyncio.gather(
+                *(fief.validate_access_token(access_token) for _ in range(10))
+            )
+
+            assert len(results) == 10
+            assert server.openid_configuration_calls == 1
+            assert server.jwks_calls == 1
+            assert fief._pending_fetches == {}
+
+    @pytest.mark.asyncio
+    async def test_async_error(self, access_token: str):
+        calls = 0
+        error = httpx.ConnectError("Connection refused")
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            raise error
+
+        async with FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(handler),
+        ) as fief:
+            results = await asyncio.gather(
+                *(fief.validate_access_token(access_token) for _ in range(10)),
+                return_exceptions=True,
+            )
+            assert all(isinstance(result, httpx.ConnectError) for result in results)
+            assert calls == 1
+            assert fief._pending_fetches == {}
+
+
+class TestWarmup:
+    def test_sync(self, signature_key: jwk.JWK, access_token: str):
+        server = JWKSServer([signature_key])
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+        ) as fief:
+            fief.warmup()
+            assert server.openid_configuration_calls == 1
+            assert server.jwks_calls == 1
+            assert fief._httpx_client is not None
+
+            fief.validate_access_token(access_token)
+            assert server.jwks_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_async(self, signature_key: jwk.JWK, access_token: str):
+        server = JWKSServer([signature_key])
+        async with FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.async_handler),
+        ) as fief:
+            await fief.warmup()
+            assert server.openid_configuration_calls == 1
+            assert server.jwks_calls == 1
+            assert fief._httpx_client is not None
+
+            await fief.validate_access_token(access_token)
+            assert server.jwks_calls == 1
+
+
+class TestRefresher:
+    def test_sync(self, signature_key: jwk.JWK, access_token: str):
+        server = JWKSServer([signature_key])
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+        ) as fief:
+            fief.start_refresher()
+            deadline = time.monotonic() + 5
+            while server.jwks_calls == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert server.openid_configuration_calls == 1
+            assert server.jwks_calls == 1
+
+            fief._jwks_expires_at = 0.0
+            fief.validate_access_token(access_token)
+            assert server.jwks_calls == 1
+
+            fief.stop_refresher()
+            assert fief._refresher_thread is None
+            fief.validate_access_token(access_token)
+            assert server.jwks_calls == 2
+
+    def test_sync_renew(
+        self, mocker: MockerFixture, signature_key: jwk.JWK, access_token: str
+    ):
+        mocker.patch("fief_client.client.REFRESHER_MIN_DELAY", 0.01)
+        server = JWKSServer([signature_key], cache_control="no-cache")
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            jwks_refresh_interval=0.01,
+        ) as fief:
+            fief.start_refresher(lead_time=0)
+            deadline = time.monotonic() + 5
+            while server.jwks_calls < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert server.jwks_calls >= 3
+            assert server.openid_configuration_calls >= 3
+
+            server.status_code = 503
+            calls = server.jwks_calls
+            while server.jwks_calls < calls + 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            fief.validate_access_token(access_token)
+
+        assert fief._refresher_thread is None
+
+    @pytest.mark.asyncio
+    async def test_async(self, signature_key: jwk.JWK, access_token: str):
+        server = JWKSServer([signature_key])
+        async with FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.async_handler),
+        ) as fief:
+            await fief.start_refresher()
+            for _ in range(500):
+                if server.jwks_calls > 0:
+                    break
+                await asyncio.sleep(0.01)
+            assert server.openid_configuration_calls == 1
+            assert server.jwks_calls == 1
+
+            fief._jwks_expires_at = 0.0
+            await fief.validate_access_token(access_token)
+            assert server.jwks_calls == 1
+
+            refresher_task = fief._refresher_task
+            assert refresher_task is not None
+
+        assert refresher_task.cancelled()
+        assert fief._refresher_task is None
+
+    def test_sync_unexpected_error(
+        self, mocker: MockerFixture, signature_key: jwk.JWK, access_token: str
+    ):
+        mocker.patch("fief_client.client.REFRESHER_MIN_DELAY", 0.01)
+        server = JWKSServer([signature_key])
+        with Fief(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.handler),
+            jwks_refresh_interval=0.01,
+        ) as fief:
+            refresh_mock = mocker.patch.object(fief, "_refresh", side_effect=IndexError)
+            fief.start_refresher()
+            deadline = time.monotonic() + 5
+            while refresh_mock.call_count < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            assert refresh_mock.call_count >= 3
+            assert fief._refresher_thread is not None
+            assert fief._refresher_thread.is_alive()
+            assert fief._refresher_running
+
+    @pytest.mark.asyncio
+    async def test_async_unexpected_error(
+        self, mocker: MockerFixture, signature_key: jwk.JWK, access_token: str
+    ):
+        mocker.patch("fief_client.client.REFRESHER_MIN_DELAY", 0.01)
+        server = JWKSServer([signature_key])
+        async with FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.async_handler),
+            jwks_refresh_interval=0.01,
+        ) as fief:
+            refresh_mock = mocker.patch.object(fief, "_refresh", side_effect=IndexError)
+            await fief.start_refresher()
+            for _ in range(500):
+                if refresh_mock.call_count >= 3:
+                    break
+                await asyncio.sleep(0.01)
+
+            assert refresh_mock.call_count >= 3
+            assert fief._refresher_task is not None
+            assert not fief._refresher_task.done()
+            assert fief._refresher_running
+
+    @pytest.mark.asyncio
+    async def test_async_stopped_on_crash(
+        self, mocker: MockerFixture, signature_key: jwk.JWK, access_token: str
+    ):
+        server = JWKSServer([signature_key])
+        async with FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(server.async_handler),
+        ) as fief:
+            await fief.validate_access_token(access_token)
+            mocker.patch.object(fief, "_get_refresher_delay", side_effect=RuntimeError)
+            await fief.start_refresher()
+            refresher_task = fief._refresher_task
+            assert refresher_task is not None
+            with pytest.raises(RuntimeError):
+                await refresher_task
+
+            assert not fief._refresher_running
+            fief._jwks_expires_at = 0.0
+            await fief.validate_access_token(access_token)
+            assert server.jwks_calls == 2
+
+
+class TestExecutor:
+    @pytest.fixture
+    def executor(self) -> Generator[ThreadPoolExecutor, None, None]:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            yield executor
+
+    def get_client(
+        self, signature_key: jwk.JWK, executor: ThreadPoolExecutor, threshold: int = 0
+    ) -> FiefAsync:
+        return FiefAsync(
+            "https://bretagne.fief.dev",
+            "CLIENT_ID",
+            transport=httpx.MockTransport(offline_handler),
+            openid_configuration=OFFLINE_OPENID_CONFIGURATION,
+            jwks={"keys": [signature_key.export_public(as_dict=True)]},
+            executor=executor,
+            executor_threshold=threshold,
+        )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("threshold,offloaded", [(0, True), (100_000, False)])
+    async def test_validate_access_token(
+        self,
+        threshold: int,
+        offloaded: bool,
+        executor: ThreadPoolExecutor,
+        signature_key: jwk.JWK,
+        access_token: str,
+        user_id: str,
+        mocker: MockerFixture,
+    ):
+        async with self.get_client(signature_key, executor, threshold) as fief:
+            threads: list[threading.Thread] = []
+            decode_jws = fief.jose_backend.decode_jws
+
+            def spy(*args, **kwargs):
+                threads.append(threading.current_thread())
+                return decode_jws(*args, **kwargs)
+
+            mocker.patch.object(fief.jose_backend, "decode_jws", side_effect=spy)
+
+            info = await fief.validate_access_token(access_token)
+            assert info["id"] == uuid.UUID(user_id)
+            assert (threads[0] is not threading.main_thread()) is offloaded
+
+    @pytest.mark.asyncio
+    async def test_invalid_access_token(
+        self, executor: ThreadPoolExecutor, signature_key: jwk.JWK
+    ):
+        async with self.get_client(signature_key, executor) as fief:
+            with pytest.raises(FiefAccessTokenInvalid):
+                await fief.validate_access_token("INVALID_TOKEN")
+
+    @pytest.mark.asyncio
+    async def test_decode_id_token(
+        self,
+        executor: ThreadPoolExecutor,
+        signature_key: jwk.JWK,
+        signed_id_token: str,
+        user_id: str,
+        mocker: MockerFixture,
+    ):
+        async with self.get_client(signature_key, executor) as fief:
+            run_in_executor = mocker.spy(asyncio.get_running_loop(), "run_in_executor")
+            claims = await fief._call_with_jwks(
+                functools.partial(fief._decode_id_token, signed_id_token),
+                token=signed_id_token,
+            )
+            assert claims["sub"] == user_id
+            run_in_executor.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_process_pool_backend(
+        self, signature_key: jwk.JWK, access_token: str, user_id: str
+    ):
+        with ProcessPoolBackend(max_workers=1) as backend:
+            async with FiefAsync(
+                "https://bretagne.fief.dev",
+                "CLIENT_ID",
+                transport=httpx.MockTransport(offline_handler),
+                openid_configuration=OFFLINE_OPENID_CONFIGURATION,
+                jwks={"keys": [signature_key.export_public(as_dict=True)]},
+                jose_backend=backend,
+            ) as fief:
+                threads: list[threading.Thread] = []
+                decode_jws = backend.decode_jws
+
+                def spy(*args, **kwargs):
+                    threads.append(threading.current_thread())
+                    return decode_jws(*args, **kwargs)
+
+                backend.decode_jws = spy  # type: ignore[method-assign]
+
+                info = await fief.validate_access_token(access_token)
+                assert info["id"] == uuid.UUID(user_id)
+                assert threads[0] is not threading.main_thread()
+
+
 class TestUserinfo:
     def test_error_response(
         self, fief_client: Fief, mock_api_requests: respx.MockRouter
@@ -974,6 +2708,50 @@ class TestDecodeIdToken:
                 id_token, signature_key, code="CODE", access_token="ACCESS_TOKEN"
             )
 
+    @pytest.mark.parametrize(
+        "algorithm,key_parameters",
+        [
+            ("ES256", {"kty": "EC", "crv": "P-256"}),
+            ("ES384", {"kty": "EC", "crv": "P-384"}),
+            ("EdDSA", {"kty": "OKP", "crv": "Ed25519"}),
+        ],
+    )
+    def test_signed_at_hash_c_hash_algorithm(
+        self, algorithm: str, key_parameters: dict[str, str], fief_client: Fief
+    ):
+        key = jwk.JWK.generate(**key_parameters)
+        token = jwt.JWT(
+            header={"alg": algorithm},
+            claims={
+                "sub": "anne",
+                "c_hash": get_validation_hash("CODE", algorithm),
+                "at_hash": get_validation_hash("ACCESS_TOKEN", algorithm),
+            },
+        )
+        token.make_signed_token(key)
+        id_token = token.serialize()
+
+        with pytest.raises(FiefIdTokenInvalid):
+            fief_client._decode_id_token(
+                id_token, key, code="CODE", access_token="ACCESS_TOKEN"
+            )
+
+        with Fief(
+            "https://bretagne.fief.dev", "CLIENT_ID", algorithms=[algorithm]
+        ) as fief:
+            claims = fief._decode_id_token(
+                id_token, key, code="CODE", access_token="ACCESS_TOKEN"
+            )
+            assert claims["sub"] == "anne"
+
+            with pytest.raises(FiefIdTokenInvalid):
+                fief._decode_id_token(
+                    id_token,
+                    key,
+                    code="CODE",
+                    access_token="INVALID_ACCESS_TOKEN",
+                )
+
 
 class TestExplicitHost:
     def test_sync_client(self, mock_api_requests: respx.MockRouter):
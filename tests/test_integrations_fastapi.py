@@ -1,3 +1,5 @@
+import contextlib
+import time
 import uuid
 from collections.abc import AsyncGenerator
 from typing import Optional
@@ -6,15 +8,18 @@ import httpx
 import pytest
 import pytest_asyncio
 import respx
-from fastapi import Depends, FastAPI, status
+from fastapi import Depends, FastAPI, WebSocket, WebSocketDisconnect, status
 from fastapi.security.base import SecurityBase
 from fastapi.security.http import HTTPBearer
 from fastapi.security.oauth2 import OAuth2PasswordBearer
 from httpx import Response
+from pytest_mock import MockerFixture
+from starlette.testclient import TestClient
 
 from fief_client.client import (
     Fief,
     FiefAccessTokenInfo,
+    FiefAccessTokenRequirements,
     FiefACR,
     FiefAsync,
     FiefUserInfo,
@@ -97,6 +102,34 @@ def fastapi_app(fief_client: FiefClientClass, scheme: SecurityBase) -> FastAPI:
     ):
         return access_token_info
 
+    @app.get("/authenticated-policy")
+    async def get_authenticated_policy(
+        access_token_info: FiefAccessTokenInfo = Depends(
+            auth.authenticated(
+                policy=FiefAccessTokenRequirements(scope=["required_scope"])
+                | FiefAccessTokenRequirements(
+                    permissions=["castles:create"], acr=FiefACR.LEVEL_ONE
+                )
+            )
+        ),
+    ):
+        return access_token_info
+
+    @app.get(
+        "/authenticated-multiple",
+        dependencies=[Depends(auth.authenticated())],
+    )
+    async def get_authenticated_multiple(
+        scope_access_token_info: FiefAccessTokenInfo = Depends(
+            auth.authenticated(scope=["openid"])
+        ),
+        permission_access_token_info: FiefAccessTokenInfo = Depends(
+            auth.authenticated(permissions=["castles:create"])
+        ),
+    ):
+        assert scope_access_token_info == permission_access_token_info
+        return permission_access_token_info
+
     @app.get("/current-user")
     async def get_current_user(
         current_user: FiefAccessTokenInfo = Depends(auth.current_user()),
@@ -139,6 +172,30 @@ def fastapi_app(fief_client: FiefClientClass, scheme: SecurityBase) -> FastAPI:
     ):
         return current_user
 
+    @app.websocket("/ws")
+    async def websocket_endpoint(
+        websocket: WebSocket,
+        access_token_info: FiefAccessTokenInfo = Depends(
+            auth.websocket_authenticated(query_param="access_token")
+        ),
+    ):
+        await websocket.accept()
+        await websocket.send_json({"id": str(access_token_info["id"])})
+        with contextlib.suppress(WebSocketDisconnect):
+            async for message in websocket.iter_text():
+                await websocket.send_text(message)
+
+    @app.websocket("/ws-scope")
+    async def websocket_scope_endpoint(
+        websocket: WebSocket,
+        access_token_info: FiefAccessTokenInfo = Depends(
+            auth.websocket_authenticated(scope=["required_scope"])
+        ),
+    ):
+        await websocket.accept()
+        await websocket.send_json({"id": str(access_token_info["id"])})
+        await websocket.close()
+
     return app
 
 
@@ -160,6 +217,26 @@ async def test_openapi(test_client: httpx.AsyncClient, scheme: SecurityBase):
     assert scheme.scheme_name in json["components"]["securitySchemes"]
 
 
+def test_memoized_dependencies(fief_client: FiefClientClass, scheme: SecurityBase):
+    auth = FiefAuth(fief_client, scheme)
+    policy = FiefAccessTokenRequirements(scope=["required_scope"])
+
+    assert auth.authenticated() is auth.authenticated()
+    assert auth.authenticated(scope=["openid"]) is auth.authenticated(scope=["openid"])
+    assert auth.authenticated(policy=policy) is auth.authenticated(policy=policy)
+    assert auth.authenticated(scope=["openid"]) is not auth.authenticated()
+    assert auth.authenticated(optional=True) is not auth.authenticated()
+    assert auth.authenticated(
+        policy=FiefAccessTokenRequirements(scope=["required_scope"])
+    ) is not auth.authenticated(policy=policy)
+
+    assert auth.current_user() is auth.current_user()
+    assert auth.current_user(permissions=["castles:read"]) is auth.current_user(
+        permissions=["castles:read"]
+    )
+    assert auth.current_user(refresh=True) is not auth.current_user()
+
+
 @pytest.mark.asyncio
 class TestAuthenticated:
     async def test_missing_token(self, test_client: httpx.AsyncClient):
@@ -337,6 +414,92 @@ class TestAuthenticated:
             "access_token": access_token,
         }
 
+    @pytest.mark.parametrize(
+        "claims,status_code",
+        [
+            ({"scope": "required_scope"}, 200),
+            ({"permissions": ["castles:create"], "acr": FiefACR.LEVEL_ONE}, 200),
+            ({"permissions": ["castles:create"], "acr": FiefACR.LEVEL_ZERO}, 403),
+            ({}, 403),
+        ],
+    )
+    async def test_policy(
+        self,
+        claims: dict,
+        status_code: int,
+        test_client: httpx.AsyncClient,
+        generate_access_token,
+    ):
+        access_token = generate_access_token(encrypt=False, **claims)
+
+        response = await test_client.get(
+            "/authenticated-policy",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+        assert response.status_code == status_code
+
+    async def test_multiple_validated_once(
+        self,
+        test_client: httpx.AsyncClient,
+        fief_client: FiefClientClass,
+        generate_access_token,
+        mocker: MockerFixture,
+    ):
+        access_token = generate_access_token(
+            encrypt=False, scope="openid", permissions=["castles:create"]
+        )
+        validate_access_token_spy = mocker.spy(fief_client, "validate_access_token")
+
+        response = await test_client.get(
+            "/authenticated-multiple",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert validate_access_token_spy.call_count == 1
+
+        response = await test_client.get(
+            "/authenticated-multiple",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert validate_access_token_spy.call_count == 2
+
+    async def test_multiple_missing_permission(
+        self,
+        test_client: httpx.AsyncClient,
+        fief_client: FiefClientClass,
+        generate_access_token,
+        mocker: MockerFixture,
+    ):
+        access_token = generate_access_token(encrypt=False, scope="openid")
+        validate_access_token_spy = mocker.spy(fief_client, "validate_access_token")
+
+        response = await test_client.get(
+            "/authenticated-multiple",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert validate_access_token_spy.call_count == 1
+
+    async def test_multiple_invalid_token(
+        self,
+        test_client: httpx.AsyncClient,
+        fief_client: FiefClientClass,
+        mocker: MockerFixture,
+    ):
+        validate_access_token_spy = mocker.spy(fief_client, "validate_access_token")
+
+        response = await test_client.get(
+            "/authenticated-multiple", headers={"Authorization": "Bearer INVALID_TOKEN"}
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert validate_access_token_spy.call_count == 1
+
 
 @pytest.mark.asyncio
 class TestCurrentUser:
@@ -558,3 +721,117 @@ class TestCurrentUser:
         assert json == {"sub": user_id}
 
         assert mock_api_requests.get("/userinfo").call_count == 2
+
+
+class TestWebSocketAuthenticated:
+    @pytest.mark.parametrize(
+        "path,headers",
+        [
+            ("/ws", {}),
+            ("/ws", {"Authorization": "Bearer INVALID_TOKEN"}),
+            ("/ws?access_token=INVALID_TOKEN", {}),
+            ("/ws-scope?access_token=ACCESS_TOKEN", {}),
+        ],
+    )
+    def test_unauthorized(
+        self, path: str, headers: dict[str, str], fastapi_app: FastAPI
+    ):
+        with TestClient(fastapi_app) as test_client:
+            with pytest.raises(WebSocketDisconnect) as excinfo:
+                with test_client.websocket_connect(path, headers=headers):
+                    pass
+
+        assert excinfo.value.code == status.WS_1008_POLICY_VIOLATION
+        assert excinfo.value.reason == "Unauthorized"
+
+    def test_expired_token(self, fastapi_app: FastAPI, generate_access_token):
+        access_token = generate_access_token(encrypt=False, exp=0)
+
+        with TestClient(fastapi_app) as test_client:
+            with pytest.raises(WebSocketDisconnect) as excinfo:
+                with test_client.websocket_connect(f"/ws?access_token={access_token}"):
+                    pass
+
+        assert excinfo.value.code == status.WS_1008_POLICY_VIOLATION
+
+    def test_missing_scope(self, fastapi_app: FastAPI, generate_access_token):
+        access_token = generate_access_token(encrypt=False, scope="openid")
+
+        with TestClient(fastapi_app) as test_client:
+            with pytest.raises(WebSocketDisconnect) as excinfo:
+                with test_client.websocket_connect(
+                    "/ws-scope", headers={"Authorization": f"Bearer {access_token}"}
+                ):
+                    pass
+
+        assert excinfo.value.code == status.WS_1008_POLICY_VIOLATION
+        assert excinfo.value.reason == "Forbidden"
+
+    @pytest.mark.parametrize("header", [True, False])
+    def test_valid_token(
+        self, header: bool, fastapi_app: FastAPI, generate_access_token, user_id: str
+    ):
+        access_token = generate_access_token(encrypt=False, scope="openid")
+        path, headers = (
+            ("/ws", {"Authorization": f"Bearer {access_token}"})
+            if header
+            else (f"/ws?access_token={access_token}", {})
+        )
+
+        with TestClient(fastapi_app) as test_client:
+            with test_client.websocket_connect(path, headers=headers) as websocket:
+                assert websocket.receive_json() == {"id": user_id}
+                websocket.send_text("Hello")
+                assert websocket.receive_text() == "Hello"
+
+    def test_expiration(
+        self, fastapi_app: FastAPI, generate_access_token, mocker: MockerFixture
+    ):
+        exp = int(time.time()) + 3600
+        access_token = generate_access_token(encrypt=False, exp=exp)
+        mocker.patch(
+            "fief_client.integrations.fastapi.time", **{"time.return_value": exp - 0.1}
+        )
+
+        with TestClient(fastapi_app) as test_client:
+            with test_client.websocket_connect(
+                "/ws", headers={"Authorization": f"Bearer {access_token}"}
+            ) as websocket:
+                websocket.receive_json()
+                message = websocket.receive()
+
+        assert message["type"] == "websocket.close"
+        assert message["code"] == status.WS_1008_POLICY_VIOLATION
+        assert message["reason"] == "Access token expired"
+
+    def test_expiration_cancelled(
+        self, fastapi_app: FastAPI, generate_access_token, mocker: MockerFixture
+    ):
+        exp = int(time.time()) + 3600
+        access_token = generate_access_token(encrypt=False, exp=exp)
+        mocker.patch(
+            "fief_client.integrations.fastapi.time", **{"time.return_value": exp - 0.1}
+        )
+        on_websocket_expired_spy = mocker.spy(FiefAuth, "on_websocket_expired")
+
+        with TestClient(fastapi_app) as test_client:
+            with test_client.websocket_connect(
+                "/ws", headers={"Authorization": f"Bearer {access_token}"}
+            ) as websocket:
+                websocket.receive_json()
+                websocket.close()
+            time.sleep(0.3)
+
+        on_websocket_expired_spy.assert_not_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fief_class", [Fief, FiefAsync])
+async def test_lifespan(fief_class: type[FiefClientClass]):
+    fief = fief_class("https://bretagne.fief.dev", "CLIENT_ID", "CLIENT_SECRET")
+    auth = FiefAuth(fief, HTTPBearer(auto_error=False))
+    app = FastAPI(lifespan=auth.lifespan)
+
+    async with auth.lifespan(app):
+        assert fief._openid_configuration is not None
+        assert fief._jwks is not None
@@ -8,7 +8,12 @@ from flask import Flask, g, session
 from flask.testing import FlaskClient
 from httpx import Response
 
-from fief_client.client import Fief, FiefACR, FiefUserInfo
+from fief_client.client import (
+    Fief,
+    FiefAccessTokenRequirements,
+    FiefACR,
+    FiefUserInfo,
+)
 from fief_client.integrations.flask import (
     FiefAuth,
     FiefAuthForbidden,
@@ -74,6 +79,16 @@ def flask_app(fief_client: Fief) -> Generator[Flask, None, None]:
     def get_authenticated_permission():
         return g.access_token_info
 
+    @app.get("/authenticated-policy")
+    @auth.authenticated(
+        policy=FiefAccessTokenRequirements(scope=["required_scope"])
+        | FiefAccessTokenRequirements(
+            permissions=["castles:create"], acr=FiefACR.LEVEL_ONE
+        )
+    )
+    def get_authenticated_policy():
+        return g.access_token_info
+
     @app.get("/current-user")
     @auth.current_user()
     def get_current_user():
@@ -285,6 +300,31 @@ class TestAuthenticated:
             "access_token": access_token,
         }
 
+    @pytest.mark.parametrize(
+        "claims,status_code",
+        [
+            ({"scope": "required_scope"}, 200),
+            ({"permissions": ["castles:create"], "acr": FiefACR.LEVEL_ONE}, 200),
+            ({"permissions": ["castles:create"], "acr": FiefACR.LEVEL_ZERO}, 403),
+            ({}, 403),
+        ],
+    )
+    def test_policy(
+        self,
+        claims: dict,
+        status_code: int,
+        test_client: FlaskClient,
+        generate_access_token,
+    ):
+        access_token = generate_access_token(encrypt=False, **claims)
+
+        response = test_client.get(
+            "/authenticated-policy",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+        assert response.status_code == status_code
+
 
 class TestCurrentUser:
     def test_missing_token(self, test_client: FlaskClient):
@@ -522,3 +562,15 @@ def test_get_cookie():
     with app.test_request_context(headers={"Cookie": "COOKIE_NAME=VALUE"}):
         result = cookie_getter()
         assert result == "VALUE"
+
+
+def test_init_app():
+    fief = Fief("https://bretagne.fief.dev", "CLIENT_ID", "CLIENT_SECRET")
+    auth = FiefAuth(fief, get_authorization_scheme_token())
+    app = Flask(__name__)
+
+    auth.init_app(app)
+
+    assert app.extensions["fief"] is auth
+    assert fief._openid_configuration is not None
+    assert fief._jwks is not None
@@ -0,0 +1,361 @@
+import json
+import time
+from collections.abc import Generator
+from typing import Optional
+
+import pytest
+from jwcrypto import jwk, jwt
+from jwcrypto.common import JWException, base64url_encode
+
+from fief_client.jose import (
+    CryptographyBackend,
+    IndexedJWKSet,
+    JOSEBackend,
+    JWCryptoBackend,
+    ProcessPoolBackend,
+    get_algorithm,
+    get_unverified_claims,
+)
+
+
+def generate_keys(count: int) -> list[jwk.JWK]:
+    return [
+        jwk.JWK.generate(kty="RSA", size=2048, kid=f"key-{i}") for i in range(count)
+    ]
+
+
+def sign(key: jwk.JWK, header: dict, **claims) -> str:
+    token = jwt.JWT(header={"alg": "RS256", **header}, claims={"sub": "anne", **claims})
+    token.make_signed_token(key)
+    return token.serialize()
+
+
+ALGORITHM_KEYS = {
+    "RS384": {"kty": "RSA", "size": 2048},
+    "RS512": {"kty": "RSA", "size": 2048},
+    "ES256": {"kty": "EC", "crv": "P-256"},
+    "ES384": {"kty": "EC", "crv": "P-384"},
+    "ES512": {"kty": "EC", "crv": "P-521"},
+    "EdDSA": {"kty": "OKP", "crv": "Ed25519"},
+}
+
+
+def sign_with_algorithm(algorithm: str) -> tuple[IndexedJWKSet, str]:
+    key = jwk.JWK.generate(kid="key", **ALGORITHM_KEYS[algorithm])
+    jwks = IndexedJWKSet()
+    jwks.add(jwk.JWK(**key.export_public(as_dict=True)))
+    token = jwt.JWT(header={"alg": algorithm, "kid": "key"}, claims={"sub": "anne"})
+    token.make_signed_token(key)
+    return jwks, token.serialize()
+
+
+@pytest.fixture(scope="module")
+def rsa_keys() -> list[jwk.JWK]:
+    return generate_keys(3)
+
+
+@pytest.fixture(scope="module")
+def indexed_jwks(rsa_keys: list[jwk.JWK]) -> IndexedJWKSet:
+    jwks = jwk.JWKSet()
+    for key in rsa_keys:
+        jwks.add(jwk.JWK(**key.export_public(as_dict=True)))
+    return IndexedJWKSet.from_json(jwks.export(private_keys=False))
+
+
+def test_from_jwks(rsa_keys: list[jwk.JWK]):
+    jwks = jwk.JWKSet()
+    for key in rsa_keys:
+        jwks.add(key)
+
+    indexed_jwks = IndexedJWKSet.from_jwks(jwks)
+    assert len(indexed_jwks["keys"]) == 3
+    assert indexed_jwks.get_key("key-1") is not None
+    assert IndexedJWKSet.from_jwks(indexed_jwks) is indexed_jwks
+
+
+def test_get_algorithm(rsa_keys: list[jwk.JWK]):
+    assert get_algorithm(sign(rsa_keys[0], {})) == "RS256"
+    with pytest.raises(JWException):
+        get_algorithm("INVALID_TOKEN")
+
+
+def test_get_unverified_claims(rsa_keys: list[jwk.JWK]):
+    assert get_unverified_claims(sign(rsa_keys[0], {}, exp=1000)) == {
+        "sub": "anne",
+        "exp": 1000,
+    }
+    for token in ("INVALID_TOKEN", "a.b.c", "a.WzFd.c"):
+        with pytest.raises(JWException):
+            get_unverified_claims(token)
+
+
+def test_get_verification_key(rsa_keys: list[jwk.JWK], indexed_jwks: IndexedJWKSet):
+    token = sign(rsa_keys[1], {"kid": "key-1"})
+    key = indexed_jwks.get_verification_key(token)
+    assert isinstance(key, jwk.JWK)
+    assert key.kid == "key-1"
+    jwt.JWT(jwt=token, algs=["RS256"], key=key)
+
+
+def test_get_verification_key_without_kid(
+    rsa_keys: list[jwk.JWK], indexed_jwks: IndexedJWKSet
+):
+    token = sign(rsa_keys[1], {})
+    assert indexed_jwks.get_verification_key(token) is indexed_jwks
+    jwt.JWT(jwt=token, algs=["RS256"], key=indexed_jwks)
+
+
+def test_get_verification_key_unknown_kid(indexed_jwks: IndexedJWKSet):
+    token = sign(generate_keys(1)[0], {"kid": "unknown"})
+    with pytest.raises(jwt.JWTMissingKey):
+        indexed_jwks.get_verification_key(token)
+
+
+def test_get_verification_key_malformed_token(indexed_jwks: IndexedJWKSet):
+    assert indexed_jwks.get_verification_key("INVALID_TOKEN") is indexed_jwks
+
+
+def test_get_verification_key_duplicate_kid(rsa_keys: list[jwk.JWK]):
+    other_key = jwk.JWK.generate(kty="RSA", size=2048, kid="key-0")
+    jwks = IndexedJWKSet()
+    jwks.add(rsa_keys[0])
+    jwks.add(other_key)
+
+    token = sign(other_key, {"kid": "key-0"})
+    key = jwks.get_verification_key(token)
+    assert isinstance(key, jwk.JWKSet)
+    assert len(key["keys"]) == 2
+    jwt.JWT(jwt=token, algs=["RS256"], key=key)
+
+
+@pytest.fixture(params=[JWCryptoBackend, CryptographyBackend])
+def backend(request) -> JOSEBackend:
+    return request.param()
+
+
+class TestBackends:
+    def test_valid(
+        self, backend: JOSEBackend, rsa_keys: list[jwk.JWK], indexed_jwks: IndexedJWKSet
+    ):
+        token = sign(rsa_keys[1], {"kid": "key-1"}, exp=int(time.time()) + 60)
+        claims = backend.decode_jws(token, indexed_jwks)
+        assert claims["sub"] == "anne"
+
+    def test_without_kid(
+        self, backend: JOSEBackend, rsa_keys: list[jwk.JWK], indexed_jwks: IndexedJWKSet
+    ):
+        token = sign(rsa_keys[2], {})
+        assert backend.decode_jws(token, indexed_jwks)["sub"] == "anne"
+
+    @pytest.mark.parametrize(
+        "claims,error",
+        [
+            ({"exp": -30}, None),
+            ({"exp": -120}, jwt.JWTExpired),
+            ({"nbf": 30}, None),
+            ({"nbf": 120}, jwt.JWTNotYetValid),
+        ],
+    )
+    def test_time_claims(
+        self,
+        backend: JOSEBackend,
+        rsa_keys: list[jwk.JWK],
+        indexed_jwks: IndexedJWKSet,
+        claims: dict,
+        error: Optional[type[Exception]],
+    ):
+        now = int(time.time())
+        token = sign(
+            rsa_keys[0],
+            {"kid": "key-0"},
+            **{name: now + delta for name, delta in claims.items()},
+        )
+        if error is None:
+            backend.decode_jws(token, indexed_jwks)
+        else:
+            with pytest.raises(error):
+                backend.decode_jws(token, indexed_jwks)
+
+    def test_unknown_key(self, backend: JOSEBackend, indexed_jwks: IndexedJWKSet):
+        token = sign(generate_keys(1)[0], {})
+        with pytest.raises(jwt.JWTMissingKey):
+            backend.decode_jws(token, indexed_jwks)
+
+    def test_invalid_signature(
+        self, backend: JOSEBackend, rsa_keys: list[jwk.JWK], indexed_jwks: IndexedJWKSet
+    ):
+        token = sign(rsa_keys[0], {"kid": "key-0"})
+        header, payload, _ = token.split(".")
+        forged_payload = base64url_encode(json.dumps({"sub": "admin"}))
+        with pytest.raises(JWException) as excinfo:
+            backend.decode_jws(f"{header}.{forged_payload}.{_}", indexed_jwks)
+        assert not isinstance(excinfo.value, jwt.JWTMissingKey)
+
+    def test_algorithm_not_allowed(
+        self, backend: JOSEBackend, indexed_jwks: IndexedJWKSet
+    ):
+        header = base64url_encode(json.dumps({"alg": "none"}))
+        payload = base64url_encode(json.dumps({"sub": "admin"}))
+        with pytest.raises(JWException):
+            backend.decode_jws(f"{header}.{payload}.", indexed_jwks)
+
+    @pytest.mark.parametrize("token", ["INVALID_TOKEN", "a.b.c", "a.b.c.d.e"])
+    def test_malformed(
+        self, backend: JOSEBackend, indexed_jwks: IndexedJWKSet, token: str
+    ):
+        with pytest.raises(JWException):
+            backend.decode_jws(token, indexed_jwks)
+
+
+@pytest.mark.parametrize("algorithm", list(ALGORITHM_KEYS))
+class TestBackendsAlgorithms:
+    def test_allowed(self, backend: JOSEBackend, algorithm: str):
+        jwks, token = sign_with_algorithm(algorithm)
+        claims = backend.decode_jws(token, jwks, algorithms=["RS256", algorithm])
+        assert claims["sub"] == "anne"
+
+    def test_not_allowed(self, backend: JOSEBackend, algorithm: str):
+        jwks, token = sign_with_algorithm(algorithm)
+        with pytest.raises(JWException):
+            backend.decode_jws(token, jwks)
+
+    def test_invalid_signature(self, backend: JOSEBackend, algorithm: str):
+        jwks, token = sign_with_algorithm(algorithm)
+        _, other_token = sign_with_algorithm(algorithm)
+        header, payload, _ = token.split(".")
+        signature = other_token.split(".")[2]
+        with pytest.raises(JWException):
+            backend.decode_jws(
+                f"{header}.{payload}.{signature}", jwks, algorithms=[algorithm]
+            )
+
+
+def test_algorithm_key_type_mismatch(backend: JOSEBackend):
+    """A key can't be used with an algorithm of another family, even if both are allowed."""
+    jwks, token = sign_with_algorithm("ES384")
+    header, payload, signature = token.split(".")
+    forged_header = base64url_encode(json.dumps({"alg": "ES256", "kid": "key"}))
+    with pytest.raises(JWException):
+        backend.decode_jws(
+            f"{forged_header}.{payload}.{signature}",
+            jwks,
+            algorithms=["ES256", "ES384"],
+        )
+
+
+@pytest.fixture(scope="module")
+def process_pool_backend() -> Generator[ProcessPoolBackend, None, None]:
+    with ProcessPoolBackend(max_workers=1) as backend:
+        yield backend
+
+
+class TestProcessPoolBackend:
+    def test_valid(
+        self,
+        process_pool_backend: ProcessPoolBackend,
+        rsa_keys: list[jwk.JWK],
+        indexed_jwks: IndexedJWKSet,
+    ):
+        token = sign(rsa_keys[1], {"kid": "key-1"}, exp=int(time.time()) + 60)
+        claims = process_pool_backend.decode_jws(token, indexed_jwks)
+        assert claims["sub"] == "anne"
+
+    @pytest.mark.parametrize(
+        "key_index,claims,error",
+        [
+            (0, {"exp": -3600}, jwt.JWTExpired),
+            (None, {}, jwt.JWTMissingKey),
+        ],
+    )
+    def test_errors(
+        self,
+        process_pool_backend: ProcessPoolBackend,
+        rsa_keys: list[jwk.JWK],
+        indexed_jwks: IndexedJWKSet,
+        key_index: Optional[int],
+        claims: dict,
+        error: type[Exception],
+    ):
+        key = (
+            rsa_keys[key_index]
+            if key_index is not None
+            else jwk.JWK.generate(kty="RSA", size=2048, kid="unknown")
+        )
+        token = sign(
+            key,
+            {"kid": key.kid},
+            **{name: int(time.time()) + delta for name, delta in claims.items()},
+        )
+        with pytest.raises(error):
+            process_pool_backend.decode_jws(token, indexed_jwks)
+
+    def test_algorithms(self, process_pool_backend: ProcessPoolBackend):
+        jwks, token = sign_with_algorithm("EdDSA")
+        with pytest.raises(JWException):
+            process_pool_backend.decode_jws(token, jwks)
+        claims = process_pool_backend.decode_jws(token, jwks, algorithms=["EdDSA"])
+        assert claims["sub"] == "anne"
+
+    def test_jwks_change(
+        self,
+        process_pool_backend: ProcessPoolBackend,
+        rsa_keys: list[jwk.JWK],
+        indexed_jwks: IndexedJWKSet,
+    ):
+        token = sign(rsa_keys[0], {"kid": "key-0"})
+        process_pool_backend.decode_jws(token, indexed_jwks)
+        executor = process_pool_backend._executor
+
+        process_pool_backend.decode_jws(token, indexed_jwks)
+        assert process_pool_backend._executor is executor
+
+        new_key = jwk.JWK.generate(kty="RSA", size=2048, kid="new-key")
+        new_jwks = IndexedJWKSet()
+        new_jwks.add(new_key)
+        claims = process_pool_backend.decode_jws(
+            sign(new_key, {"kid": "new-key"}), new_jwks
+        )
+        assert claims["sub"] == "anne"
+        assert process_pool_backend._executor is not executor
+        with pytest.raises(jwt.JWTMissingKey):
+            process_pool_backend.decode_jws(token, new_jwks)
+
+    def test_jwks_refresh(self, rsa_keys: list[jwk.JWK], indexed_jwks: IndexedJWKSet):
+        token = sign(rsa_keys[0], {"kid": "key-0"})
+        with ProcessPoolBackend(max_workers=1) as backend:
+            backend.decode_jws(token, indexed_jwks)
+            executor = backend._executor
+
+            # A refreshed JWKS with the same keys keeps the pool
+            refreshed_jwks = IndexedJWKSet.from_json(
+                indexed_jwks.export(private_keys=False)
+            )
+            backend.decode_jws(token, refreshed_jwks)
+            backend.decode_jws(token, indexed_jwks)
+            assert backend._executor is executor
+
+    def test_jwks_previous(self, rsa_keys: list[jwk.JWK], indexed_jwks: IndexedJWKSet):
+        token = sign(rsa_keys[0], {"kid": "key-0"})
+        new_key = jwk.JWK.generate(kty="RSA", size=2048, kid="new-key")
+        new_jwks = IndexedJWKSet()
+        new_jwks.add(new_key)
+        new_token = sign(new_key, {"kid": "new-key"})
+        with ProcessPoolBackend(max_workers=1) as backend:
+            backend.decode_jws(token, indexed_jwks)
+            backend.decode_jws(new_token, new_jwks)
+            executor = backend._executor
+
+            # Calls started before the rotation don't bring the previous pool back
+            for _ in range(3):
+                assert backend.decode_jws(token, indexed_jwks)["sub"] == "anne"
+                assert backend.decode_jws(new_token, new_jwks)["sub"] == "anne"
+            assert backend._executor is executor
+
+    def test_shutdown(self, rsa_keys: list[jwk.JWK], indexed_jwks: IndexedJWKSet):
+        backend = ProcessPoolBackend(max_workers=1)
+        token = sign(rsa_keys[0], {"kid": "key-0"})
+        backend.decode_jws(token, indexed_jwks)
+        backend.shutdown()
+        assert backend._executor is None
+        assert backend.decode_jws(token, indexed_jwks)["sub"] == "anne"
+        backend.shutdown()
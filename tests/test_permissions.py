@@ -0,0 +1,102 @@
+import pytest
+
+from fief_client.permissions import (
+    PermissionCatalog,
+    PermissionIndex,
+    PermissionRequirement,
+    is_pattern,
+)
+
+PERMISSIONS = [
+    "castles:read",
+    "castles:create",
+    "org/123/members:read",
+    "org/1234/members:create",
+]
+
+
+@pytest.mark.parametrize(
+    "permission,expected",
+    [("castles:*", True), ("org/123/*", True), ("castles:read", False)],
+)
+def test_is_pattern(permission: str, expected: bool):
+    assert is_pattern(permission) is expected
+
+
+@pytest.mark.parametrize(
+    "permission,expected",
+    [
+        ("castles:read", True),
+        ("castles:delete", False),
+        ("castles:*", True),
+        ("castle*", True),
+        ("dungeons:*", False),
+        ("org/123/*", True),
+        ("org/12/*", False),
+        ("org/*", True),
+        ("z*", False),
+        ("*", True),
+    ],
+)
+def test_permission_index_match(permission: str, expected: bool):
+    index = PermissionIndex(PERMISSIONS)
+    assert index.match(permission) is expected
+
+
+def test_permission_index_empty():
+    index = PermissionIndex([])
+    assert len(index) == 0
+    assert not index.match("*")
+    assert "castles:read" not in index
+
+
+@pytest.mark.parametrize(
+    "permissions,expected",
+    [
+        ([], True),
+        (["castles:read", "castles:create"], True),
+        (["castles:read", "castles:delete"], False),
+        (["castles:*", "org/123/*"], True),
+        (["castles:read", "dungeons:*"], False),
+    ],
+)
+def test_permission_requirement(permissions: list[str], expected: bool):
+    requirement = PermissionRequirement(permissions)
+    assert bool(requirement) is bool(permissions)
+    assert requirement.check(PermissionIndex(PERMISSIONS)) is expected
+
+
+class TestPermissionCatalog:
+    @pytest.fixture
+    def catalog(self) -> PermissionCatalog:
+        return PermissionCatalog([*PERMISSIONS, "castles:delete", "castles:read"])
+
+    def test_catalog(self, catalog: PermissionCatalog):
+        assert len(catalog) == 5
+        assert "castles:delete" in catalog
+        assert "dungeons:read" not in catalog
+
+    def test_encode(self, catalog: PermissionCatalog):
+        assert catalog.encode([]) == 0
+        assert catalog.encode(["castles:read", "castles:create"]) == 0b11
+        assert catalog.encode(["castles:read", "dungeons:read"]) is None
+
+    @pytest.mark.parametrize(
+        "permissions,expected",
+        [
+            ([], True),
+            (["castles:read", "castles:create"], True),
+            (["castles:read", "castles:delete"], False),
+            (["castles:*", "org/123/*"], True),
+            (["castles:read", "dungeons:*"], False),
+            (["dungeons:read"], False),
+        ],
+    )
+    def test_compile(
+        self, catalog: PermissionCatalog, permissions: list[str], expected: bool
+    ):
+        requirement = catalog.compile(permissions)
+        assert requirement.catalog is catalog
+        mask = catalog.encode(PERMISSIONS)
+        assert mask is not None
+        assert requirement.check(mask) is expected